@@ -3,3 +3,14 @@
 PYTHONPATH=src pytest -v -s tests/test_cooking.py
 PYTHONPATH=src pytest -v -s tests/test_solutions.py
 PYTHONPATH=src pytest -v -s tests/test_gaps.py
+PYTHONPATH=src pytest -v -s tests/test_peaks.py
+PYTHONPATH=src pytest -v -s tests/test_channels.py
+PYTHONPATH=src pytest -v -s tests/test_core.py
+PYTHONPATH=src pytest -v -s tests/test_batch_runner.py
+PYTHONPATH=src pytest -v -s tests/test_engines.py
+PYTHONPATH=src pytest -v -s tests/test_evaluator.py
+PYTHONPATH=src pytest -v -s tests/test_profiling.py
+PYTHONPATH=src pytest -v -s tests/test_metrics.py
+PYTHONPATH=src pytest -v -s tests/test_sniffing.py
+PYTHONPATH=src pytest -v -s tests/test_rollups.py
+PYTHONPATH=src pytest -v -s tests/test_portfolio.py
@@ -9,55 +9,91 @@ It demonstrates the invocation of the calculate_nec_22087_capacity subroutine.
 Usage:
     python calculate_panel_capacity.py --panel-size 200 --voltage 240 meter_data1.csv meter_data2.csv ...
 
+Meter files may be gzip-compressed (.gz), and zip archives (e.g. utility or UtilityAPI bulk exports) are processed
+member by member (each CSV in the archive as a file), decompressing while reading without extracting to disk:
+    python calculate_panel_capacity.py --panel-size 200 export.zip meter_data3.csv.gz
+
+Files in an unsupported format are recognized from their header line and skipped without being read in full.
+
+With --profile-memory [report.csv], the peak memory of each file and calculation stage is tracked (tracemalloc) and
+a ranked report of the heaviest files and stages is printed (and all measurements saved to report.csv, if given).
+
 See hea_nec/methods.py for more details.
 """
 
-import pandas as pd
 import argparse
+from contextlib import nullcontext
 
 from hea_nec.methods import calculate_nec_22087_capacity
+from hea_nec.profiling import MemoryProfiler, profile_stage
+from hea_nec.sniffing import expand_meter_paths, read_meter_file, sniff_meter_file
 
 parser = argparse.ArgumentParser(description="Batch process meter data files for panel capacity.")
-parser.add_argument('files', nargs='+', help="Path to one or more CSV meter data files.")
+parser.add_argument('files', nargs='+', help="Path to one or more CSV meter data files (also .gz files, or .zip archives, whose CSV files are processed one by one).")
 parser.add_argument('--panel-size', type=int, default=150, help="Panel capacity in amps (default: 150)")
 parser.add_argument('--voltage', type=int, default=240, help="Panel voltage (default: 240)")
 parser.add_argument('--hourly-safety-factor', type=float, default=1.3, help="Optional safety factor to apply for single-hour meter values in peak load calculation (default: 1.3)")
+parser.add_argument('--timezone', default=None, help="Optional timezone of the meter data, e.g. America/Denver, if the files carry no interval_timezone column (default: timestamps are used as is)")
+parser.add_argument('--channel', choices=['import', 'export', 'net'], default=None, help="Optional meter channel to evaluate for net-metered (e.g. solar) sites (default: the kWh/interval_kWh column)")
+parser.add_argument('--profile-memory', nargs='?', const='', default=None, metavar='REPORT_CSV', help="Track peak memory per file and calculation stage and print a ranked report; optionally save all measurements to REPORT_CSV (slows down processing)")
 args = parser.parse_args()
 
 print("Running in batch mode...")
-for file_path in args.files:
-    print(f"\n--- Processing: {file_path} ---")
-    df = pd.read_csv(file_path)
-
-    site_spec = {
-        'panel_size_A': args.panel_size,
-        'panel_voltage_V': args.voltage
-    }
-
-    detailed_results, summary_results = calculate_nec_22087_capacity(
-        df, site_spec, hourly_safety_factor=args.hourly_safety_factor, detect_gaps=True)
-
-    df_gaps = detailed_results['gap_report']
-    if not df_gaps.empty:
-        print("\n  Detected Data Gaps:")
-        for idx, row in df_gaps.iterrows():
-            print(f"    Gap #{idx + 1}: {row['gap_start'].strftime('%Y-%m-%d %H:%M:%S %Z')} - {row['gap_end'].strftime('%Y-%m-%d %H:%M:%S %Z')} ({row['duration']}, {row['missing_intervals']} intervals)")
-        print()
-        print(f"    Total gap duration:      {df_gaps['duration'].sum()}")
-        print(f"    Total missing intervals: {df_gaps['missing_intervals'].sum()}")
-        print(f"    Longest gap:             {df_gaps['duration'].max()}")
-        print(f"    Average gap duration:    {df_gaps['duration'].mean()}")
-
-    print("\n  Summary Details:")
-    summary_details = detailed_results.get('summary_details', {})
-    if summary_details:
-        for key, value in summary_details.items():
-            if value is not None:
-                print(f"    {key.replace('_', ' ').title()}: {value}")
-    else:
-        print("    No summary details generated.")
-
-    print("\n  Calculation Results:")
-    print(f"    Panel: {args.panel_size}A, {args.voltage}V")
-    print(f"    Calculated Peak Power: {summary_results.get('peak_hourly_load_kW', 0):.2f} kW ({summary_results.get('peak_power_A', 0):.1f} A)")
-    print(f"    Remaining Capacity: {summary_results.get('remaining_panel_capacity_kW', 0):.2f} kW ({summary_results.get('remaining_panel_capacity_A', 0):.1f} A)")
+profiler = MemoryProfiler() if args.profile_memory is not None else nullcontext()
+with profiler:
+    for file_path in expand_meter_paths(args.files):
+        print(f"\n--- Processing: {file_path} ---")
+        site_spec = {
+            'panel_size_A': args.panel_size,
+            'panel_voltage_V': args.voltage
+        }
+        if args.timezone:
+            site_spec['timezone'] = args.timezone
+
+        # Reject unsupported files from their header, before reading them in full
+        try:
+            descriptor = sniff_meter_file(file_path, channel=args.channel)
+        except (OSError, ValueError) as e:
+            print(f"  [ERROR] Skipping file: {e}")
+            continue
+
+        with profile_stage("site", site=file_path):
+            with profile_stage("read"):
+                df = read_meter_file(file_path, descriptor)
+
+            detailed_results, summary_results = calculate_nec_22087_capacity(
+                df, site_spec, hourly_safety_factor=args.hourly_safety_factor, detect_gaps=True, channel=args.channel)
+
+        df_gaps = detailed_results['gap_report']
+        if not df_gaps.empty:
+            print("\n  Detected Data Gaps:")
+            for idx, row in df_gaps.iterrows():
+                print(f"    Gap #{idx + 1}: {row['gap_start'].strftime('%Y-%m-%d %H:%M:%S %Z')} - {row['gap_end'].strftime('%Y-%m-%d %H:%M:%S %Z')} ({row['duration']}, {row['missing_intervals']} intervals)")
+            print()
+            print(f"    Total gap duration:      {df_gaps['duration'].sum()}")
+            print(f"    Total missing intervals: {df_gaps['missing_intervals'].sum()}")
+            print(f"    Longest gap:             {df_gaps['duration'].max()}")
+            print(f"    Average gap duration:    {df_gaps['duration'].mean()}")
+
+        print("\n  Summary Details:")
+        summary_details = detailed_results.get('summary_details', {})
+        if summary_details:
+            for key, value in summary_details.items():
+                if value is not None:
+                    print(f"    {key.replace('_', ' ').title()}: {value}")
+        else:
+            print("    No summary details generated.")
+
+        channel_peaks = detailed_results.get('channel_peaks_kW')
+        if channel_peaks:
+            print("\n  Peak Power by Channel:")
+            for channel, peak_kW in channel_peaks.items():
+                print(f"    {channel.title()}: {peak_kW:.2f} kW")
+
+        print("\n  Calculation Results:")
+        print(f"    Panel: {args.panel_size}A, {args.voltage}V")
+        print(f"    Calculated Peak Power: {summary_results.get('peak_hourly_load_kW', 0):.2f} kW ({summary_results.get('peak_power_A', 0):.1f} A)")
+        print(f"    Remaining Capacity: {summary_results.get('remaining_panel_capacity_kW', 0):.2f} kW ({summary_results.get('remaining_panel_capacity_A', 0):.1f} A)")
+
+if args.profile_memory is not None:
+    profiler.print_report(output_path=args.profile_memory or None)
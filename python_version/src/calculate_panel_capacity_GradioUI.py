@@ -2,38 +2,33 @@
 
 """
 Simple Gradio UI for the NEC 220.87 Panel Capacity Calculator.
+Set HEA_NEC_METRICS_PORT to serve the calculator metrics (see hea_nec/metrics.py) on that local port.
 See hea_nec/methods.py for more details.
 """
 
-import pandas as pd
-import gradio as gr
-from io import StringIO
 import warnings
-from altair.utils.deprecation import AltairDeprecationWarning
 import os
 from typing import Union
 
-from hea_nec.methods import calculate_nec_22087_capacity
-
-# Suppress Altair deprecation warnings
-warnings.filterwarnings("ignore", category=AltairDeprecationWarning)
+# gradio, altair and pandas are slow to import; they are imported where they are used so that importing this
+# module (e.g. to reuse the wrapper below) stays cheap
 
 def calculate_nec_22087_capacity_for_gradio(temp_file: Union[str, bytes], panel_size_A: int, panel_voltage_V: int):
     """A wrapper for Gradio to catch exceptions and convert them to gr.Error."""
+    import gradio as gr
+    from hea_nec.methods import calculate_nec_22087_capacity
+    from hea_nec.sniffing import read_meter_file
+
     try:
         if temp_file is None:
             raise ValueError("Please upload a file")
 
         # Handle flexible file input: either a file path (str) or binary content (bytes)
-        if isinstance(temp_file, str):
-            with open(temp_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-        elif isinstance(temp_file, bytes):
-            content = temp_file.decode('utf-8')
-        else:
+        if not isinstance(temp_file, (str, bytes)):
             raise TypeError(f"Unsupported input type: {type(temp_file)}")
 
-        df = pd.read_csv(StringIO(content))
+        # Unsupported formats are rejected from the header, before the whole file is parsed
+        df = read_meter_file(temp_file)
 
         site_spec = {
             'panel_size_A': panel_size_A,
@@ -66,6 +61,11 @@ def launch_gradio_interface():
 
     Handles both local development and AWS Amplify deployment configurations.
     """
+    import gradio as gr
+    from altair.utils.deprecation import AltairDeprecationWarning
+
+    # Suppress Altair deprecation warnings
+    warnings.filterwarnings("ignore", category=AltairDeprecationWarning)
 
     with gr.Blocks(title="Panel Capacity Calculator") as demo:
         gr.Markdown("# Panel Capacity Calculator")
@@ -116,6 +116,12 @@ def launch_gradio_interface():
                     remaining_capacity_kw, remaining_capacity_amps, plot]
         )
 
+    # Optionally expose calculator metrics (Prometheus text format) at http://127.0.0.1:<port>/metrics
+    metrics_port = os.getenv('HEA_NEC_METRICS_PORT')
+    if metrics_port:
+        from hea_nec.metrics import start_http_server
+        start_http_server(int(metrics_port))
+
     # Check if running in Amplify
     is_amplify = os.getenv('AWS_EXECUTION_ENV') is not None
 
@@ -13,29 +13,492 @@ It requires two input CSV files:
 Usage:
     python calculate_solutions.py --sites sites_config.csv --solutions solutions.csv --edition 2023
 
+With --output, results are written site by site as they are calculated (CSV, or JSON Lines for a .jsonl/.ndjson
+path), and each site's meter data is only read while the site is processed, so memory stays bounded on large runs.
+For a .sqlite/.sqlite3/.db path, results, site peaks and (with --detect-gaps) gap summaries are inserted into an
+indexed SQLite database instead, which is appended to across runs (see SQLiteResultWriter):
+    python calculate_solutions.py --sites sites.csv --solutions solutions.csv --detect-gaps --output portfolio.sqlite
+    sqlite3 portfolio.sqlite "SELECT DISTINCT site_id FROM latest_results WHERE headroom_amps < 20"
+
+With --checkpoint-dir, sites are partitioned into shards of --shard-size sites, which are processed (in parallel with
+--workers > 1) and written to the checkpoint directory one file per shard, along with a manifest.json recording the
+state of each shard. Rerunning the same command skips completed shards, so only failed or missing work is redone:
+    python calculate_solutions.py --sites sites.csv --solutions solutions.csv --checkpoint-dir run1 --workers 4 \
+        --output results.csv
+
+With --screen, each site's solutions are first checked against cheap lower and upper bounds on its peak load; the
+exact peak load is only calculated for sites with solutions the bounds do not decide (clear PASS or FAIL), and the
+results get the bounds and a "screened" flag.
+
+With --hourly-rollups, the hourly rollup of each site's meter data (see hea_nec/rollups.py) is stored next to the
+meter file on the first run, and later runs calculate the peak loads from it instead of parsing the meter file again,
+as long as the meter file is unchanged:
+    python calculate_solutions.py --sites sites.csv --solutions solutions.csv --hourly-rollups
+
+With --portfolio-summary, the distributions of the site peak loads, total demand and headroom of the solutions are
+summarized per utility (optional "utility" column of the sites CSV), panel size and NEC edition as mergeable
+quantile sketches (see hea_nec/portfolio.py) and saved as JSON; sharded runs summarize each shard and merge the
+shard summaries at the end, without reading the results back:
+    python calculate_solutions.py --sites sites.csv --solutions solutions.csv --checkpoint-dir run1 \
+        --portfolio-summary summary.json
+
+With --profile-memory, the peak memory of each calculation stage (read, prepare, gap detection, peak, solution loads,
+compliance) is measured per site, and the heaviest sites and stages are reported at the end (optionally saving all
+measurements to the given CSV path). Tracing memory allocations slows down processing, and worker processes of
+--workers > 1 are not profiled.
+
+With --metrics-file, the calculator metrics (see hea_nec/metrics.py) are written to the given path in the Prometheus
+text format at the end of the run.
+
 See hea_nec/methods.py for more details.
 """
 
 import argparse
+import json
 import os
+import sqlite3
 import sys
-
-from hea_nec.methods import calculate_nec_compliance_for_solutions
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+
+from hea_nec.methods import (
+    COMPLIANCE_COLUMNS,
+    GAP_SUMMARY_COLUMNS,
+    SCREENING_COLUMNS,
+    SOLUTION_KEY_COLUMNS,
+    iter_nec_compliance_for_solutions,
+    read_solutions_csv,
+)
+from hea_nec.metrics import REGISTRY
+from hea_nec.portfolio import PortfolioSummary
+from hea_nec.profiling import MemoryProfiler
+from hea_nec.rollups import load_hourly_rollup
+from hea_nec.sniffing import meter_file_exists, read_meter_file, sniff_meter_file
 import pandas as pd
 
 
-def load_sites_config(config_path):
+class MeterDataFiles(Mapping):
+    """
+    Read-only mapping of site_id to meter data, which reads each site's meter CSV only when it is accessed
+    (and does not keep it), so that meter data of large portfolios never has to be held in memory at once.
+    Sites whose meter file cannot be read map to None.
+
+    Files are read with their format descriptor (see hea_nec.sniffing), if one was sniffed already (descriptors
+    maps site_id to descriptor), otherwise the file is sniffed first; only the columns needed for the calculation
+    of the given meter channel are read.
+
+    With hourly_rollups, each site maps to the hourly rollup of its meter data instead (see hea_nec.rollups), which
+    is stored next to the meter file and only rebuilt when the meter file changed; site_specs provides the site
+    timezones for building them.
+    """
+
+    def __init__(self, meter_paths, descriptors=None, channel=None, hourly_rollups=False, site_specs=None):
+        self.meter_paths = dict(meter_paths)
+        self.descriptors = dict(descriptors or {})
+        self.channel = channel
+        self.hourly_rollups = hourly_rollups
+        self.site_specs = dict(site_specs or {})
+
+    def __getitem__(self, site_id):
+        meter_path = self.meter_paths[site_id]
+        try:
+            if self.hourly_rollups:
+                return load_hourly_rollup(meter_path, self.site_specs.get(site_id), channel=self.channel,
+                                          descriptor=self.descriptors.get(site_id))
+            # We just read the CSV here; _prepare_ua_intervals will handle parsing
+            return read_meter_file(meter_path, self.descriptors.get(site_id), channel=self.channel)
+        except Exception as e:
+            print(f"  [ERROR] Failed to read meter CSV for Site {site_id}: {e}")
+            return None
+
+    def __iter__(self):
+        return iter(self.meter_paths)
+
+    def __len__(self):
+        return len(self.meter_paths)
+
+
+class ResultWriter:
+    """
+    Incrementally writes result blocks to a CSV file (header written once) or, for .jsonl/.ndjson paths,
+    a JSON Lines file with one record per solution. Each block is flushed as soon as it is written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson")
+        self.rows = 0
+        self._file = open(path, "w", encoding="utf-8", newline="")
+
+    def write(self, results_df):
+        if self.jsonl:
+            results_df.to_json(self._file, orient="records", lines=True)
+        else:
+            results_df.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(results_df)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    site_id TEXT NOT NULL,
+    equipment_combo_id INTEGER,
+    load_control_combo_id INTEGER,
+    added_load_watts REAL,
+    removed_load_watts REAL,
+    code_edition TEXT,
+    historical_peak_kw REAL,
+    removed_load_credit_kw REAL,
+    added_load_kw REAL,
+    total_demand_amps REAL,
+    status TEXT,
+    headroom_amps REAL,
+    min_panel_size_A REAL,
+    peak_lower_bound_kw REAL,
+    peak_upper_bound_kw REAL,
+    screened INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_results_site ON results (site_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results (status, site_id);
+CREATE INDEX IF NOT EXISTS idx_results_combo ON results (equipment_combo_id, load_control_combo_id);
+CREATE INDEX IF NOT EXISTS idx_results_headroom ON results (headroom_amps);
+CREATE TABLE IF NOT EXISTS site_peaks (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    site_id TEXT NOT NULL,
+    historical_peak_kw REAL,
+    PRIMARY KEY (site_id, run_id)
+);
+CREATE TABLE IF NOT EXISTS gap_summaries (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    site_id TEXT NOT NULL,
+    gap_count INTEGER,
+    missing_intervals INTEGER,
+    longest_gap_hours REAL,
+    PRIMARY KEY (site_id, run_id)
+);
+CREATE VIEW IF NOT EXISTS latest_results AS
+    SELECT results.* FROM results
+    JOIN (SELECT site_id, MAX(run_id) AS run_id FROM site_peaks GROUP BY site_id) AS latest USING (site_id, run_id);
+"""
+
+RESULT_COLUMNS = SOLUTION_KEY_COLUMNS + ["added_load_watts", "removed_load_watts"] + COMPLIANCE_COLUMNS + SCREENING_COLUMNS
+
+# Columns added to the results table after its first version, with their types, for databases created before
+SQLITE_ADDED_COLUMNS = {"peak_lower_bound_kw": "REAL", "peak_upper_bound_kw": "REAL", "screened": "INTEGER"}
+
+
+def _sql_rows(df, run_id):
+    """Rows of df as tuples of Python values (NaN as NULL), prefixed with run_id, for executemany."""
+    values = df.astype(object).where(df.notna(), None)
+    return [(run_id,) + row for row in values.itertuples(index=False, name=None)]
+
+
+class SQLiteResultWriter:
+    """
+    Bulk-inserts result blocks into a SQLite database (for .sqlite/.sqlite3/.db paths): the results of each
+    solution (with the screening bounds and flag of --screen, NULL otherwise), the peak load of each site and, if
+    the results have gap summary columns (--detect-gaps), the gap summary of each site. Existing databases are appended to; every run gets a new run_id (table runs), and the
+    view latest_results holds the results of the latest run of each site.
+
+    Blocks are buffered and inserted in one transaction per batch_rows results. With the indexes on site_id, status,
+    the combo ids and headroom_amps, portfolio queries do not scan the whole table, e.g.:
+        SELECT * FROM latest_results WHERE site_id = '17' AND status = 'FAIL';
+        SELECT DISTINCT site_id FROM latest_results WHERE headroom_amps < 20;
+    """
+
+    def __init__(self, path, run_config=None, batch_rows=20000):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            self._conn.executescript(SQLITE_SCHEMA)
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+            for column, sql_type in SQLITE_ADDED_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE results ADD COLUMN {column} {sql_type}")
+            self.run_id = self._conn.execute(
+                "INSERT INTO runs (started_at, config) VALUES (?, ?)",
+                (pd.Timestamp.now(tz="UTC").isoformat(), json.dumps(run_config) if run_config else None),
+            ).lastrowid
+
+    def write(self, results_df):
+        self._pending.append(results_df)
+        self._pending_rows += len(results_df)
+        self.rows += len(results_df)
+        if self._pending_rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        block = pd.concat(self._pending, ignore_index=True)
+        self._pending = []
+        self._pending_rows = 0
+
+        sites = block.drop_duplicates("site_id")
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO results (run_id, {', '.join(RESULT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(RESULT_COLUMNS) + 1))})",
+                _sql_rows(block.reindex(columns=RESULT_COLUMNS), self.run_id),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO site_peaks (run_id, site_id, historical_peak_kw) VALUES (?, ?, ?)",
+                _sql_rows(sites[["site_id", "historical_peak_kw"]], self.run_id),
+            )
+            if set(GAP_SUMMARY_COLUMNS) <= set(block.columns):
+                gap_sites = sites[sites["gap_count"].notna()]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO gap_summaries (run_id, site_id, gap_count, missing_intervals, "
+                    "longest_gap_hours) VALUES (?, ?, ?, ?, ?)",
+                    _sql_rows(gap_sites[["site_id"] + GAP_SUMMARY_COLUMNS], self.run_id),
+                )
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_result_writer(path, run_config=None):
+    """SQLiteResultWriter for .sqlite/.sqlite3/.db paths, otherwise a ResultWriter (CSV or JSON Lines)."""
+    if os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS:
+        return SQLiteResultWriter(path, run_config=run_config)
+    return ResultWriter(path)
+
+
+MANIFEST_FILE = "manifest.json"
+
+# Suffix of the portfolio summary file written next to each shard result file with --portfolio-summary
+SUMMARY_SUFFIX = ".summary.json"
+
+
+def _write_json_atomic(path, data):
+    """Writes data as JSON to path atomically (write to a temporary file, then rename)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _run_shard(shard_path, solutions_df, meter_paths, site_specs, code_edition, hourly_safety_factor, channel,
+               detect_gaps=False, hourly_rollups=False, screen=False, portfolio_summary=False):
+    """
+    Evaluates the solutions of one shard of sites and atomically writes its results to shard_path (and with
+    portfolio_summary, the PortfolioSummary of the results to shard_path + SUMMARY_SUFFIX).
+    Runs in a worker process; returns the number of result rows.
+    """
+    site_results = iter_nec_compliance_for_solutions(
+        solutions_df=solutions_df,
+        site_ua_intervals=MeterDataFiles(meter_paths, channel=channel, hourly_rollups=hourly_rollups,
+                                         site_specs=site_specs),
+        site_specs=site_specs,
+        code_edition=code_edition,
+        hourly_safety_factor=hourly_safety_factor,
+        channel=channel,
+        detect_gaps=detect_gaps,
+        screen=screen,
+    )
+    # Write to a temporary file first, so an interrupted shard never looks complete
+    tmp_path = shard_path + ".tmp" + os.path.splitext(shard_path)[1]
+    summary = PortfolioSummary() if portfolio_summary else None
+    with ResultWriter(tmp_path) as writer:
+        for results_df in site_results:
+            writer.write(results_df)
+            if summary is not None:
+                summary.add_solutions(results_df, site_specs)
+    if summary is not None:
+        summary.write_json(shard_path + SUMMARY_SUFFIX)
+    os.replace(tmp_path, shard_path)
+    return writer.rows
+
+
+def run_sharded(solutions_df, meter_paths, site_specs, checkpoint_dir, config, shard_size=500, workers=1,
+                output_format="csv"):
+    """
+    Processes the solutions in shards of shard_size sites (meter_paths maps site_id to the meter CSV), writing one result file per shard to checkpoint_dir and
+    recording the state of each shard in checkpoint_dir/manifest.json. Shards already marked "done" in an existing
+    manifest (with their result file present) are skipped, and manifest entries of shards that no longer exist
+    (as the solutions cover fewer sites) are dropped.
+
+    The shards are defined by the sorted site ids and shard_size; the manifest also stores config (input files
+    and calculation options), and resuming with a different configuration raises a ValueError.
+
+    Returns:
+      tuple: (manifest, list of shard result files in shard order)
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, MANIFEST_FILE)
+
+    site_ids = sorted(solutions_df["site_id"].unique())
+    shards = {
+        f"{i // shard_size:05d}": site_ids[i:i + shard_size] for i in range(0, len(site_ids), shard_size)
+    }
+    config = dict(config, shard_size=shard_size, output_format=output_format)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["config"] != config:
+            raise ValueError(
+                f"Checkpoint directory {checkpoint_dir} belongs to a run with a different configuration "
+                f"({manifest['config']}); use a new directory"
+            )
+    else:
+        manifest = {"config": config, "shards": {}}
+
+    # Forget shards beyond the current site list (e.g. when resuming with fewer sites)
+    for shard_id in set(manifest["shards"]) - set(shards):
+        del manifest["shards"][shard_id]
+    for shard_id, shard_sites in shards.items():
+        shard = manifest["shards"].setdefault(
+            shard_id, {"file": f"shard_{shard_id}.{output_format}", "status": "pending"}
+        )
+        shard_sites = [str(site_id) for site_id in shard_sites]
+        # Redo shards whose result file went missing or whose sites changed since they were done
+        if shard.get("sites") != shard_sites or not os.path.exists(os.path.join(checkpoint_dir, shard["file"])):
+            shard["status"] = "pending"
+        shard["sites"] = shard_sites
+    _write_json_atomic(manifest_path, manifest)
+
+    todo = [shard_id for shard_id in shards if manifest["shards"][shard_id]["status"] != "done"]
+    print(f"{len(shards) - len(todo)} of {len(shards)} shards already done, processing {len(todo)}...")
+
+    solutions_by_site = dict(list(solutions_df.groupby("site_id", sort=False, observed=True)))
+
+    def shard_args(shard_id):
+        shard_sites = shards[shard_id]
+        return (
+            os.path.join(checkpoint_dir, manifest["shards"][shard_id]["file"]),
+            pd.concat([solutions_by_site[site_id] for site_id in shard_sites]),
+            {site_id: meter_paths[site_id] for site_id in shard_sites if site_id in meter_paths},
+            {site_id: site_specs[site_id] for site_id in shard_sites if site_id in site_specs},
+            config["code_edition"],
+            config["hourly_safety_factor"],
+            config["channel"],
+            config.get("detect_gaps", False),
+            config.get("hourly_rollups", False),
+            config.get("screen", False),
+            config.get("portfolio_summary", False),
+        )
+
+    def record(shard_id, rows=None, error=None):
+        shard = manifest["shards"][shard_id]
+        if error is None:
+            shard.update(status="done", rows=rows)
+            shard.pop("error", None)
+        else:
+            shard.update(status="failed", error=str(error))
+            print(f"  [ERROR] Shard {shard_id} failed: {error}")
+        _write_json_atomic(manifest_path, manifest)
+        done = sum(shard["status"] == "done" for shard in manifest["shards"].values())
+        print(f"  {done}/{len(shards)} shards done")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_shard, *shard_args(shard_id)): shard_id for shard_id in todo}
+            for future in as_completed(futures):
+                try:
+                    record(futures[future], rows=future.result())
+                except Exception as e:
+                    record(futures[future], error=e)
+    else:
+        for shard_id in todo:
+            try:
+                record(shard_id, rows=_run_shard(*shard_args(shard_id)))
+            except Exception as e:
+                record(shard_id, error=e)
+
+    shard_files = [os.path.join(checkpoint_dir, manifest["shards"][shard_id]["file"]) for shard_id in shards]
+    return manifest, shard_files
+
+
+def merge_shard_files(shard_files, output_path, run_config=None):
+    """
+    Concatenates shard result files (CSV with one header each, or JSON Lines) into output_path, or inserts
+    CSV shard results into a SQLite database (see SQLiteResultWriter) as a new run.
+    """
+    if os.path.splitext(output_path)[1].lower() in SQLITE_EXTENSIONS:
+        with SQLiteResultWriter(output_path, run_config=run_config) as writer:
+            for shard_file in shard_files:
+                writer.write(pd.read_csv(shard_file, dtype={"site_id": str, "status": str, "code_edition": str}))
+        return
+
+    jsonl = os.path.splitext(output_path)[1].lower() in (".jsonl", ".ndjson")
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+        header_written = False
+        for shard_file in shard_files:
+            with open(shard_file, encoding="utf-8", newline="") as f:
+                if not jsonl:
+                    header = f.readline()
+                    if not header_written and header:
+                        out.write(header)
+                        header_written = True
+                for line in f:
+                    out.write(line)
+    os.replace(tmp_path, output_path)
+
+
+def merge_shard_summaries(shard_files, output_path):
+    """Merges the portfolio summaries of the shards (see _run_shard) and writes the result to output_path."""
+    summary = PortfolioSummary()
+    for shard_file in shard_files:
+        summary.merge(PortfolioSummary.read_json(shard_file + SUMMARY_SUFFIX))
+    summary.write_json(output_path)
+    return summary
+
+
+def load_sites_config(config_path, channel=None, hourly_rollups=False):
     """
     Reads the sites CSV and prepares the data structures required by the API.
+    The format of each meter file is sniffed from its header (see hea_nec.sniffing), so that sites with unsupported
+    meter files are reported and skipped up front, like sites with missing files.
 
     Expected CSV columns:
       - site_id (str/int)
       - panel_size_A (int)
       - panel_voltage_V (int) [Optional, default 240]
-      - meter_csv_path (str) - Path to the meter data CSV for this site
+      - timezone (str) [Optional, e.g. America/Denver; used if the meter data has no interval_timezone column]
+      - utility (str) [Optional, groups the sites in the portfolio summary]
+      - meter_csv_path (str) - Path to the meter data CSV for this site; may be gzip-compressed (.gz), a zip
+        archive holding a single CSV, or a member of a zip archive ("export.zip::meters/site_1.csv"), which are
+        decompressed while they are read
 
     Returns:
-      tuple: (site_ua_intervals, site_specs)
+      tuple: (site_ua_intervals, site_specs); site_ua_intervals is a MeterDataFiles mapping
+      that reads each site's meter CSV on access (reading the columns needed for the meter channel),
+      or its hourly rollup with hourly_rollups
     """
     if not os.path.exists(config_path):
         print(f"Error: Sites configuration file not found: {config_path}")
@@ -49,10 +512,11 @@ def load_sites_config(config_path):
         print(f"Error reading sites CSV: {e}")
         sys.exit(1)
 
-    site_ua_intervals = {}
+    meter_paths = {}
+    descriptors = {}
     site_specs = {}
 
-    print(f"Loading meter data for {len(df_sites)} sites...")
+    print(f"Checking meter data for {len(df_sites)} sites...")
 
     for _, row in df_sites.iterrows():
         site_id = row["site_id"]
@@ -63,20 +527,27 @@ def load_sites_config(config_path):
             "panel_size_A": float(row["panel_size_A"]),
             "panel_voltage_V": float(row.get("panel_voltage_V", 240)),
         }
+        for key in ("timezone", "utility"):
+            if pd.notna(row.get(key)):
+                site_specs[site_id][key] = row[key]
 
-        # 2. Load Meter Data
-        if not os.path.exists(meter_path):
+        # 2. Register Meter Data (read lazily when the site is processed)
+        if not meter_file_exists(meter_path):
             print(
                 f"  [WARNING] Meter file not found for Site {site_id}: {meter_path}. Skipping."
             )
             continue
 
         try:
-            # We just read the CSV here; _prepare_ua_intervals will handle parsing
-            meter_df = pd.read_csv(meter_path)
-            site_ua_intervals[site_id] = meter_df
+            descriptors[site_id] = sniff_meter_file(meter_path, channel=channel)
         except Exception as e:
-            print(f"  [ERROR] Failed to read meter CSV for Site {site_id}: {e}")
+            print(f"  [WARNING] Unsupported meter file for Site {site_id}: {meter_path}. {e} Skipping.")
+            continue
+
+        meter_paths[site_id] = meter_path
+
+    site_ua_intervals = MeterDataFiles(meter_paths, descriptors=descriptors, channel=channel,
+                                       hourly_rollups=hourly_rollups, site_specs=site_specs)
 
     return site_ua_intervals, site_specs
 
@@ -114,13 +585,91 @@ def main():
     )
 
     parser.add_argument(
-        "--output", help="Optional path to save results as CSV (e.g., results.csv)."
+        "--channel",
+        choices=["import", "export", "net"],
+        default=None,
+        help="Optional meter channel to evaluate for net-metered (e.g. solar) sites (default: the kWh/interval_kWh column).",
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Optional path to save results as CSV (e.g., results.csv), JSON Lines (e.g., results.jsonl) "
+        "or to a SQLite database (e.g., results.sqlite, appended to if it exists). "
+        "Results are written site by site as they are calculated.",
+    )
+
+    parser.add_argument(
+        "--detect-gaps",
+        action="store_true",
+        help="Detect data gaps in each site's meter data and add a gap summary (gap_count, missing_intervals, "
+        "longest_gap_hours) to the results.",
+    )
+
+    parser.add_argument(
+        "--screen",
+        action="store_true",
+        help="Decide solutions from cheap bounds on each site's peak load where possible, and only calculate the exact "
+        "peak load for sites with undecided solutions (historical_peak_kw, total_demand_amps, headroom_amps and "
+        "min_panel_size_A are left empty for decided sites).",
+    )
+
+    parser.add_argument(
+        "--hourly-rollups",
+        action="store_true",
+        help="Calculate the peak loads from hourly rollups of the meter data, stored next to each meter file "
+        "(<meter file>.rollup) and reused on later runs until the meter file changes. Not combinable with --detect-gaps.",
+    )
+
+    parser.add_argument(
+        "--checkpoint-dir",
+        help="Optional directory for a resumable sharded run: results are written per shard of sites, "
+        "and rerunning the same command skips shards that are already done.",
+    )
+
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=500,
+        help="Number of sites per shard with --checkpoint-dir (default: 500).",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for shards with --checkpoint-dir (default: 1).",
+    )
+
+    parser.add_argument(
+        "--portfolio-summary",
+        metavar="SUMMARY_JSON",
+        help="Optional path to save the distributions (moments and quantile sketches) of the site peak loads, total "
+        "demand and headroom per utility, panel size and NEC edition to, as JSON.",
+    )
+
+    parser.add_argument(
+        "--profile-memory",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="REPORT_CSV",
+        help="Measure the peak memory of each calculation stage per site and report the heaviest sites and stages; "
+        "optionally save all measurements to REPORT_CSV.",
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        help="Optional path to write calculator metrics (files, rows, sites, errors, latencies) to at the end, "
+        "in the Prometheus text format (not including worker processes of --workers > 1).",
     )
 
     args = parser.parse_args()
+    if args.hourly_rollups and args.detect_gaps:
+        parser.error("--hourly-rollups cannot be combined with --detect-gaps (rollups carry no interval timestamps)")
 
     # 1. Load Site Configuration and Meter Data
-    site_ua_intervals, site_specs = load_sites_config(args.sites)
+    site_ua_intervals, site_specs = load_sites_config(args.sites, channel=args.channel,
+                                                      hourly_rollups=args.hourly_rollups)
 
     if not site_ua_intervals:
         print("No valid site data loaded. Exiting.")
@@ -132,9 +681,8 @@ def main():
         sys.exit(1)
 
     try:
-        solutions_df = pd.read_csv(args.solutions, dtype={"fuel_type": str})
-        # Ensure site_id is string to match the sites config
-        solutions_df["site_id"] = solutions_df["site_id"].astype(str)
+        # Compact dtypes (categoricals, narrow numbers); site_id is read as string to match the sites config
+        solutions_df = read_solutions_csv(args.solutions)
     except Exception as e:
         print(f"Error reading solutions CSV: {e}")
         sys.exit(1)
@@ -143,15 +691,96 @@ def main():
         f"Processing compliance using NEC {args.edition}..."
     )
 
-    # 3. Run Calculation
+    profiler = MemoryProfiler() if args.profile_memory is not None else nullcontext()
+    if args.profile_memory is not None and args.checkpoint_dir and args.workers > 1:
+        print("  [WARNING] Memory profiling does not cover worker processes; use --workers 1 to profile a sharded run.")
+
+    config = {
+        "sites": os.path.abspath(args.sites),
+        "solutions": os.path.abspath(args.solutions),
+        "code_edition": args.edition,
+        "hourly_safety_factor": args.hourly_safety_factor,
+        "channel": args.channel,
+        "detect_gaps": args.detect_gaps,
+        "hourly_rollups": args.hourly_rollups,
+        "screen": args.screen,
+        "portfolio_summary": bool(args.portfolio_summary),
+    }
+
+    # 3a. Run Calculation in resumable shards
+    if args.checkpoint_dir:
+        output_format = "csv"
+        if args.output and os.path.splitext(args.output)[1].lower() in (".jsonl", ".ndjson"):
+            output_format = "jsonl"
+        try:
+            with profiler:
+                manifest, shard_files = run_sharded(
+                    solutions_df,
+                    site_ua_intervals.meter_paths,
+                    site_specs,
+                    checkpoint_dir=args.checkpoint_dir,
+                    config=config,
+                    shard_size=args.shard_size,
+                    workers=args.workers,
+                    output_format=output_format,
+                )
+        except Exception as e:
+            print(f"Critical error during calculation: {e}")
+            sys.exit(1)
+
+        if args.profile_memory is not None:
+            profiler.print_report(output_path=args.profile_memory or None)
+        if args.metrics_file:
+            REGISTRY.write_text_file(args.metrics_file)
+
+        failed = [shard_id for shard_id, shard in manifest["shards"].items() if shard["status"] != "done"]
+        if failed:
+            print(f"\n{len(failed)} shard(s) failed: {', '.join(failed)}. Rerun the same command to retry them.")
+            sys.exit(1)
+
+        if args.portfolio_summary:
+            merge_shard_summaries(shard_files, args.portfolio_summary)
+            print(f"\nPortfolio summary saved to: {args.portfolio_summary}")
+        if args.output:
+            merge_shard_files(shard_files, args.output, run_config=config)
+            print(f"\nFull results saved to: {args.output}")
+        else:
+            print(f"\nShard results saved to: {args.checkpoint_dir}")
+        return
+
+    # 3b. Run Calculation (site by site)
+    site_results = iter_nec_compliance_for_solutions(
+        solutions_df=solutions_df,
+        site_ua_intervals=site_ua_intervals,
+        site_specs=site_specs,
+        code_edition=args.edition,
+        hourly_safety_factor=args.hourly_safety_factor,
+        channel=args.channel,
+        detect_gaps=args.detect_gaps,
+        screen=args.screen,
+    )
+
+    if args.portfolio_summary:
+        summary = PortfolioSummary()
+
+        def summarized(site_results):
+            for results_df in site_results:
+                summary.add_solutions(results_df, site_specs)
+                yield results_df
+
+        site_results = summarized(site_results)
+
     try:
-        results_df = calculate_nec_compliance_for_solutions(
-            solutions_df=solutions_df,
-            site_ua_intervals=site_ua_intervals,
-            site_specs=site_specs,
-            code_edition=args.edition,
-            hourly_safety_factor=args.hourly_safety_factor,
-        )
+        with profiler:
+            if args.output:
+                n_sites = solutions_df["site_id"].nunique()
+                with open_result_writer(args.output, run_config=config) as writer:
+                    for i, results_df in enumerate(site_results, start=1):
+                        writer.write(results_df)
+                        if i == 1 or i % 100 == 0 or i == n_sites:
+                            print(f"  {i}/{n_sites} sites done, {writer.rows} results written")
+            else:
+                results_df = pd.concat(list(site_results), ignore_index=True)
     except Exception as e:
         print(f"Critical error during calculation: {e}")
         import traceback
@@ -159,7 +788,20 @@ def main():
         traceback.print_exc()
         sys.exit(1)
 
-    # 4. Display/Save Results
+    if args.profile_memory is not None:
+        profiler.print_report(output_path=args.profile_memory or None)
+    if args.metrics_file:
+        REGISTRY.write_text_file(args.metrics_file)
+
+    if args.portfolio_summary:
+        summary.write_json(args.portfolio_summary)
+        print(f"\nPortfolio summary saved to: {args.portfolio_summary}")
+
+    if args.output:
+        print(f"\nFull results saved to: {args.output}")
+        return
+
+    # 4. Display Results
     print("\n--- RESULTS ---")
 
     # Select a subset of columns for cleaner terminal output
@@ -171,6 +813,8 @@ def main():
         "historical_peak_kw",
         "added_load_kw",
         "total_demand_amps",
+        "headroom_amps",
+        "min_panel_size_A",
     ]
     # Add removed_load_credit_kw only if relevant (2026 or non-zero exists)
     if "removed_load_credit_kw" in results_df.columns and (
@@ -183,10 +827,6 @@ def main():
 
     print(results_df[final_cols].to_string(index=False))
 
-    if args.output:
-        results_df.to_csv(args.output, index=False)
-        print(f"\nFull results saved to: {args.output}")
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env node
+
+/*
+ * Node.js driver for compare_engines.py: runs the web app's calculator (script.js) on meter data files
+ * outside the browser and prints one JSON result per file (one per line).
+ *
+ * Usage:
+ *     node compare_engines.js path/to/script.js [--readings] file1.csv file2.csv ...
+ *
+ * script.js is loaded into a sandbox with a minimal stand-in for the browser's window/document, and the
+ * PanelCalculator parsing and calculation methods are called directly (the constructor, which wires up the
+ * page, is never run). The HEA calculation method and a 150A/240V panel are used, without seasonal load.
+ * With --readings, the parsed readings are included (as local "YYYY-MM-DD HH:MM:SS" strings and kWh values),
+ * so that other engines can be run on exactly the same input.
+ */
+
+const fs = require('fs');
+const vm = require('vm');
+const { performance } = require('perf_hooks');
+
+const PANEL_SIZE_A = 150;
+const PANEL_VOLTAGE_V = 240;
+
+function loadPanelCalculator(scriptPath) {
+    const elements = {
+        calculationMethod: { value: 'hea' },
+        panelSize: { value: String(PANEL_SIZE_A) },
+        panelVoltage: { value: String(PANEL_VOLTAGE_V) },
+        seasonalLoad: { value: '0' },
+    };
+    const quiet = () => {};
+    const context = vm.createContext({
+        console: { log: quiet, info: quiet, warn: quiet, error: quiet, debug: quiet },
+        window: { addEventListener: quiet },
+        document: {
+            addEventListener: quiet,
+            getElementById: id => elements[id] || null,
+            querySelector: () => null,
+            querySelectorAll: () => [],
+        },
+    });
+    vm.runInContext(fs.readFileSync(scriptPath, 'utf8'), context, { filename: scriptPath });
+    return vm.runInContext('PanelCalculator', context);
+}
+
+function formatLocal(datetime) {
+    const pad = value => String(value).padStart(2, '0');
+    return `${datetime.getFullYear()}-${pad(datetime.getMonth() + 1)}-${pad(datetime.getDate())} ` +
+        `${pad(datetime.getHours())}:${pad(datetime.getMinutes())}:${pad(datetime.getSeconds())}`;
+}
+
+async function runFile(PanelCalculator, file, includeReadings) {
+    const calculator = Object.create(PanelCalculator.prototype);
+    const parsers = {
+        simple: 'parseSimpleCSV',
+        pge: 'parsePGECSV',
+        'pge-pv': 'parsePGEPVCSV',
+        utilityapi: 'parseUtilityAPICSV',
+    };
+
+    // The browser's FileReader drops a UTF-8 byte order mark
+    const content = fs.readFileSync(file, 'utf8').replace(/^﻿/, '');
+
+    const start = performance.now();
+    const format = calculator.detectFileFormat(content);
+    const data = await calculator[parsers[format]](content);
+    const results = calculator.calculatePanelCapacity(data);
+    const elapsed = (performance.now() - start) / 1000;
+
+    const result = {
+        file,
+        status: 'ok',
+        format,
+        readings: data.length,
+        peak_kW: results.peakPowerKw,
+        remaining_kW: results.availableCapacityKw,
+        elapsed_s: elapsed,
+    };
+    if (includeReadings) {
+        result.datetimes = data.map(reading => formatLocal(reading.datetime));
+        result.kwh = data.map(reading => reading.kwh);
+    }
+    return result;
+}
+
+async function main() {
+    const args = process.argv.slice(2);
+    const scriptPath = args.shift();
+    const includeReadings = args.includes('--readings');
+    const files = args.filter(arg => arg !== '--readings');
+
+    const PanelCalculator = loadPanelCalculator(scriptPath);
+    for (const file of files) {
+        let result;
+        try {
+            result = await runFile(PanelCalculator, file, includeReadings);
+        } catch (error) {
+            result = { file, status: 'error', error: error.message };
+        }
+        process.stdout.write(JSON.stringify(result) + '\n');
+    }
+}
+
+main();
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""
+Golden and performance harness for the two implementations of the panel capacity calculation:
+the web app's JavaScript calculator (script.js, run with Node.js through compare_engines.js) and hea_nec.methods.
+
+For every meter data file (by default all CSV files in test_data/), plus optional large synthetic files, it runs:
+  - js:        script.js parsing + calculation
+  - python:    pandas.read_csv + calculate_nec_22087_capacity on the raw file
+  - py_on_js:  calculate_nec_22087_capacity on the readings as parsed by script.js (compares the calculation alone,
+               also for utility formats the Python version cannot read directly)
+and compares the peak hourly load and remaining panel capacity (150A/240V panel, HEA method) of each engine with
+the JavaScript result within a tolerance. Throughput (readings per second) is recorded per engine.
+
+Usage:
+    python compare_engines.py [--synthetic-years 1 5] [--tolerance 0.001] [--output report.csv] [files ...]
+
+Exits with status 1 if any comparable results differ by more than the tolerance. Requires Node.js.
+
+See hea_nec/methods.py for more details.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from hea_nec.methods import calculate_nec_22087_capacity
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(SRC_DIR))
+SITE_SPEC = {"panel_size_A": 150, "panel_voltage_V": 240}
+
+
+def find_sample_files(test_data_dir):
+    """All meter data CSV files of the test data corpus (without the calculate_solutions configuration files)."""
+    files = sorted(glob.glob(os.path.join(test_data_dir, "**", "*.csv"), recursive=True))
+    return [
+        f for f in files
+        if not os.path.basename(f).startswith(("~$", "calculate_solutions_"))
+    ]
+
+
+def write_synthetic_file(directory, years, seed=0):
+    """Writes a simple-format (DateTime, kWh) file with `years` of 15-minute readings and returns its path."""
+    rng = np.random.default_rng(seed)
+    n = int(years * 365 * 96)
+    datetimes = pd.date_range("2020-01-01", periods=n, freq="15min")
+    # Daily load shape plus noise, so that the peak is not trivially tied between many hours
+    hour = datetimes.hour.to_numpy()
+    kwh = 0.2 + 0.3 * np.exp(-((hour - 18) ** 2) / 8) + rng.gamma(2.0, 0.08, n)
+    path = os.path.join(directory, f"synthetic_{years:g}yr_15min.csv")
+    pd.DataFrame({"DateTime": datetimes.strftime("%Y-%m-%d %H:%M:%S"), "kWh": kwh.round(3)}).to_csv(path, index=False)
+    return path
+
+
+def run_js_engine(files, script_js, js_timezone="UTC"):
+    """Runs script.js on the files with Node.js; returns a dict of file to result (including the parsed readings)."""
+    node = shutil.which("node")
+    if node is None:
+        raise RuntimeError("Node.js ('node') is required to run the JavaScript engine")
+
+    completed = subprocess.run(
+        [node, os.path.join(SRC_DIR, "compare_engines.js"), script_js, "--readings"] + list(files),
+        capture_output=True, text=True, check=True, env=dict(os.environ, TZ=js_timezone),
+    )
+    results = [json.loads(line) for line in completed.stdout.splitlines() if line.strip()]
+    return {result["file"]: result for result in results}
+
+
+def run_python_engine(df):
+    """Runs calculate_nec_22087_capacity; returns (peak kW, remaining kW, elapsed seconds)."""
+    start = time.perf_counter()
+    _, summary_results = calculate_nec_22087_capacity(df, SITE_SPEC)
+    elapsed = time.perf_counter() - start
+    return summary_results["peak_hourly_load_kW"], summary_results["remaining_panel_capacity_kW"], elapsed
+
+
+def compare_file(file, js_result, tolerance):
+    """Runs the Python engines on one file and compares them with the JavaScript result."""
+    name = os.path.relpath(file, REPO_DIR) if os.path.abspath(file).startswith(REPO_DIR) else os.path.basename(file)
+    row = {"file": name, "format": js_result.get("format"), "readings": js_result.get("readings")}
+
+    if js_result["status"] == "ok":
+        row.update(js_peak_kW=js_result["peak_kW"], js_remaining_kW=js_result["remaining_kW"],
+                   js_readings_per_s=js_result["readings"] / max(js_result["elapsed_s"], 1e-9))
+    else:
+        row["js_error"] = js_result["error"]
+
+    # Python on the raw file (timed including CSV parsing, like the JavaScript engine)
+    try:
+        start = time.perf_counter()
+        df = pd.read_csv(file)
+        read_elapsed = time.perf_counter() - start
+        peak, remaining, elapsed = run_python_engine(df)
+        row.update(py_peak_kW=peak, py_remaining_kW=remaining,
+                   py_readings_per_s=len(df) / max(read_elapsed + elapsed, 1e-9))
+    except Exception as e:
+        row["py_error"] = str(e)
+
+    # Python on the readings parsed by the JavaScript engine (calculation only)
+    if js_result["status"] == "ok":
+        df = pd.DataFrame({"DateTime": js_result["datetimes"], "kWh": js_result["kwh"]})
+        try:
+            peak, remaining, elapsed = run_python_engine(df)
+            row.update(py_on_js_peak_kW=peak, py_on_js_remaining_kW=remaining,
+                       py_on_js_readings_per_s=len(df) / max(elapsed, 1e-9))
+        except Exception as e:
+            row["py_on_js_error"] = str(e)
+
+    # Compare each Python engine with the JavaScript engine, where both produced a result
+    mismatches = []
+    for engine in ("py", "py_on_js"):
+        for quantity in ("peak_kW", "remaining_kW"):
+            js_value, py_value = row.get(f"js_{quantity}"), row.get(f"{engine}_{quantity}")
+            if js_value is None or py_value is None:
+                continue
+            if not math.isclose(js_value, py_value, rel_tol=0, abs_tol=tolerance):
+                mismatches.append(f"{engine}:{quantity}")
+    row["mismatches"] = ", ".join(mismatches)
+    row["errors"] = "; ".join(
+        f"{engine}: {row[f'{engine}_error'][:40]}" for engine in ("js", "py", "py_on_js") if f"{engine}_error" in row
+    )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the JavaScript and Python panel capacity calculators.")
+    parser.add_argument("files", nargs="*", help="Meter data files (default: all CSV files in test_data/).")
+    parser.add_argument("--script-js", default=os.path.join(REPO_DIR, "script.js"), help="Path to script.js.")
+    parser.add_argument("--synthetic-years", type=float, nargs="*", default=[],
+                        help="Also run on synthetic 15-minute files of these lengths in years (e.g. 1 5).")
+    parser.add_argument("--tolerance", type=float, default=1e-6,
+                        help="Absolute tolerance in kW for peak and remaining capacity (default: 1e-6).")
+    parser.add_argument("--js-timezone", default="UTC",
+                        help="Timezone (TZ) the JavaScript engine interprets local timestamps in (default: UTC).")
+    parser.add_argument("--output", help="Optional path to save the report as CSV.")
+    args = parser.parse_args()
+
+    files = args.files or find_sample_files(os.path.join(REPO_DIR, "test_data"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = list(files) + [write_synthetic_file(tmp_dir, years) for years in args.synthetic_years]
+
+        print(f"Running JavaScript engine on {len(files)} files...")
+        js_results = run_js_engine(files, args.script_js, js_timezone=args.js_timezone)
+
+        print("Running Python engine...")
+        rows = [compare_file(file, js_results[file], args.tolerance) for file in files]
+
+    report = pd.DataFrame(rows)
+    report["readings"] = report["readings"].astype("Int64")
+    display_cols = [
+        "file", "format", "readings", "js_peak_kW", "py_peak_kW", "py_on_js_peak_kW",
+        "js_readings_per_s", "py_readings_per_s", "py_on_js_readings_per_s", "mismatches", "errors",
+    ]
+    with pd.option_context("display.width", 250, "display.max_colwidth", 60, "display.float_format", "{:,.4g}".format):
+        print(report[[c for c in display_cols if c in report.columns]].to_string(index=False))
+
+    compared = report.filter(like="_peak_kW").notna().sum(axis=1) >= 2
+    mismatched = report["mismatches"] != ""
+    print(f"\n{compared.sum()} of {len(report)} files compared, "
+          f"{mismatched.sum()} with differences above {args.tolerance} kW")
+
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"Full report saved to: {args.output}")
+
+    if mismatched.any():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+NEC 220.87 Panel Capacity Calculator (HEA methods).
+
+The pandas-free core arithmetic (hea_nec.core) is imported eagerly. The DataFrame-based interface
+(hea_nec.methods, hea_nec.evaluator, hea_nec.rollups and hea_nec.portfolio, which depend on pandas) is only imported on first access of one of its functions,
+so that "import hea_nec" stays cheap for command-line tools and cold-started workers.
+"""
+
+import importlib
+
+from .core import (
+    coincident_peaks,
+    hourly_maxima,
+    interval_grid,
+    is_compliant,
+    peak_hourly_load,
+    peak_hourly_load_bounds,
+    remaining_panel_capacity,
+    total_demand_amps,
+)
+
+_LAZY_ATTRIBUTES = {
+    "PortfolioSummary": "portfolio",
+    "QuantileSketch": "portfolio",
+    "SolutionsEvaluator": "evaluator",
+    "build_hourly_rollup": "methods",
+    "calculate_nec_22087_capacity": "methods",
+    "calculate_nec_compliance_for_solutions": "methods",
+    "calculate_summary_details": "methods",
+    "compact_solutions": "methods",
+    "detect_data_gaps": "methods",
+    "detect_data_gaps_for_sites": "methods",
+    "get_coincident_peaks": "methods",
+    "get_peak_hourly_load": "methods",
+    "get_peak_hourly_load_bounds": "methods",
+    "get_peak_hourly_load_by_channel": "methods",
+    "get_remaining_panel_capacity": "methods",
+    "get_rolling_peak_series": "methods",
+    "get_top_peak_hours": "methods",
+    "iter_coincident_peaks": "methods",
+    "iter_nec_compliance_for_solutions": "methods",
+    "load_hourly_rollup": "rollups",
+    "read_solutions_csv": "methods",
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
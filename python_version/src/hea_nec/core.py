@@ -0,0 +1,290 @@
+"""
+NEC 220.87 core arithmetic on plain NumPy arrays.
+
+This module contains the numeric heart of the NEC 220.87 method (peak hourly load, remaining panel capacity and
+compliance of added/removed loads) without depending on pandas, so that importing it stays cheap for command-line
+tools and cold-started workers. hea_nec.methods builds its DataFrame-based interface on top of these functions.
+
+Timestamps are passed as int64 epochs in nanoseconds (e.g. datetime64[ns] values viewed as int64). For
+timezone-aware data, UTC epochs should be used: with whole-hour UTC offsets, hour boundaries in UTC match local
+hour boundaries, including repeated DST hours.
+
+Dependencies:
+- numpy: Numerical computations
+"""
+
+import numpy as np
+from typing import Dict
+
+# Interval lengths (in seconds) delivered by utility meters: 5-, 15-, 30- and 60-minute data
+STANDARD_INTERVALS_SEC = (300, 900, 1800, 3600)
+
+# Resolution of the canonical interval grid: 5-minute slots, 12 per hour
+GRID_SLOT_SEC = min(STANDARD_INTERVALS_SEC)
+GRID_SLOTS_PER_HOUR = 3600 // GRID_SLOT_SEC
+
+# NEC 220.87 multiplier applied to the existing peak load
+NEC_CAPACITY_FACTOR = 1.25
+
+HOUR_NS = 3600 * 10**9
+
+# Standard residential panel (service) sizes in A
+STANDARD_PANEL_SIZES_A = (100, 125, 150, 200, 225, 400)
+
+def interval_grid(epoch_ns: np.ndarray, kwh: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Maps meter readings onto a canonical dense grid of shape (hours with data, 5-minute slots per hour) and
+    detects the native cadence (5, 15, 30 or 60 minutes) of each hour. kwh is either a 1-D array of readings
+    or a 2-D array with one column per channel, which share the same grid.
+
+    The cadence of an hour is the longest standard interval length all of its readings are aligned to.
+    Hours with a single reading are hourly, whatever its offset within the hour (as a lone reading gives no
+    cadence). Hours with several readings that appear coarser than both of their neighbors (e.g. only :00 and
+    :30 present in 15-minute data) adopt the neighbors' cadence.
+
+    Args:
+        epoch_ns: int64 array with the start of each measurement interval (ns since epoch)
+        kwh: float array of meter values in kWh, aligned with epoch_ns
+
+    Returns:
+        a dict with:
+            "hours": int64 array of the hour starts (ns since epoch), in ascending order
+            "values": float array (hours x slots [x channels]) of readings, NaN where no reading was made
+            "filled": bool array (hours x slots), True where a reading was made
+            "row_idx": int64 array (hours x slots) with the row position of each reading, -1 where empty
+            "interval_sec": int64 array with the detected cadence of each hour in seconds
+    """
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    kwh = np.asarray(kwh, dtype=float)
+
+    hour_ns = epoch_ns - epoch_ns % HOUR_NS
+    if np.all(hour_ns[1:] >= hour_ns[:-1]):
+        # Sorted input (the common case): hours are contiguous runs
+        new_hour = np.concatenate(([True], hour_ns[1:] != hour_ns[:-1])) if len(hour_ns) > 0 else np.zeros(0, dtype=bool)
+        hour_values = hour_ns[new_hour]
+        hour_id = np.cumsum(new_hour) - 1
+    else:
+        hour_values, hour_id = np.unique(hour_ns, return_inverse=True)
+    offset_sec = (epoch_ns - hour_ns) // 10**9
+    slot = offset_sec // GRID_SLOT_SEC
+    n_hours = len(hour_values)
+
+    # Canonical grid; with several readings in one slot, the largest one (first in time in case of a tie) is kept,
+    # based on the first channel for multi-channel readings
+    cell = hour_id * GRID_SLOTS_PER_HOUR + slot
+    if np.all(cell[1:] > cell[:-1]):
+        order = np.arange(len(cell))
+    else:
+        sort_kwh = kwh if kwh.ndim == 1 else kwh[:, 0]
+        order = np.lexsort((-np.arange(len(sort_kwh)), sort_kwh, cell))
+        order = order[np.concatenate((cell[order][1:] != cell[order][:-1], [True]))]
+
+    values = np.full((n_hours * GRID_SLOTS_PER_HOUR,) + kwh.shape[1:], np.nan)
+    row_idx = np.full(n_hours * GRID_SLOTS_PER_HOUR, -1, dtype=np.int64)
+    values[cell[order]] = kwh[order]
+    row_idx[cell[order]] = order
+    values = values.reshape((n_hours, GRID_SLOTS_PER_HOUR) + kwh.shape[1:])
+    row_idx = row_idx.reshape(n_hours, GRID_SLOTS_PER_HOUR)
+    filled = row_idx >= 0
+
+    # Native cadence of each hour: longest standard interval that divides all reading offsets within the hour
+    interval_sec = np.full(n_hours, GRID_SLOT_SEC, dtype=np.int64)
+    if n_hours > 0:
+        hour_order = hour_id[order]
+        hour_first = np.flatnonzero(np.concatenate(([True], hour_order[1:] != hour_order[:-1])))
+        offset_gcd = np.gcd(np.gcd.reduceat(offset_sec[order], hour_first), 3600)
+        for interval in sorted(STANDARD_INTERVALS_SEC)[1:]:
+            interval_sec[offset_gcd % interval == 0] = interval
+
+    # A lone reading is scaled as hourly, so the peak does not depend on which reading of a partial hour survived
+    readings = filled.sum(axis=1)
+    interval_sec[readings == 1] = 3600
+
+    # Partially filled hours may look coarser than they are; adopt the cadence of finer neighbors
+    if n_hours > 2:
+        neighbor_sec = np.maximum(interval_sec[:-2], interval_sec[2:])
+        refine = (readings[1:-1] > 1) & (neighbor_sec < interval_sec[1:-1])
+        interval_sec[1:-1][refine] = neighbor_sec[refine]
+
+    return {
+        "hours": hour_values,
+        "values": values,
+        "filled": filled,
+        "row_idx": row_idx,
+        "interval_sec": interval_sec,
+    }
+
+def hourly_maxima(grid: Dict[str, np.ndarray], values: np.ndarray, hourly_safety_factor: float = 1.3) -> Dict[str, np.ndarray]:
+    """
+    Reduces one channel of a grid built by interval_grid (values of shape hours x slots) per hour.
+
+    The maximum reading of each hour is scaled to kW by the number of intervals per hour ("period"); hours
+    with a single distinct reading (hourly or "fake" sub-hourly data) are additionally multiplied by
+    hourly_safety_factor.
+
+    Returns:
+        a dict of arrays with one entry per hour with data: "hours", "kWh_max", "kWh_nunique" (number of distinct
+        readings), "kWh_idxmax" (row position of the maximum reading), "readings", "interval_sec", "period" and
+        "kWh_max_adj" (adjusted hourly load in kW)
+    """
+    filled = grid["filled"] & ~np.isnan(values)
+
+    has_data = filled.any(axis=1)
+    max_slot = np.argmax(np.where(filled, values, -np.inf), axis=1)
+    kwh_max = np.take_along_axis(values, max_slot[:, None], axis=1)[:, 0]
+    kwh_idxmax = np.take_along_axis(grid["row_idx"], max_slot[:, None], axis=1)[:, 0]
+
+    # Number of distinct readings per hour (NaNs sort last)
+    sorted_values = np.sort(values, axis=1)
+    kwh_nunique = has_data.astype(np.int64) + (
+        (np.diff(sorted_values, axis=1) != 0) & ~np.isnan(sorted_values[:, 1:])).sum(axis=1)
+
+    period = 3600 // grid["interval_sec"]
+    kwh_max_adj = np.where(
+        kwh_nunique == 1,
+        kwh_max * period * hourly_safety_factor,
+        kwh_max * period
+    )
+
+    return {
+        "hours": grid["hours"][has_data],
+        "kWh_max": kwh_max[has_data],
+        "kWh_nunique": kwh_nunique[has_data],
+        "kWh_idxmax": kwh_idxmax[has_data],
+        "readings": filled.sum(axis=1)[has_data],
+        "interval_sec": grid["interval_sec"][has_data],
+        "period": period[has_data],
+        "kWh_max_adj": kwh_max_adj[has_data],
+    }
+
+def peak_hourly_load(epoch_ns: np.ndarray, kwh: np.ndarray, hourly_safety_factor: float = 1.3) -> float:
+    """Estimates the peak hourly load in kW from meter values (see hea_nec.methods.get_peak_hourly_load).
+
+    Args:
+        epoch_ns: int64 array with the start of each measurement interval (ns since epoch)
+        kwh: float array of meter values in kWh
+        hourly_safety_factor: safety factor to apply for single-hour data (default: 1.3)
+
+    Returns:
+        float: Estimated peak hourly load in kW
+    """
+    grid = interval_grid(epoch_ns, kwh)
+    return float(hourly_maxima(grid, grid["values"], hourly_safety_factor)["kWh_max_adj"].max())
+
+def peak_hourly_load_bounds(epoch_ns: np.ndarray, kwh: np.ndarray, hourly_safety_factor: float = 1.3):
+    """
+    Cheap lower and upper bounds on peak_hourly_load, without mapping all readings onto the interval grid.
+
+    Upper bound: the maximum reading, scaled by the number of intervals per hour of the finest cadence that the
+    reading offsets allow (the cadence of every hour is at least as coarse) and by the safety factor (if above 1);
+    for a negative maximum reading (export), by the smallest of these factors instead.
+    Lower bound: the exact adjusted load of the hour with the maximum reading, computed from the readings of that
+    hour and its neighboring hours with data only (which determine its cadence).
+
+    Returns:
+        tuple (lower, upper) in kW, (nan, nan) without readings
+    """
+    epoch_ns = np.asarray(epoch_ns, dtype=np.int64)
+    kwh = np.asarray(kwh, dtype=float)
+    valid = np.flatnonzero(~np.isnan(kwh))
+    if len(valid) == 0:
+        return np.nan, np.nan
+    max_pos = valid[np.argmax(kwh[valid])]
+
+    hour_ns = epoch_ns - epoch_ns % HOUR_NS
+    offset_gcd = np.gcd(np.gcd.reduce((epoch_ns - hour_ns) // 10**9), 3600)
+    finest_sec = max(interval for interval in STANDARD_INTERVALS_SEC if offset_gcd % interval == 0) \
+        if offset_gcd % GRID_SLOT_SEC == 0 else GRID_SLOT_SEC
+    if kwh[max_pos] >= 0:
+        upper = kwh[max_pos] * (3600 // finest_sec) * max(hourly_safety_factor, 1.0)
+    else:
+        upper = kwh[max_pos] * min(hourly_safety_factor, 1.0)
+
+    peak_hour = hour_ns[max_pos]
+    earlier = hour_ns[hour_ns < peak_hour]
+    later = hour_ns[hour_ns > peak_hour]
+    hours = [peak_hour] + ([earlier.max()] if len(earlier) else []) + ([later.min()] if len(later) else [])
+    rows = np.isin(hour_ns, hours)
+    grid = interval_grid(epoch_ns[rows], kwh[rows])
+    maxima = hourly_maxima(grid, grid["values"], hourly_safety_factor)
+    lower = maxima["kWh_max_adj"][maxima["hours"] == peak_hour]
+
+    return float(lower[0]) if len(lower) else np.nan, float(upper)
+
+def coincident_peaks(base_kw: np.ndarray, shapes: np.ndarray, phase: np.ndarray = None, chunk_size: int = 256):
+    """
+    Coincident peak of an hourly base load with each of many added load shapes: max over hours h of
+    base_kw[h] + shape[phase[h]], for every row (shape) of shapes.
+
+    With phase (e.g. hour of day 0..23 or hour of week 0..167 for each hour), shapes are periodic with
+    shapes.shape[1] phases and the base load is first reduced to its maximum per phase, so the cost no longer
+    depends on the length of the history. Without phase, shapes are aligned with base_kw (one column per hour).
+    Shapes are processed in blocks of chunk_size rows, bounding the temporary (chunk_size x columns) matrix.
+
+    Returns:
+        tuple (peaks, hour_idx): coincident peak in kW of each shape and the position in base_kw of its hour
+    """
+    base_kw = np.asarray(base_kw, dtype=float)
+    shapes = np.asarray(shapes, dtype=float)
+    if shapes.ndim != 2:
+        raise ValueError("Load shapes must be a 2-D array (one row per shape)")
+
+    if phase is not None:
+        phase = np.asarray(phase, dtype=np.int64)
+        # Highest base load per phase and the (first) hour it occurs in; phases without data never coincide
+        column_base = np.full(shapes.shape[1], -np.inf)
+        np.maximum.at(column_base, phase, base_kw)
+        column_hour = np.full(shapes.shape[1], -1, dtype=np.int64)
+        at_max = np.flatnonzero(base_kw == column_base[phase])
+        column_hour[phase[at_max[::-1]]] = at_max[::-1]
+    else:
+        if shapes.shape[1] != len(base_kw):
+            raise ValueError(f"Load shapes have {shapes.shape[1]} columns, expected one per hour ({len(base_kw)})")
+        column_base = base_kw
+        column_hour = np.arange(len(base_kw))
+
+    peaks = np.empty(len(shapes))
+    hour_idx = np.empty(len(shapes), dtype=np.int64)
+    for start in range(0, len(shapes), chunk_size):
+        block = shapes[start:start + chunk_size] + column_base
+        best = np.argmax(block, axis=1)
+        peaks[start:start + chunk_size] = block[np.arange(len(block)), best]
+        hour_idx[start:start + chunk_size] = column_hour[best]
+    return peaks, hour_idx
+
+def remaining_panel_capacity(peak_hourly_load_kW, panel_size_A, panel_voltage_V=240):
+    """Estimates the remaining panel capacity in kW from panel size and peak hourly load.
+    Accepts scalars or NumPy arrays (e.g. one entry per site).
+
+    Returns:
+        Remaining electric panel capacity in kW, according to NEC-220.87
+    """
+    return panel_size_A * panel_voltage_V / 1000 - NEC_CAPACITY_FACTOR * peak_hourly_load_kW
+
+def total_demand_amps(peak_kw, added_kw, removed_kw, panel_voltage_V=240, code_edition: str = "2023"):
+    """Calculates the total demand in A after adding/removing loads, according to the given NEC edition.
+    Accepts scalars or NumPy arrays (e.g. one entry per solution).
+
+    2023: Peak * 1.25 + New_Calculated
+    2026 (draft): max(0, Peak - Removed_Calculated) * 1.25 + New_Calculated
+
+    Returns:
+        Total demand in A
+    """
+    if code_edition == "2026":
+        existing_demand = np.maximum(0, np.subtract(peak_kw, removed_kw)) * NEC_CAPACITY_FACTOR
+    else:
+        existing_demand = np.multiply(peak_kw, NEC_CAPACITY_FACTOR)
+
+    return (existing_demand + added_kw) * 1000 / panel_voltage_V
+
+def is_compliant(total_amps, panel_size_A):
+    """Returns True where the total demand in A does not exceed the panel capacity (scalars or NumPy arrays)."""
+    return np.less_equal(total_amps, panel_size_A)
+
+def min_standard_panel_size(total_amps, panel_sizes_A=STANDARD_PANEL_SIZES_A):
+    """Smallest standard panel size in A that the total demand complies with (see is_compliant), for scalars or
+    NumPy arrays; NaN where the demand exceeds the largest size."""
+    sizes = np.sort(np.asarray(panel_sizes_A, dtype=float))
+    idx = np.searchsorted(sizes, total_amps, side="left")
+    return np.where(idx < len(sizes), sizes[np.minimum(idx, len(sizes) - 1)], np.nan)
@@ -0,0 +1,219 @@
+"""
+Incremental NEC compliance evaluation of solutions (what-if editing).
+
+SolutionsEvaluator holds the state of a calculate_nec_compliance_for_solutions run (site peak loads, the appliance
+rows and calculated added/removed loads of each solution, and the compliance results) and accepts row-level inserts,
+updates and deletes of the solutions table as well as changes of a site's meter data or panel specification.
+Only the solutions affected by an edit are recalculated:
+- an appliance row edit affects the solution(s) the row belonged to before and after the edit
+- a meter data or panel specification change of a site affects the compliance (but not the loads) of its solutions
+
+Dependencies:
+- pandas: Data processing and analysis
+"""
+
+import pandas as pd
+from typing import Any, Dict, Iterable, Mapping, Set, Tuple
+
+from .methods import (
+    COMPLIANCE_COLUMNS,
+    SOLUTION_KEY_COLUMNS,
+    _calculate_nec_compliance_for_site,
+    _calculate_solution_loads,
+    _device_categories,
+    _site_peak_load,
+)
+
+class SolutionsEvaluator:
+    """
+    Stateful, incremental equivalent of calculate_nec_compliance_for_solutions.
+
+    Rows of the solutions table are identified by their index labels in solutions_df (which must be unique);
+    inserted rows keep the index labels of the DataFrame they are inserted with. site_ua_intervals may be a lazy
+    mapping (e.g. MeterDataFiles of calculate_solutions.py): the meter data of a site is read when its peak load is
+    (re)calculated, and not kept.
+
+    Example:
+        evaluator = SolutionsEvaluator(solutions_df, site_ua_intervals, site_specs, code_edition="2026")
+        evaluator.update(pd.DataFrame({"load_nameplate_power": [9600]}, index=[17]))  # results of affected solutions
+        evaluator.results                                                             # all results
+
+    Args: see calculate_nec_compliance_for_solutions
+    """
+
+    def __init__(
+        self,
+        solutions_df: pd.DataFrame,
+        site_ua_intervals: Mapping[Any, pd.DataFrame],
+        site_specs: Dict[Any, Dict[str, float]],
+        code_edition: str = "2023",
+        hourly_safety_factor: float = 1.3,
+        channel: str = None
+    ):
+        if code_edition != "2023" and code_edition != "2026":
+            raise ValueError(f"Unsupported NEC edition '{code_edition}'")
+
+        self.code_edition = code_edition
+        self.hourly_safety_factor = hourly_safety_factor
+        self.channel = channel
+        # Kept as given, so that lazy mappings (e.g. of meter files) are only read for the sites evaluated
+        self._site_ua_intervals = site_ua_intervals
+        self._meter_updates = {}    # site_id -> meter data replaced by update_site
+        self._site_specs = {site_id: dict(spec) for site_id, spec in site_specs.items()}
+
+        self._rows = {}             # solution key -> DataFrame of its appliance rows
+        self._row_keys = {}         # row label -> solution key
+        self._site_solutions = {}   # site_id -> set of solution keys
+        self._site_peaks = {}       # site_id -> observed peak load in kW (None without meter data)
+        self._loads = {}            # solution key -> (added_load_watts, removed_load_watts)
+        self._results = {}          # solution key -> result record
+
+        self._recalculate(self._add(solutions_df))
+
+    @property
+    def results(self) -> pd.DataFrame:
+        """Current evaluation results of all solutions, as returned by calculate_nec_compliance_for_solutions."""
+        return self._result_frame(self._results.keys())
+
+    def insert(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Adds appliance rows; returns the updated results of the affected solutions."""
+        return self._recalculate(self._add(rows))
+
+    def update(self, changes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Changes appliance rows: changes is indexed by the labels of the rows to change and holds the new values of
+        the changed columns (which may include the solution key columns, moving rows between solutions).
+        Returns the updated results of the affected solutions.
+        """
+        # Drop the stored rule categories, so that _add classifies the changed devices again
+        rows = self._get_rows(changes.index).drop(columns="device_category")
+        for column in changes.columns:
+            rows[column] = changes[column]
+        self._check_keys(rows)
+        affected = self._remove(changes.index)
+        affected |= self._add(rows)
+        return self._recalculate(affected)
+
+    def delete(self, labels: Iterable) -> pd.DataFrame:
+        """Removes appliance rows by label; returns the updated results of the affected solutions that still exist."""
+        return self._recalculate(self._remove(list(labels)))
+
+    def update_site(self, site_id, meter_df: pd.DataFrame = None, site_spec: Dict[str, float] = None) -> pd.DataFrame:
+        """
+        Replaces the meter data and/or panel specification of a site and re-checks the compliance of its solutions
+        (the solution loads do not depend on the site and are kept). Returns the updated results of the site.
+        """
+        if meter_df is not None:
+            self._meter_updates[site_id] = meter_df
+        if site_spec is not None:
+            self._site_specs[site_id] = dict(site_spec)
+        self._site_peaks.pop(site_id, None)
+        return self._recalculate(set(self._site_solutions.get(site_id, ())), loads_changed=False)
+
+    def _get_rows(self, labels: Iterable) -> pd.DataFrame:
+        missing = [label for label in labels if label not in self._row_keys]
+        if missing:
+            raise ValueError(f"Unknown solution rows {missing}")
+        keys = {self._row_keys[label] for label in labels}
+        rows = pd.concat([self._rows[key] for key in keys])
+        return rows.loc[list(labels)].copy()
+
+    @staticmethod
+    def _check_keys(rows: pd.DataFrame):
+        """Raises a ValueError for rows without a complete solution key (they would not belong to any solution)."""
+        missing_keys = rows[SOLUTION_KEY_COLUMNS].isna().any(axis=1)
+        if missing_keys.any():
+            raise ValueError(
+                f"Solution rows {list(rows.index[missing_keys])} are missing {', '.join(SOLUTION_KEY_COLUMNS)} values"
+            )
+
+    def _add(self, rows: pd.DataFrame) -> Set[Tuple]:
+        """Adds rows to their solutions; returns the keys of the changed solutions."""
+        if not rows.index.is_unique or any(label in self._row_keys for label in rows.index):
+            raise ValueError("Solution rows must have unique index labels")
+        if len(rows) == 0:
+            return set()
+        self._check_keys(rows)
+
+        rows = rows.assign(device_category=_device_categories(rows))
+        affected = set()
+        for key, key_rows in rows.groupby(SOLUTION_KEY_COLUMNS, sort=False, observed=True):
+            existing = self._rows.get(key)
+            self._rows[key] = key_rows if existing is None else pd.concat([existing, key_rows])
+            self._row_keys.update(dict.fromkeys(key_rows.index, key))
+            self._site_solutions.setdefault(key[0], set()).add(key)
+            affected.add(key)
+        return affected
+
+    def _remove(self, labels: Iterable) -> Set[Tuple]:
+        """Removes rows from their solutions; returns the keys of the changed solutions."""
+        labels = list(labels)
+        self._get_rows(labels)  # validates the labels
+        affected = set()
+        for label in labels:
+            affected.add(self._row_keys.pop(label))
+        for key in affected:
+            remaining = self._rows[key].drop(index=[label for label in labels if label in self._rows[key].index])
+            if len(remaining) > 0:
+                self._rows[key] = remaining
+            else:
+                del self._rows[key]
+        return affected
+
+    def _site_peak(self, site_id) -> float:
+        if site_id not in self._site_peaks:
+            if site_id in self._meter_updates:
+                meter_df = self._meter_updates[site_id]
+            else:
+                meter_df = self._site_ua_intervals.get(site_id)
+            self._site_peaks[site_id] = _site_peak_load(
+                meter_df,
+                self._site_specs.get(site_id, {}),
+                hourly_safety_factor=self.hourly_safety_factor,
+                channel=self.channel,
+            )
+        return self._site_peaks[site_id]
+
+    def _recalculate(self, keys: Set[Tuple], loads_changed: bool = True) -> pd.DataFrame:
+        """Recalculates loads (unless only site data changed) and compliance of the given solutions."""
+        for key in keys:
+            if key not in self._rows:
+                # Solution has no rows left
+                self._loads.pop(key, None)
+                self._results.pop(key, None)
+                self._site_solutions.get(key[0], set()).discard(key)
+            elif loads_changed or key not in self._loads:
+                loads = _calculate_solution_loads(self._rows[key], code_edition=self.code_edition)
+                self._loads[key] = (loads["added_load_watts"], loads["removed_load_watts"])
+
+        remaining = sorted(key for key in keys if key in self._rows)
+        by_site = {}
+        for key in remaining:
+            by_site.setdefault(key[0], []).append(key)
+
+        for site_id, site_keys in by_site.items():
+            solution_loads = pd.DataFrame(
+                [key + self._loads[key] for key in site_keys],
+                columns=SOLUTION_KEY_COLUMNS + ["added_load_watts", "removed_load_watts"]
+            )
+            peak_kw = self._site_peak(site_id)
+            site_results = _calculate_nec_compliance_for_site(
+                solution_loads,
+                site_spec=self._site_specs[site_id] if peak_kw is not None else self._site_specs.get(site_id, {}),
+                peak_kw=peak_kw,
+                code_edition=self.code_edition
+            )
+            for key, record in zip(site_keys, site_results.to_dict("records")):
+                self._results[key] = record
+
+        return self._result_frame(remaining)
+
+    def _result_frame(self, keys: Iterable[Tuple]) -> pd.DataFrame:
+        columns = SOLUTION_KEY_COLUMNS + ["added_load_watts", "removed_load_watts"] + COMPLIANCE_COLUMNS
+        records = [self._results[key] for key in sorted(keys)]
+        result = pd.DataFrame.from_records(records, columns=columns)
+        # Solutions without meter data have no numeric results
+        for column in ["historical_peak_kw", "removed_load_credit_kw", "added_load_kw", "total_demand_amps",
+                       "headroom_amps", "min_panel_size_A"]:
+            result[column] = result[column].astype(float)
+        return result
@@ -12,7 +12,7 @@ https://github.com/HomeElectricationAlliance/NEC-220.87-Methods/blob/main/2022_H
 
 Key features (for panel capacity calculation):
 - Processes Panda dataframes containing DateTime and kWh columns
-- Handles both 15-minute and hourly interval data
+- Handles 5-, 15-, 30-minute and hourly interval data
 - Implements NEC 220.87 safety factors:
   * 1.25x multiplier for final capacity calculation
   * 1.3x multiplier for single readings
@@ -38,9 +38,84 @@ https://up.codes/s/determining-existing-loads.
 
 import pandas as pd
 import numpy as np
-from pytz import timezone, AmbiguousTimeError
-from typing import Dict, Tuple, Any
-
+from collections import deque
+from functools import lru_cache, wraps
+from typing import Dict, Tuple, Any, Sequence, Iterator, Mapping, Union
+
+from .metrics import ERRORS, FILES_PROCESSED, ROWS_PARSED, SITES_EVALUATED, timed
+from .profiling import profile_stage
+from .sniffing import CHANNEL_COLUMNS, CHANNELS
+from .core import (
+    HOUR_NS,
+    STANDARD_INTERVALS_SEC,
+    coincident_peaks,
+    hourly_maxima,
+    interval_grid,
+    is_compliant,
+    min_standard_panel_size,
+    peak_hourly_load_bounds,
+    remaining_panel_capacity,
+    total_demand_amps,
+)
+
+
+# NEC rule categories of appliances (bit flags, an appliance may fall into several categories)
+DEVICE_EV = 1
+DEVICE_DRYER = 2
+DEVICE_COOKING = 4
+
+# Keywords (matched in the lower-cased generic_device) that put an appliance into a rule category
+DEVICE_KEYWORDS = (
+    (DEVICE_EV, ("electric vehicle", "evse")),
+    (DEVICE_DRYER, ("clothes dryer",)),
+    (DEVICE_COOKING, ("cooking", "range", "oven", "cooktop")),
+)
+
+# Rule categories that do not apply to gas-fueled appliances
+_ELECTRIC_ONLY_CATEGORIES = DEVICE_DRYER | DEVICE_COOKING
+
+@lru_cache(maxsize=None)
+def _device_category(device: str) -> int:
+    """Rule category flags of a single generic_device string (cached, as there are only few distinct devices)."""
+    device = device.lower()
+    category = 0
+    for flag, keywords in DEVICE_KEYWORDS:
+        if any(keyword in device for keyword in keywords):
+            category |= flag
+    return category
+
+def _codes_and_uniques(values: pd.Series) -> Tuple[np.ndarray, Sequence]:
+    """Integer codes (-1: missing) and distinct values of a column; categorical columns are used as they are."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values)
+
+def _classify_devices(devices: pd.Series, fuel_types: pd.Series = None) -> np.ndarray:
+    """
+    Maps each appliance (generic_device, and fuel_type if given) to its NEC rule category flags (see DEVICE_KEYWORDS).
+    Each distinct device and fuel string is classified only once, so this scales with the number of device types
+    rather than the number of rows. Missing devices get no category.
+    """
+    codes, uniques = _codes_and_uniques(devices)
+    # Code -1 (missing value) picks the trailing 0
+    categories = np.array([_device_category(device) if isinstance(device, str) else 0 for device in uniques] + [0],
+                          dtype=np.int8)[codes]
+
+    if fuel_types is not None:
+        fuel_codes, fuel_uniques = _codes_and_uniques(fuel_types)
+        is_gas = np.array([isinstance(fuel, str) and fuel.lower() == "gas" for fuel in fuel_uniques] + [False])[fuel_codes]
+        categories = np.where(is_gas, categories & ~_ELECTRIC_ONLY_CATEGORIES, categories)
+
+    return categories
+
+def _device_categories(df: pd.DataFrame) -> np.ndarray:
+    """Rule category flags of the loads in df, from its 'device_category' column or else classified on the fly."""
+    if "device_category" in df.columns:
+        return df["device_category"].to_numpy()
+    devices = df["generic_device"] if "generic_device" in df.columns else df.get("type_lower")
+    if devices is None:
+        return np.zeros(len(df), dtype=np.int8)
+    return _classify_devices(devices, df["fuel_type"] if "fuel_type" in df.columns else None)
 
 def _apply_nec_appliance_rules(df: pd.DataFrame, code_edition: str = "2023"):
     """
@@ -49,28 +124,22 @@ def _apply_nec_appliance_rules(df: pd.DataFrame, code_edition: str = "2023"):
 
     Note: deprecated in favor of _apply_nec_demand_factors
     """
+    categories = _device_categories(df)
+
     # 1. Electric Vehicles: Continuous Load (125% per NEC 625.41 / 210.20(A))
     # Applicable in both 2023 and 2026
-    mask_ev = df["type_lower"].str.contains("electric vehicle") | df[
-        "type_lower"
-    ].str.contains("evse")
+    mask_ev = (categories & DEVICE_EV) != 0
     df.loc[mask_ev, "nec_watts"] = df.loc[mask_ev, "nec_watts"] * 1.25
 
     # 2. Clothes Dryers: Min 5000W rule (NEC 220.54)
-    # Applicable in both 2023 and 2026
-    mask_dryer = df["type_lower"].str.contains("clothes dryer")
-    if "fuel_type" in df.columns:
-        mask_gas = df["fuel_type"].str.lower() == "gas"
-        mask_dryer = mask_dryer & (~mask_gas)
-
+    # Applicable in both 2023 and 2026 (electric dryers only)
+    mask_dryer = (categories & DEVICE_DRYER) != 0
     if mask_dryer.any():
-        for idx in df[mask_dryer].index:
-            count = df.loc[idx, "load_count"]
-            nameplate = df.loc[idx, "load_nameplate_power"]
-            # NEC 220.54 requires 5000W or nameplate, whichever is larger, per dryer.
-            # Note: We apply this to the base unit, then multiply by count
-            calc_load = max(nameplate, 5000) * count
-            df.loc[idx, "nec_watts"] = calc_load
+        # NEC 220.54 requires 5000W or nameplate, whichever is larger, per dryer.
+        # Note: We apply this to the base unit, then multiply by count
+        df.loc[mask_dryer, "nec_watts"] = (
+            np.maximum(df.loc[mask_dryer, "load_nameplate_power"], 5000) * df.loc[mask_dryer, "load_count"]
+        )
 
     # 3. Cooking Appliances: Table 220.55
     # ONLY applicable for 2026 (Draft) in the context of 220.87.
@@ -78,85 +147,43 @@ def _apply_nec_appliance_rules(df: pd.DataFrame, code_edition: str = "2023"):
     if code_edition == "2026":
         _apply_nec_cooking_aggregation(df)
 
-def _apply_nec_cooking_aggregation(df: pd.DataFrame):
+def _cooking_nec_watts(counts: np.ndarray, watts: np.ndarray, nec_watts: np.ndarray) -> np.ndarray:
     """
-    Applies NEC Table 220.55 aggregation logic (Columns A, B, and C).
-
-    Note: preliminary implementation intended as an example for a possible application
-    of the "calculated loads" handling permitted by the NEC 2026 draft. Table 220.55 is
-    normally used for capacity planning in new dwellings and not applicable in context
-    of 220.87 as per NEC 2023 edition of the code.
+    NEC Table 220.55 aggregation of the cooking appliance rows of a single solution (see
+    _apply_nec_cooking_aggregation): returns the NEC load in W of each row, given their counts, nameplate watts and
+    NEC loads so far (kept for rows the aggregation does not assign).
     """
-    mask_cooking = (
-        df["type_lower"].str.contains("cooking")
-        | df["type_lower"].str.contains("range")
-        | df["type_lower"].str.contains("oven")
-        | df["type_lower"].str.contains("cooktop")
-    )
-    if "fuel_type" in df.columns:
-        mask_gas = df["fuel_type"].str.lower() == "gas"
-        mask_cooking = mask_cooking & (~mask_gas)
+    counts = counts.astype(int)
+    nec_watts = nec_watts.astype(float)
 
-    if not mask_cooking.any():
-        return
+    # NEC 220.55: Only applies to appliances > 1.75 kW; small appliances use nameplate
+    large = watts > 1750
+    nec_watts[~large] = watts[~large] * counts[~large]
 
-    unit_ratings = []
-    unit_indices = []
+    if not (large & (counts > 0)).any():
+        return nec_watts
 
-    for idx in df[mask_cooking].index:
-        count = int(df.loc[idx, "load_count"])
-        watts = df.loc[idx, "load_nameplate_power"]
-
-        # NEC 220.55: Only applies to appliances > 1.75 kW
-        if watts > 1750:
-            unit_ratings.extend([watts] * count)
-            unit_indices.extend([idx] * count)
-        else:
-            # Small appliances use nameplate
-            df.loc[idx, "nec_watts"] = watts * count
-
-    if not unit_ratings:
-        return
-
-    # Bucket Appliances
-    col_a_units = [w for w in unit_ratings if 1750 < w < 3500]
-    col_b_units = [w for w in unit_ratings if 3500 <= w <= 8750]
-    col_c_units = [w for w in unit_ratings if w > 8750]
+    # Bucket Appliances (each appliance counted load_count times)
+    col_a = large & (watts < 3500)
+    col_b = large & (watts >= 3500) & (watts <= 8750)
+    col_c = large & (watts > 8750)
 
     total_nec_watts = 0.0
 
     # Column A
-    count_a = len(col_a_units)
+    count_a = counts[col_a].sum()
     if count_a > 0:
-        if count_a == 1:
-            factor = 0.80
-        elif count_a == 2:
-            factor = 0.75
-        elif count_a == 3:
-            factor = 0.70
-        elif count_a == 4:
-            factor = 0.66
-        else:
-            factor = 0.62
-        total_nec_watts += sum(col_a_units) * factor
+        factor = (0.80, 0.75, 0.70, 0.66)[count_a - 1] if count_a <= 4 else 0.62
+        total_nec_watts += (watts[col_a] * counts[col_a]).sum() * factor
 
     # Column B
-    count_b = len(col_b_units)
+    count_b = counts[col_b].sum()
     if count_b > 0:
-        if count_b == 1:
-            factor = 0.80
-        elif count_b == 2:
-            factor = 0.65
-        elif count_b == 3:
-            factor = 0.55
-        elif count_b == 4:
-            factor = 0.50
-        else:
-            factor = 0.45
-        total_nec_watts += sum(col_b_units) * factor
+        factor = (0.80, 0.65, 0.55, 0.50)[count_b - 1] if count_b <= 4 else 0.45
+        total_nec_watts += (watts[col_b] * counts[col_b]).sum() * factor
 
     # Column C
-    count_c = len(col_c_units)
+    count_c = counts[col_c].sum()
     if count_c > 0:
         if count_c <= 5:
             base_kw = 8 + (3 * (count_c - 1))
@@ -164,8 +191,7 @@ def _apply_nec_cooking_aggregation(df: pd.DataFrame):
             base_kw = 20 + (3 * (count_c - 5))
 
         # Note 2: Use 12kW for ranges < 12kW
-        floored_ratings_kw = [max(w, 12000) / 1000.0 for w in col_c_units]
-        avg_kw = sum(floored_ratings_kw) / count_c
+        avg_kw = (np.maximum(watts[col_c], 12000) / 1000.0 * counts[col_c]).sum() / count_c
 
         # Note 1 & 2: Increase 5% for each kW (or major fraction) avg exceeds 12kW
         if avg_kw > 12:
@@ -178,19 +204,37 @@ def _apply_nec_cooking_aggregation(df: pd.DataFrame):
 
         total_nec_watts += base_kw * 1000.0
 
-    # Distribute back to rows
-    total_raw_watts = sum(unit_ratings)
+    # Distribute back to rows, in proportion to their raw wattage
+    raw_watts = watts * counts
+    total_raw_watts = raw_watts[large].sum()
     if total_raw_watts > 0:
         ratio = total_nec_watts / total_raw_watts
-        allocations = {idx: 0.0 for idx in df[mask_cooking].index}
+        nec_watts[large] = raw_watts[large] * ratio
+
+    return nec_watts
+
+def _apply_nec_cooking_aggregation(df: pd.DataFrame):
+    """
+    Applies NEC Table 220.55 aggregation logic (Columns A, B, and C).
 
-        for i, idx in enumerate(unit_indices):
-            raw_w = unit_ratings[i]
-            allocations[idx] += raw_w * ratio
+    Note: preliminary implementation intended as an example for a possible application
+    of the "calculated loads" handling permitted by the NEC 2026 draft. Table 220.55 is
+    normally used for capacity planning in new dwellings and not applicable in context
+    of 220.87 as per NEC 2023 edition of the code.
+    """
+    mask_cooking = (_device_categories(df) & DEVICE_COOKING) != 0
+    if not mask_cooking.any():
+        return
 
-        for idx, alloc_watts in allocations.items():
-            if df.loc[idx, "load_nameplate_power"] > 1750:
-                df.loc[idx, "nec_watts"] = alloc_watts
+    if "nec_watts" in df.columns:
+        nec_watts = df.loc[mask_cooking, "nec_watts"].to_numpy(dtype=float)
+    else:
+        nec_watts = np.full(mask_cooking.sum(), np.nan)
+    df.loc[mask_cooking, "nec_watts"] = _cooking_nec_watts(
+        df.loc[mask_cooking, "load_count"].to_numpy(),
+        df.loc[mask_cooking, "load_nameplate_power"].to_numpy(dtype=float),
+        nec_watts,
+    )
 
 def _apply_nec_demand_factors(df: pd.DataFrame, demand_factor_column: str):
     """
@@ -199,6 +243,128 @@ def _apply_nec_demand_factors(df: pd.DataFrame, demand_factor_column: str):
     """
     df["nec_watts"] = df["nec_watts"] * df[demand_factor_column]
 
+def _edition_demand_factor_column(code_edition: str) -> str:
+    """Name of the optional column with the appliances' specific demand factors for the NEC edition."""
+    return "demand_factor_nec_22087_2023" if code_edition == "2023" else "demand_factor_nec_12087_2026"
+
+def _solution_nec_watts_by_edition(df: pd.DataFrame, solution_ids: np.ndarray,
+                                   code_editions: Sequence[str] = ("2023",)) -> Dict[str, np.ndarray]:
+    """
+    Calculates the NEC load in W of each appliance row of df (after NEC appliance rules and load controls), for
+    all solutions at once and for each of the NEC editions in code_editions; solution_ids numbers the solution of
+    each row (0..n-1). Columns are only read (as arrays or category codes), nothing is copied per solution.
+
+    The steps common to all editions (nameplate x count, device categories, the pausing and sharing groups) are
+    done once; only the demand factors, the cooking aggregation and the selection of the sharing winners (which
+    depends on the calculated loads) are done per edition.
+    """
+    count = df["load_count"].to_numpy(dtype=float, na_value=np.nan)
+    count = np.where(np.isnan(count), 1.0, count)
+    nameplate = df["load_nameplate_power"].to_numpy(dtype=float, na_value=np.nan)
+
+    # Raw nameplate calculation
+    raw_watts = nameplate * count
+
+    # Appliance-specific rules common to both editions, used unless a specific demand factor column exists
+    categories = None
+    rule_watts = None
+    cooking = None
+    if any(_edition_demand_factor_column(edition) not in df.columns for edition in code_editions):
+        categories = _device_categories(df)
+        # Electric Vehicles: Continuous Load (125% per NEC 625.41 / 210.20(A))
+        rule_watts = np.where((categories & DEVICE_EV) != 0, raw_watts * 1.25, raw_watts)
+        # Clothes Dryers: 5000W or nameplate, whichever is larger, per dryer (NEC 220.54)
+        rule_watts = np.where((categories & DEVICE_DRYER) != 0, np.maximum(nameplate, 5000) * count, rule_watts)
+        cooking = (categories & DEVICE_COOKING) != 0
+
+    # Load control (pausing/sharing) rows and sharing groups
+    paused = None
+    sharing_rows = None
+    if "load_control_type" in df.columns:
+        control_type = df["load_control_type"]
+        paused = (control_type == "circuit_pausing").to_numpy()
+        if "load_control_group" in df.columns:
+            sharing = ((control_type == "circuit_sharing") & df["load_control_group"].notna()).to_numpy()
+            if sharing.any():
+                sharing_rows = np.flatnonzero(sharing)
+                shared = pd.DataFrame({
+                    "solution": solution_ids[sharing_rows],
+                    "group": df["load_control_group"].to_numpy()[sharing_rows],
+                })
+                sharing_groups = shared.groupby(["solution", "group"], sort=False, observed=True).ngroup().to_numpy()
+
+    cooking_groups = None
+    nec_watts_by_edition = {}
+    for code_edition in code_editions:
+        # Apply appliance-specific rules first.
+        # We calculate the "effective" NEC load for every item before load interlocks.
+        demand_factor_column = _edition_demand_factor_column(code_edition)
+        if demand_factor_column in df.columns:
+            nec_watts = raw_watts * df[demand_factor_column].to_numpy(dtype=float, na_value=np.nan)
+        else:
+            nec_watts = rule_watts.copy()
+            # Cooking Appliances: Table 220.55, aggregated per solution
+            # (only for 2026, see _apply_nec_cooking_aggregation)
+            if code_edition == "2026" and cooking.any():
+                if cooking_groups is None:
+                    # Cooking rows grouped by solution (in row order within each solution), done once for all editions
+                    cooking_rows = np.flatnonzero(cooking)
+                    cooking_rows = cooking_rows[np.argsort(solution_ids[cooking_rows], kind="stable")]
+                    boundaries = np.flatnonzero(np.diff(solution_ids[cooking_rows])) + 1
+                    cooking_groups = np.split(cooking_rows, boundaries)
+                for rows in cooking_groups:
+                    nec_watts[rows] = _cooking_nec_watts(count[rows], nameplate[rows], nec_watts[rows])
+
+        # Circuit Pausing: force the NEC calculated load to 0.
+        if paused is not None:
+            nec_watts = np.where(paused, 0.0, nec_watts)
+
+        # Circuit Sharing: only the largest NEC calculated load of each sharing group of a solution counts; the first
+        # row with the largest load wins (like idxmax within a single solution), rows without a load come last
+        if sharing_rows is not None:
+            shared_watts = nec_watts[sharing_rows]
+            order = np.lexsort((np.arange(len(sharing_rows)), np.isnan(shared_watts), -shared_watts, sharing_groups))
+            first = np.concatenate(([True], sharing_groups[order][1:] != sharing_groups[order][:-1]))
+            nec_watts[sharing_rows[order[~first]]] = 0.0
+
+        nec_watts_by_edition[code_edition] = nec_watts
+
+    return nec_watts_by_edition
+
+def _solution_nec_watts(df: pd.DataFrame, solution_ids: np.ndarray, code_edition: str = "2023") -> np.ndarray:
+    """
+    Calculates the NEC load in W of each appliance row of df (after NEC appliance rules and load controls), for
+    all solutions at once; solution_ids numbers the solution of each row (0..n-1). See
+    _solution_nec_watts_by_edition.
+    """
+    return _solution_nec_watts_by_edition(df, solution_ids, (code_edition,))[code_edition]
+
+def _sum_solution_loads_by_edition(
+    df: pd.DataFrame, solution_ids: np.ndarray, n_solutions: int, code_editions: Sequence[str] = ("2023",)
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Added and removed NEC loads in W of each solution, for each NEC edition (see _solution_nec_watts_by_edition)."""
+    status = df["load_status"]
+    new = (status == "new").to_numpy()
+    removed_rows = (status == "removed").to_numpy()
+
+    loads = {}
+    for code_edition, nec_watts in _solution_nec_watts_by_edition(df, solution_ids, code_editions).items():
+        nec_watts = np.nan_to_num(nec_watts)
+        # Since we already applied the NEC appliance rules, we can simply sum the results now.
+        added = np.bincount(solution_ids, weights=np.where(new, nec_watts, 0.0), minlength=n_solutions)
+        if code_edition == "2026":
+            # In 2026, we credit the calculated load of the removed item
+            removed = np.bincount(solution_ids, weights=np.where(removed_rows, nec_watts, 0.0), minlength=n_solutions)
+        else:
+            removed = np.zeros(n_solutions)
+        loads[code_edition] = (added, removed)
+    return loads
+
+def _sum_solution_loads(df: pd.DataFrame, solution_ids: np.ndarray, n_solutions: int,
+                        code_edition: str = "2023") -> Tuple[np.ndarray, np.ndarray]:
+    """Added and removed NEC loads in W of each solution (see _solution_nec_watts)."""
+    return _sum_solution_loads_by_edition(df, solution_ids, n_solutions, (code_edition,))[code_edition]
+
 def _calculate_solution_loads(
     solution_df: pd.DataFrame, code_edition: str = "2023"
 ) -> pd.Series:
@@ -206,106 +372,312 @@ def _calculate_solution_loads(
     Calculates added/removed loads by handling interlocks and NEC appliance rules,
     for a single "solution".
     """
-    df = solution_df.copy()
-
-    # Ensure generic_device column is lower case for matching
-    if "generic_device" not in df.columns:
-        df["type_lower"] = ""
-    else:
-        df["type_lower"] = df["generic_device"].str.lower().fillna("")
-
-    df["load_count"] = df["load_count"].fillna(1)
+    added, removed = _sum_solution_loads(solution_df, np.zeros(len(solution_df), dtype=np.intp), 1,
+                                         code_edition=code_edition)
+    return pd.Series({"added_load_watts": added[0], "removed_load_watts": removed[0]})
 
-    # Initialize 'nec_watts' with raw nameplate calculation
-    df["nec_watts"] = df["load_nameplate_power"] * df["load_count"]
+def _calculate_loads_by_edition(solutions_df: pd.DataFrame,
+                                code_editions: Sequence[str] = ("2023",)) -> Dict[str, pd.DataFrame]:
+    """
+    Calculates the added/removed loads of all solutions in solutions_df at once, for each NEC edition in
+    code_editions, grouping the solutions only once. Returns a DataFrame per edition as _calculate_loads_for_solutions.
+    """
+    solutions_df = solutions_df.dropna(subset=SOLUTION_KEY_COLUMNS)
+    grouped = solutions_df.groupby(SOLUTION_KEY_COLUMNS, sort=True, observed=True)
+    solution_ids = grouped.ngroup().to_numpy()
+    keys = grouped.size().index.to_frame(index=False)
 
-    # Apply appliance-specific rules first.
-    # We calculate the "effective" NEC load for every item before load interlocks.
-    if code_edition == "2023":
-        demand_factor_column = "demand_factor_nec_22087_2023"
-    else:
-        demand_factor_column = "demand_factor_nec_12087_2026"
+    loads = _sum_solution_loads_by_edition(solutions_df, solution_ids, len(keys), code_editions)
+    return {
+        code_edition: keys.assign(added_load_watts=added, removed_load_watts=removed)
+        for code_edition, (added, removed) in loads.items()
+    }
 
-    if demand_factor_column in df.columns:
-        _apply_nec_demand_factors(df, demand_factor_column)
-    else:
-        _apply_nec_appliance_rules(df, code_edition=code_edition)
+def _calculate_loads_for_solutions(solutions_df: pd.DataFrame, code_edition: str = "2023") -> pd.DataFrame:
+    """
+    Calculates the added/removed loads of all solutions in solutions_df at once (equivalent to
+    _calculate_solution_loads per solution). Returns a DataFrame with the solution key columns (sorted) and
+    "added_load_watts", "removed_load_watts".
+    """
+    return _calculate_loads_by_edition(solutions_df, (code_edition,))[code_edition]
+
+# A "solution" is defined as a unique combo of site_id, equipment_combo_id and load_control_combo_id
+SOLUTION_KEY_COLUMNS = ["site_id", "equipment_combo_id", "load_control_combo_id"]
+
+# Columns added by the compliance check to the added/removed loads of each solution
+COMPLIANCE_COLUMNS = [
+    "code_edition",
+    "historical_peak_kw",
+    "removed_load_credit_kw",
+    "added_load_kw",
+    "total_demand_amps",
+    "status",
+    "headroom_amps",
+    "min_panel_size_A",
+]
+
+# Columns of the results that depend on the NEC edition; evaluating several editions at once (see
+# calculate_nec_compliance_for_solutions), they are suffixed with the edition, e.g. "status_2026"
+EDITION_COLUMNS = [
+    "added_load_watts",
+    "removed_load_watts",
+    "removed_load_credit_kw",
+    "added_load_kw",
+    "total_demand_amps",
+    "status",
+    "headroom_amps",
+    "min_panel_size_A",
+]
+
+# Columns added to the results with detect_gaps=True: summary of the data gaps in the site's meter data
+GAP_SUMMARY_COLUMNS = [
+    "gap_count",
+    "missing_intervals",
+    "longest_gap_hours",
+]
+
+# Columns added to the results with screen=True: bounds on the site's peak load, and whether the solution was decided
+# by them (without the exact peak)
+SCREENING_COLUMNS = [
+    "peak_lower_bound_kw",
+    "peak_upper_bound_kw",
+    "screened",
+]
+
+# Compact dtypes of the columns of a solutions table (see compact_solutions): repeated strings as categoricals,
+# ids and nameplate values as narrow numbers (where exact). Demand factors stay float64, as they scale the calculated
+# loads.
+SOLUTIONS_SCHEMA = {
+    "site_id": "category",
+    "equipment_combo_id": "integer",
+    "load_control_combo_id": "integer",
+    "equipment_id": "category",
+    "appliance_id": "category",
+    "load_status": "category",
+    "generic_device": "category",
+    "specific_device": "category",
+    "load_nameplate_power": "float32",
+    "load_count": "float32",
+    "load_control_type": "category",
+    "load_control_group": "category",
+    "fuel_type": "category",
+    "demand_factor_nec_22087_2023": "float64",
+    "demand_factor_nec_12087_2026": "float64",
+}
+
+def compact_solutions(solutions_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the columns of a solutions table (see calculate_nec_compliance_for_solutions) to the compact dtypes
+    of SOLUTIONS_SCHEMA: string columns to categoricals (evaluated on their category codes), id columns to the
+    narrowest integer type that holds them (unless they have missing values or are not numeric), nameplate power
+    and load count to float32 if all their values are exactly representable (e.g. whole numbers up to 16 million),
+    float64 otherwise. Other columns are kept as they are. Results of the evaluation are the same as for the
+    original table.
+    """
+    columns = {}
+    for column, dtype in SOLUTIONS_SCHEMA.items():
+        if column not in solutions_df.columns:
+            continue
+        values = solutions_df[column]
+        if dtype == "category":
+            columns[column] = values.astype("category")
+        elif dtype == "integer":
+            if pd.api.types.is_numeric_dtype(values) and values.notna().all() and (values % 1 == 0).all():
+                columns[column] = pd.to_numeric(values, downcast="integer")
+        else:
+            values = values.astype("float64")
+            narrow = values.astype(dtype)
+            # Fractional values (e.g. 1234.567 W) would change in float32
+            columns[column] = narrow if ((narrow.astype("float64") == values) | values.isna()).all() else values
+    return solutions_df.assign(**columns)
 
-    # Apply load control (pausing/sharing).
-    # Circuit Pausing: force the NEC calculated load to 0.
-    if "load_control_type" in df.columns:
-        df.loc[df["load_control_type"] == "circuit_pausing", "nec_watts"] = 0
-
-    # Circuit Sharing: compare NEC calculated loads.
-    if "load_control_type" in df.columns and "load_control_group" in df.columns:
-        sharing_mask = df["load_control_type"] == "circuit_sharing"
-        if sharing_mask.any():
-            groups = df.loc[sharing_mask, "load_control_group"].dropna().unique()
-            for group in groups:
-                mask = (df["load_control_type"] == "circuit_sharing") & (
-                    df["load_control_group"] == group
-                )
-                if mask.sum() > 1:
-                    # Find the index of the largest NEC Calculated load
-                    max_idx = df.loc[mask, "nec_watts"].idxmax()
-                    # Set the losers to 0
-                    df.loc[mask & (df.index != max_idx), "nec_watts"] = 0
-
-    # Since we already applied the NEC appliance rules, we can simply sum the results now.
-
-    val_added = df.loc[df["load_status"] == "new", "nec_watts"].sum()
+def read_solutions_csv(path, **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Reads a solutions CSV file directly into the compact dtypes of SOLUTIONS_SCHEMA (string columns are parsed
+    into categoricals without creating a string object per row). site_id is read as string.
+    """
+    dtype = {column: "category" for column, dtype in SOLUTIONS_SCHEMA.items() if dtype == "category"}
+    return compact_solutions(pd.read_csv(path, dtype=dtype, **read_csv_kwargs))
+
+def _prepare_site_intervals(meter_df: pd.DataFrame, site_spec: Dict[str, Any], channel: str = None) -> pd.DataFrame:
+    """Prepares the raw meter data of a site (with the 'DateTime' and 'kWh' columns of the given channel)."""
+    tz = site_spec.get("timezone")
+    with profile_stage("prepare"):
+        if channel is None:
+            return _prepare_ua_intervals(meter_df, tz=tz)[0]
+        return _select_channel(_prepare_channel_intervals(meter_df, tz=tz)[0], channel)
+
+def _site_peak_load(meter_df: pd.DataFrame, site_spec: Dict[str, Any], hourly_safety_factor: float = 1.3,
+                    channel: str = None) -> float:
+    """
+    Observed peak hourly load in kW of a site from its raw meter data or its hourly rollup (see build_hourly_rollup),
+    or None if there is no meter data.
+    """
+    if meter_df is None:
+        return None
+    if _is_hourly_rollup(meter_df):
+        with profile_stage("peak"):
+            return get_peak_hourly_load(meter_df, hourly_safety_factor=hourly_safety_factor)
+    temp_df = _prepare_site_intervals(meter_df, site_spec, channel)
+    with profile_stage("peak"):
+        return get_peak_hourly_load(temp_df, hourly_safety_factor=hourly_safety_factor)
+
+def _gap_summary(gap_report: pd.DataFrame) -> Dict[str, Any]:
+    """Summarizes a gap report of detect_data_gaps (see GAP_SUMMARY_COLUMNS)."""
+    if gap_report.empty:
+        return {"gap_count": 0, "missing_intervals": 0, "longest_gap_hours": 0.0}
+    return {
+        "gap_count": len(gap_report),
+        "missing_intervals": int(gap_report["missing_intervals"].sum()),
+        "longest_gap_hours": gap_report["duration"].max() / pd.Timedelta(hours=1),
+    }
 
-    if code_edition == "2026":
-        # In 2026, we credit the calculated load of the removed item
-        val_removed = df.loc[df["load_status"] == "removed", "nec_watts"].sum()
+def _screen_solutions(
+    solution_loads: pd.DataFrame,
+    site_spec: Dict[str, float],
+    peak_bounds: Tuple[float, float],
+    code_edition: str = "2023",
+) -> np.ndarray:
+    """
+    Status ("PASS"/"FAIL") of all solutions of a single site from lower and upper bounds on its peak load, if every
+    solution passes at the upper bound or fails at the lower bound (the total demand increases with the peak load,
+    so the exact peak would give the same status), or else None.
+    """
+    lower, upper = peak_bounds
+    if np.isnan(lower) or np.isnan(upper):
+        return None
+
+    panel_amps = site_spec["panel_size_A"]
+    volts = site_spec.get("panel_voltage_V", 240)
+    added_kw = solution_loads["added_load_watts"].to_numpy(dtype=float) / 1000.0
+    removed_kw = solution_loads["removed_load_watts"].to_numpy(dtype=float) / 1000.0
+
+    passes = is_compliant(total_demand_amps(upper, added_kw, removed_kw, volts, code_edition=code_edition), panel_amps)
+    fails = ~is_compliant(total_demand_amps(lower, added_kw, removed_kw, volts, code_edition=code_edition), panel_amps)
+    if not np.all(passes | fails):
+        return None
+    return np.where(passes, "PASS", "FAIL")
+
+def _calculate_nec_compliance_for_site(
+    solution_loads: pd.DataFrame,
+    site_spec: Dict[str, float],
+    peak_kw: float,
+    code_edition: str = "2023",
+    screened_status: np.ndarray = None,
+) -> pd.DataFrame:
+    """
+    Checks NEC compliance of all solutions of a single site (rows of solution_loads) at once, given the site's
+    observed peak load. If peak_kw is None (no meter data for the site), the status of all solutions is "Error",
+    unless it was decided by screening (screened_status, see _screen_solutions); the columns depending on the exact
+    peak load are NaN then.
+    """
+    result = solution_loads.reindex(columns=list(solution_loads.columns) + COMPLIANCE_COLUMNS)
+    if peak_kw is None and screened_status is None:
+        result["status"] = "Error"
+        return result
+
+    panel_amps = site_spec["panel_size_A"]
+    volts = site_spec.get("panel_voltage_V", 240)
+
+    added_kw = solution_loads["added_load_watts"].to_numpy(dtype=float) / 1000.0
+    removed_kw = solution_loads["removed_load_watts"].to_numpy(dtype=float) / 1000.0
+
+    if peak_kw is None:
+        result["code_edition"] = code_edition
+        result["removed_load_credit_kw"] = removed_kw
+        result["added_load_kw"] = added_kw
+        result["status"] = screened_status
+        return result
+
+    # 2023 Logic: Peak * 1.25 + New_Calculated
+    # 2026 Draft Logic: (Peak - Removed_Calculated) * 1.25 + New_Calculated
+    total_amps = total_demand_amps(peak_kw, added_kw, removed_kw, volts, code_edition=code_edition)
+
+    result["code_edition"] = code_edition
+    result["historical_peak_kw"] = peak_kw
+    result["removed_load_credit_kw"] = removed_kw
+    result["added_load_kw"] = added_kw
+    result["total_demand_amps"] = total_amps
+    result["status"] = np.where(is_compliant(total_amps, panel_amps), "PASS", "FAIL")
+    result["headroom_amps"] = panel_amps - total_amps
+    result["min_panel_size_A"] = min_standard_panel_size(total_amps)
+    return result
+
+def _code_editions(code_edition) -> list:
+    """The NEC editions to evaluate, given a single edition or a sequence of editions (see EDITION_COLUMNS)."""
+    code_editions = [code_edition] if isinstance(code_edition, str) else list(dict.fromkeys(code_edition))
+    if not code_editions:
+        raise ValueError("At least one NEC edition is required")
+    for edition in code_editions:
+        if edition != "2023" and edition != "2026":
+            raise ValueError(f"Unsupported NEC edition '{edition}'")
+    return code_editions
+
+def _result_columns(code_edition, detect_gaps: bool = False, screen: bool = False) -> list:
+    """Columns of the results of calculate_nec_compliance_for_solutions for the given edition(s) and options."""
+    if isinstance(code_edition, str):
+        columns = SOLUTION_KEY_COLUMNS + ["added_load_watts", "removed_load_watts"] + COMPLIANCE_COLUMNS
     else:
-        val_removed = 0.0
+        columns = SOLUTION_KEY_COLUMNS + ["historical_peak_kw"] + [
+            f"{column}_{edition}" for edition in _code_editions(code_edition) for column in EDITION_COLUMNS
+        ]
+    return columns + (GAP_SUMMARY_COLUMNS if detect_gaps else []) + (SCREENING_COLUMNS if screen else [])
 
-    return pd.Series({"added_load_watts": val_added, "removed_load_watts": val_removed})
+def _wide_edition_results(results_by_edition: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combines the results of _calculate_nec_compliance_for_site for several NEC editions (with the same solutions in
+    the same order) into one row per solution, with the EDITION_COLUMNS of each edition suffixed with the edition.
+    """
+    first = next(iter(results_by_edition.values()))
+    blocks = [first[SOLUTION_KEY_COLUMNS + ["historical_peak_kw"]]]
+    for edition, result in results_by_edition.items():
+        blocks.append(result[EDITION_COLUMNS].rename(columns=lambda column: f"{column}_{edition}"))
+    return pd.concat(blocks, axis=1)
 
-def _calculate_nec_compliance_for_solution(
-    load_result,
-    site_specs: Dict[Any, Dict[str, float]],
-    site_peaks: Dict[Any, float],
-    code_edition: str = "2023",
-):
-    site_id = load_result["site_id"]
-    if site_id not in site_peaks:
-        return pd.Series({"status": "Error"})
+def _localize_intervals(timestamps: pd.Series, zones: pd.Series = None, tz: str = None) -> pd.Series:
+    """
+    Localizes parsed interval timestamps once, using the per-row timezone names in zones (e.g. UtilityAPI's
+    'interval_timezone' column) if available, or else the site's timezone tz. Rows of different timezones are
+    localized per distinct zone and converted to the file's (most frequent) timezone, so the result is stored as
+    UTC epochs and later stages never need to localize again. Timezone-naive timestamps are returned as is if
+    neither zones nor tz are given.
+    """
+    if timestamps.dt.tz is not None:
+        return timestamps
 
-    peak_kw = site_peaks[site_id]
-    specs = site_specs[site_id]
-    panel_amps = specs["panel_size_A"]
-    volts = specs.get("panel_voltage_V", 240)
+    if zones is not None and zones.notna().any():
+        file_tz = zones.mode().iloc[0]
+        zones = zones.fillna(tz if tz is not None else file_tz).to_numpy()
+        return _localize_by_zone(timestamps, zones).dt.tz_convert(file_tz)
 
-    added_kw = load_result["added_load_watts"] / 1000.0
-    removed_kw = load_result["removed_load_watts"] / 1000.0
+    if tz is not None:
+        return timestamps.dt.tz_localize(tz, ambiguous=False, nonexistent="shift_forward")
 
-    if code_edition == "2026":
-        # 2026 Draft Logic: (Peak - Removed_Calculated) * 1.25 + New_Calculated
-        adjusted_peak = max(0, peak_kw - removed_kw)
-        existing_demand = adjusted_peak * 1.25
-    else:
-        # 2023 Logic: Peak * 1.25 + New_Calculated
-        existing_demand = peak_kw * 1.25
-
-    total_demand_kw = existing_demand + added_kw
-    total_amps = (total_demand_kw * 1000) / volts
-
-    return pd.Series(
-        {
-            "code_edition": code_edition,
-            "historical_peak_kw": peak_kw,
-            "removed_load_credit_kw": removed_kw,
-            "added_load_kw": added_kw,
-            "total_demand_amps": total_amps,
-            "status": "PASS" if total_amps <= panel_amps else "FAIL",
-        }
-    )
+    return timestamps
 
-def _prepare_ua_intervals(ua_intervals_raw: pd.DataFrame) -> pd.DataFrame:
+def _record_meter_file(prepare):
+    """Counts the files and rows prepared by a _prepare_*_intervals function, and its failures, per file format."""
+    @wraps(prepare)
+    def wrapper(ua_intervals_raw: pd.DataFrame, *args, **kwargs):
+        try:
+            result = prepare(ua_intervals_raw, *args, **kwargs)
+        except Exception:
+            columns = ua_intervals_raw.columns
+            file_format = ('UtilityAPI' if 'interval_start' in columns else
+                           'Simple CSV' if 'DateTime' in columns else 'unrecognized')
+            ERRORS.inc(format=file_format)
+            raise
+        FILES_PROCESSED.inc(format=result[1])
+        ROWS_PARSED.inc(len(ua_intervals_raw), format=result[1])
+        return result
+    return wrapper
+
+@_record_meter_file
+def _prepare_ua_intervals(ua_intervals_raw: pd.DataFrame, tz: str = None) -> pd.DataFrame:
     """
     Handles different input file formats, prepares meter data for processing by get_peak_hourly_load.
+    Timestamps are localized with the file's 'interval_timezone' column or the given site timezone tz,
+    if any (see _localize_intervals).
     """
     df = ua_intervals_raw.copy()
 
@@ -318,17 +690,232 @@ def _prepare_ua_intervals(ua_intervals_raw: pd.DataFrame) -> pd.DataFrame:
     else:
         raise ValueError("CSV format not recognized. Required columns are either ('DateTime', 'kWh') or ('interval_start', 'interval_kWh').")
 
+    zones = df['interval_timezone'] if 'interval_timezone' in df.columns else None
+
     # Keep only the essential columns to prevent errors in aggregation functions
     df = df[['DateTime', 'kWh']]
 
     # Ensure correct data types, using format='mixed' to handle multiple date formats efficiently
-    df['DateTime'] = pd.to_datetime(df['DateTime'], format='mixed')
+    df['DateTime'] = _localize_intervals(pd.to_datetime(df['DateTime'], format='mixed'), zones, tz)
     df['kWh'] = pd.to_numeric(df['kWh'])
     df.dropna(inplace=True)
     df.sort_values('DateTime', inplace=True)
 
     return (df, file_format)
 
+@_record_meter_file
+def _prepare_channel_intervals(ua_intervals_raw: pd.DataFrame, tz: str = None) -> Tuple[pd.DataFrame, str]:
+    """
+    Like _prepare_ua_intervals, but keeps all meter channels. Returns a DataFrame with columns 'DateTime',
+    'kWh_import', 'kWh_export' and 'kWh_net' along with the detected file format.
+
+    Channels missing from the input (or whose source column is empty) are derived from the others:
+    net = import - export; if only a single (net) reading is available, import and export are its positive and
+    negative parts. Readings missing from some channels only are kept as NaN (see _select_channel).
+    """
+    df = ua_intervals_raw.copy()
+
+    if 'interval_start' in df.columns:
+        file_format = 'UtilityAPI'
+        df.rename(columns={'interval_start': 'DateTime'}, inplace=True)
+    elif 'DateTime' in df.columns:
+        file_format = 'Simple CSV'
+    else:
+        raise ValueError("CSV format not recognized. Required columns are either ('DateTime', 'kWh') or ('interval_start', 'interval_kWh').")
+
+    zones = df['interval_timezone'] if 'interval_timezone' in df.columns else None
+    result = pd.DataFrame({'DateTime': _localize_intervals(pd.to_datetime(df['DateTime'], format='mixed'), zones, tz)})
+    for channel, columns in CHANNEL_COLUMNS.items():
+        # UtilityAPI files have all channel columns, but some may be empty (e.g. fwd_kWh and rev_kWh of a net meter)
+        found = [pd.to_numeric(df[c]) for c in columns if c in df.columns]
+        found = [values for values in found if values.notna().any()]
+        if found:
+            result[f'kWh_{channel}'] = found[0]
+
+    if 'kWh_import' not in result.columns and 'kWh_net' not in result.columns:
+        kwh_col = 'interval_kWh' if 'interval_kWh' in df.columns else 'kWh'
+        if kwh_col not in df.columns:
+            raise ValueError("CSV format not recognized. No kWh, import/export or net meter channel found.")
+        result['kWh_net'] = pd.to_numeric(df[kwh_col])
+
+    if 'kWh_net' not in result.columns:
+        result['kWh_net'] = result['kWh_import'] - (result['kWh_export'] if 'kWh_export' in result.columns else 0.0)
+    if 'kWh_import' not in result.columns:
+        if 'kWh_export' in result.columns:
+            result['kWh_import'] = result['kWh_net'] + result['kWh_export']
+        else:
+            result['kWh_import'] = result['kWh_net'].clip(lower=0)
+    if 'kWh_export' not in result.columns:
+        result['kWh_export'] = result['kWh_import'] - result['kWh_net']
+
+    channel_columns = [f'kWh_{channel}' for channel in CHANNELS]
+    result = result[['DateTime'] + channel_columns]
+    result = result.dropna(subset=['DateTime']).dropna(subset=channel_columns, how='all').sort_values('DateTime')
+
+    return (result, file_format)
+
+def _select_channel(df_channels: pd.DataFrame, channel: str) -> pd.DataFrame:
+    """
+    Selects a single channel from the result of _prepare_channel_intervals as a ('DateTime', 'kWh') DataFrame,
+    without the intervals that have no reading for it.
+    """
+    if channel not in CHANNELS:
+        raise ValueError(f"Unsupported meter channel '{channel}'. Use one of {', '.join(CHANNELS)}.")
+    return df_channels[['DateTime', f'kWh_{channel}']].rename(columns={f'kWh_{channel}': 'kWh'}).dropna()
+
+def _ffill_within_groups(values: np.ndarray, group_start: np.ndarray) -> np.ndarray:
+    """
+    Forward fills NaN values without crossing the group boundaries marked by group_start.
+    """
+    fill_from = np.where(~np.isnan(values) | group_start, np.arange(len(values)), 0)
+    return values[np.maximum.accumulate(fill_from)] if len(values) > 0 else values
+
+def _segment_cadence(delta_sec: np.ndarray, group: np.ndarray = None) -> np.ndarray:
+    """
+    Labels contiguous regimes of constant cadence in a series of time differences (in seconds, NaN for the
+    first reading) and returns the expected interval at each position.
+
+    A regime is a run of at least two identical consecutive differences matching a standard interval length.
+    Positions outside of a regime (gaps, duplicates, irregular readings) get the cadence of the preceding
+    regime, or of the following one at the start of the data. Without any regime, the most frequent positive
+    difference (the smallest one in case of a tie) is used.
+
+    If group is given (integer codes, e.g. one per site, with each group contiguous and its first difference
+    NaN), regimes and fallbacks never cross group boundaries.
+    """
+    n = len(delta_sec)
+    if group is None:
+        group = np.zeros(n, dtype=np.int64)
+
+    regular = np.isin(delta_sec, STANDARD_INTERVALS_SEC)
+
+    # Run-length encoding of regular differences: a new run starts wherever the difference changes
+    prev_delta = np.concatenate(([np.nan], delta_sec[:-1]))
+    prev_regular = np.concatenate(([False], regular[:-1]))
+    run_start = regular & ~(prev_regular & (delta_sec == prev_delta))
+    run_id = np.cumsum(run_start)
+    run_length = np.bincount(run_id[regular], minlength=run_id[-1] + 1 if n > 0 else 1)
+    in_regime = regular & (run_length[run_id] >= 2)
+
+    # Forward fill, then backward fill the regime cadences within each group
+    group_start = np.concatenate(([True], group[1:] != group[:-1])) if n > 0 else np.zeros(0, dtype=bool)
+    group_end = np.concatenate((group_start[1:], [True])) if n > 0 else group_start
+    expected = _ffill_within_groups(np.where(in_regime, delta_sec, np.nan), group_start)
+    expected = _ffill_within_groups(expected[::-1], group_end[::-1])[::-1]
+
+    expected = pd.Series(expected)
+    missing = expected.isna().to_numpy()
+    if missing.any():
+        # Most frequent positive difference per group (smallest in case of a tie), default to hourly
+        positive = delta_sec > 0
+        counts = pd.DataFrame({'group': group[positive], 'delta': delta_sec[positive]}).value_counts()
+        counts = counts.reset_index(name='count').sort_values(['group', 'count', 'delta'], ascending=[True, False, True])
+        freq_val = counts.drop_duplicates('group').set_index('group')['delta']
+        expected[missing] = pd.Series(group[missing]).map(freq_val).fillna(3600).to_numpy()
+
+    return expected.to_numpy()
+
+def _find_gaps(utc_ns: np.ndarray, tz, group: np.ndarray = None) -> Dict[str, np.ndarray]:
+    """
+    Finds data gaps in sorted UTC epochs (ns). If group is given, timestamps must be sorted by group first and
+    gaps are detected within each group only. tz is either a timezone name or an array with the timezone name
+    of each timestamp, used to tell DST transitions from gaps.
+
+    Returns a dict of arrays with one entry per gap: "idx" (position of the first reading after the gap),
+    "gap_start", "gap_end" and "duration" (ns) and "missing_intervals".
+    """
+    # Calculate time differences
+    delta_sec = np.full(len(utc_ns), np.nan)
+    delta_sec[1:] = np.diff(utc_ns) / 1e9
+    if group is not None and len(group) > 0:
+        delta_sec[np.concatenate(([True], group[1:] != group[:-1]))] = np.nan
+
+    # Local expected frequency, from the regime of constant cadence each reading belongs to
+    expected = _segment_cadence(delta_sec, group=group)
+
+    # Gap detection
+    gap_mask = delta_sec > (1.5 * expected)
+
+    # DST transition detection, e.g. be lenient if there's a 1 hour gap at DST end in November.
+    # The UTC offset of each (sorted) reading in local time changes at DST transitions.
+    utc_offset = _utc_offsets(utc_ns, tz)
+    is_dst_change = np.concatenate(([False], utc_offset[1:] != utc_offset[:-1]))
+
+    gap_idx = np.flatnonzero(gap_mask & ~is_dst_change)
+    freq_ns = (expected[gap_idx] * 1e9).astype(np.int64)
+    gap_end = utc_ns[gap_idx]
+    gap_start = utc_ns[gap_idx - 1] + freq_ns
+    duration = gap_end - gap_start
+
+    return {
+        "idx": gap_idx,
+        "gap_start": gap_start,
+        "gap_end": gap_end,
+        "duration": duration,
+        "missing_intervals": np.maximum(np.round(duration / freq_ns), 0).astype(int),
+    }
+
+def _localize_timestamps(timestamps: pd.Series, tz: str) -> Tuple[pd.Series, str]:
+    """
+    Parses and localizes a timestamp column (if timezone-naive) and returns it along with its timezone name.
+    """
+    timestamps = pd.to_datetime(timestamps)
+    if timestamps.dt.tz is None:
+        timestamps = timestamps.dt.tz_localize(
+            tz,
+            ambiguous=False,
+            nonexistent="shift_forward"
+        )
+    else:
+        tz = str(timestamps.dt.tz)
+
+    return timestamps, tz
+
+def _localize_by_zone(timestamps: pd.Series, zones: np.ndarray) -> pd.Series:
+    """
+    Localizes timezone-naive timestamps with a (possibly different) timezone name per row and returns them as
+    UTC timestamps. Each distinct timezone is localized once, vectorized over all of its rows.
+    """
+    zone_codes, zone_names = pd.factorize(zones)
+    utc_ns = np.empty(len(timestamps), dtype=np.int64)
+    naive = pd.DatetimeIndex(timestamps)
+
+    for code, zone in enumerate(zone_names):
+        mask = zone_codes == code
+        localized = naive[mask].tz_localize(zone, ambiguous=False, nonexistent="shift_forward")
+        utc_ns[mask] = localized.tz_convert("UTC").as_unit("ns").asi8
+
+    return pd.Series(pd.DatetimeIndex(utc_ns).tz_localize("UTC"), index=timestamps.index)
+
+def _utc_offsets(utc_ns: np.ndarray, tz) -> np.ndarray:
+    """
+    Returns the UTC offset (ns) of each UTC epoch in local time, for a timezone name or an array of
+    timezone names (one per epoch). Each distinct timezone is converted once.
+    """
+    if isinstance(tz, str):
+        utc = pd.DatetimeIndex(utc_ns).tz_localize("UTC")
+        return utc.tz_convert(tz).tz_localize(None).asi8 - utc.tz_localize(None).asi8
+
+    offsets = np.empty(len(utc_ns), dtype=np.int64)
+    zone_codes, zone_names = pd.factorize(tz)
+    for code, zone in enumerate(zone_names):
+        mask = zone_codes == code
+        offsets[mask] = _utc_offsets(utc_ns[mask], zone)
+
+    return offsets
+
+def _gap_report_frame(gaps: Dict[str, np.ndarray], tz: str, unit: str) -> pd.DataFrame:
+    """
+    Converts gap arrays returned by _find_gaps to a gap report in the local timezone (and the resolution of the input).
+    """
+    return pd.DataFrame({
+        "gap_start": pd.DatetimeIndex(gaps["gap_start"]).tz_localize("UTC").tz_convert(tz).as_unit(unit),
+        "gap_end": pd.DatetimeIndex(gaps["gap_end"]).tz_localize("UTC").tz_convert(tz).as_unit(unit),
+        "duration": pd.to_timedelta(gaps["duration"], unit="ns").as_unit(unit),
+        "missing_intervals": gaps["missing_intervals"]
+    })
+
+@timed()
 def detect_data_gaps(
     df: pd.DataFrame,
     time_col="DateTime",
@@ -351,97 +938,259 @@ def detect_data_gaps(
             - "duration" (duration of the gap expressed as a pd.Timedelta)
             - "missing_intervals" (duration of the gap expressed as a number of missing data points)
     """
-    df = df.copy()
-
     # Parse datetime & localize timestamp
-    df[time_col] = pd.to_datetime(df[time_col])
-    if df[time_col].dt.tz is None:
-        df[time_col] = df[time_col].dt.tz_localize(
-            tz,
-            ambiguous=False,
-            nonexistent="shift_forward"
-        )
-    else:
-        tz = str(df[time_col].dt.tz)
+    timestamps, tz = _localize_timestamps(df[time_col], tz)
 
-    # Convert to UTC for strictly linear physical time calculation.
+    if len(timestamps) < 2:
+        return pd.DataFrame()
+
+    # Convert to UTC epochs (ns) for strictly linear physical time calculation.
     # This automatically handles DST: 01:00 PST and 03:00 PDT become 09:00 UTC and 10:00 UTC (1 hour delta).
-    df["_utc_time"] = df[time_col].dt.tz_convert("UTC")
-    df = df.sort_values("_utc_time").reset_index(drop=True)
+    utc_time = timestamps.dt.tz_convert("UTC").dt.as_unit("ns")
+    utc_ns = np.sort(pd.DatetimeIndex(utc_time).asi8)
 
-    # Calculate time differences
-    df["delta"] = df["_utc_time"].diff()
+    gaps = _find_gaps(utc_ns, tz)
 
-    if len(df) < 2:
+    if len(gaps["idx"]) == 0:
         return pd.DataFrame()
 
-    delta_sec = df["delta"].dt.total_seconds()
+    return _gap_report_frame(gaps, tz, timestamps.dt.unit)
 
-    # Local expected frequency
-    if len(df) < 10:
-        valid_deltas = delta_sec[delta_sec > 0]
-        if valid_deltas.empty:
-            freq_val = 3600  # Default to hourly if no valid deltas
-        else:
-            freq_val = valid_deltas.mode().min() # Use min in case of tie (e.g. mixture of 15min and 1h)
-        expected = pd.Series(freq_val, index=df.index)
+def detect_data_gaps_for_sites(
+    site_intervals,
+    time_col="DateTime",
+    site_col="site_id",
+    tz="America/Los_Angeles"
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Finds data gaps (see detect_data_gaps) for many sites at once. Timestamps of all sites are localized and
+    processed in a single vectorized pass keyed by site, instead of one pandas pipeline per site.
+
+    Args:
+        site_intervals: either a long-format pandas DataFrame with a site id column and a timestamp column,
+            or a dictionary mapping each site_id to a pandas DataFrame with a timestamp column
+        time_col: name of the timestamp column (default: "DateTime")
+        site_col: name of the site id column in long-format input and in the results (default: "site_id")
+        tz: timezone name for timezone-naive timestamps (see detect_data_gaps), or a dictionary mapping site_ids
+            to timezone names (sites not in the dictionary default to "America/Los_Angeles"). Timezone-aware
+            timestamps keep their own timezone.
+
+    Returns:
+        tuple: A tuple of two pandas DataFrames (gap_report, coverage)
+               gap_report contains the columns of detect_data_gaps preceded by site_col, one row per gap
+               coverage contains one row per site with columns site_col, "first_reading", "last_reading",
+                   "total_readings", "gap_count", "total_gap_duration", "missing_intervals" and "coverage_pct"
+                   (share of the covered time span not within a gap, in percent)
+               If sites are in different timezones, timestamps are reported in UTC and both DataFrames get an
+               additional "timezone" column.
+    """
+    site_tz = dict(tz) if isinstance(tz, dict) else {}
+    default_tz = "America/Los_Angeles" if isinstance(tz, dict) else tz
+
+    # Collect (naive) timestamps of all sites; timezone-aware input is converted to UTC and keeps its timezone
+    if isinstance(site_intervals, dict):
+        frames = []
+        for site_id, meter_df in site_intervals.items():
+            timestamps = pd.to_datetime(meter_df[time_col])
+            if timestamps.dt.tz is not None:
+                site_tz[site_id] = str(timestamps.dt.tz)
+                timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+                frames.append(pd.DataFrame({site_col: site_id, time_col: timestamps, "_aware": True}))
+            else:
+                frames.append(pd.DataFrame({site_col: site_id, time_col: timestamps, "_aware": False}))
+        long_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            {site_col: [], time_col: pd.to_datetime([]), "_aware": np.zeros(0, dtype=bool)})
     else:
-        # For larger datasets, rolling median adapts to changing frequencies
-        expected = (
-            delta_sec
-            .rolling(4, center=True, min_periods=4)
-            .median()
-            .bfill()
-            .ffill()
-        )
+        timestamps = pd.to_datetime(site_intervals[time_col])
+        aware = timestamps.dt.tz is not None
+        if aware:
+            default_tz, site_tz = str(timestamps.dt.tz), {}
+            timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+        long_df = pd.DataFrame({site_col: site_intervals[site_col].to_numpy(), time_col: timestamps.to_numpy(),
+                                "_aware": aware})
+
+    unit = long_df[time_col].dt.unit if len(long_df) > 0 else "ns"
+    site_codes, site_ids = pd.factorize(long_df[site_col], sort=True)
+    zones = np.array([site_tz.get(site_id, default_tz) for site_id in site_ids], dtype=object)
+    row_zones = zones[site_codes]
+
+    # Localize once per distinct timezone for all sites
+    utc_ns = pd.DatetimeIndex(_localize_by_zone(
+        long_df[time_col], np.where(long_df["_aware"].to_numpy(dtype=bool), "UTC", row_zones))).asi8
+    order = np.lexsort((utc_ns, site_codes))
+    utc_ns = utc_ns[order]
+    site_codes = site_codes[order]
+
+    single_zone = len(set(zones)) <= 1
+    report_tz = zones[0] if single_zone and len(zones) > 0 else "UTC"
+
+    gaps = _find_gaps(utc_ns, report_tz if single_zone else zones[site_codes], group=site_codes)
+
+    gap_report = _gap_report_frame(gaps, report_tz, unit)
+    gap_report.insert(0, site_col, site_ids[site_codes[gaps["idx"]]])
+
+    # Per-site coverage totals
+    n_sites = len(site_ids)
+    gap_sites = site_codes[gaps["idx"]]
+    first_pos = np.searchsorted(site_codes, np.arange(n_sites), side="left")
+    last_pos = np.searchsorted(site_codes, np.arange(n_sites), side="right") - 1
+    span_ns = (utc_ns[last_pos] - utc_ns[first_pos]) if n_sites > 0 else np.array([], dtype=np.int64)
+    gap_ns = np.bincount(gap_sites, weights=gaps["duration"], minlength=n_sites)
+
+    to_local = lambda ns: pd.DatetimeIndex(ns).tz_localize("UTC").tz_convert(report_tz).as_unit(unit)
+    coverage = pd.DataFrame({
+        site_col: site_ids,
+        "first_reading": to_local(utc_ns[first_pos]),
+        "last_reading": to_local(utc_ns[last_pos]),
+        "total_readings": last_pos - first_pos + 1,
+        "gap_count": np.bincount(gap_sites, minlength=n_sites),
+        "total_gap_duration": pd.to_timedelta(gap_ns.astype(np.int64), unit="ns").as_unit(unit),
+        "missing_intervals": np.bincount(gap_sites, weights=gaps["missing_intervals"], minlength=n_sites).astype(int),
+        "coverage_pct": np.where(span_ns > 0, 100 * (1 - gap_ns / np.where(span_ns > 0, span_ns, 1)), 100.0),
+    })
 
-    # Gap detection
-    gap_mask = delta_sec > (1.5 * expected)
+    if not single_zone:
+        gap_report["timezone"] = zones[gap_sites]
+        coverage["timezone"] = zones
 
-    # DST transition detection, e.g. be lenient if there's a 1 hour gap at DST end in November
-    df_local = df[time_col].dt.tz_convert(tz)
-    tz_obj = timezone(tz)
-    naive_dates = df_local.dt.tz_localize(None)
-    dst_values = []
-    for dt in naive_dates:
-        try:
-            dst = tz_obj.dst(dt.to_pydatetime(), is_dst=None)
-            dst_values.append(dst)
-        except AmbiguousTimeError:
-            # Handle ambiguous times by choosing the first occurrence
-            dst = tz_obj.dst(dt.to_pydatetime(), is_dst=False)
-            dst_values.append(dst)
+    return gap_report, coverage
 
-    is_dst_change = np.concatenate(([False], np.array(dst_values[1:]) != np.array(dst_values[:-1])))
+def _epoch_ns(timestamps: pd.Series) -> np.ndarray:
+    """Timestamps as int64 ns since epoch, in UTC for timezone-aware timestamps."""
+    timestamps = pd.DatetimeIndex(timestamps)
+    if timestamps.tz is not None:
+        # Whole-hour UTC offsets: hour boundaries in UTC match local hour boundaries, including DST hours
+        timestamps = timestamps.tz_convert("UTC").tz_localize(None)
+    return timestamps.as_unit("ns").asi8
 
-    gap_mask = gap_mask & ~is_dst_change
-    rows = []
+def _normalize_interval_grid(timestamps: pd.Series, kwh: np.ndarray) -> Dict[str, Any]:
+    """
+    Maps meter readings onto a canonical dense grid of shape (hours with data, 5-minute slots per hour) and
+    detects the native cadence of each hour, see hea_nec.core.interval_grid. kwh is either a 1-D array of
+    readings or a 2-D array with one column per channel (see CHANNELS), which share the same grid.
+
+    Returns the dict of core.interval_grid, with "hours" as a pd.DatetimeIndex of the hour starts (in the
+    timezone of the input, if any).
+    """
+    tz = pd.DatetimeIndex(timestamps).tz
+    grid = interval_grid(_epoch_ns(timestamps), kwh)
+
+    hours = pd.DatetimeIndex(grid["hours"])
+    if tz is not None:
+        hours = hours.tz_localize("UTC").tz_convert(tz)
+    grid["hours"] = hours
+
+    return grid
+
+def _reduce_hourly_maxima(grid: Dict[str, Any], values: np.ndarray, hourly_safety_factor: float = 1.3) -> pd.DataFrame:
+    """
+    Reduces one channel of a grid built by _normalize_interval_grid (values of shape hours x slots) per hour.
+    See _get_hourly_maxima for the resulting columns.
+    """
+    maxima = hourly_maxima(grid, values, hourly_safety_factor=hourly_safety_factor)
+
+    return pd.DataFrame({
+        'kWh_max': maxima['kWh_max'],
+        'kWh_nunique': maxima['kWh_nunique'],
+        'identical': maxima['kWh_nunique'] == 1,
+        'kWh_idxmax': maxima['kWh_idxmax'],
+        'DateTime_nunique': maxima['readings'],
+        'interval_minutes': maxima['interval_sec'] // 60,
+        'period': maxima['period'],
+        'kWh_max_adj': maxima['kWh_max_adj'],
+    }, index=pd.Index(maxima['hours'], name='hour_start'))
+
+def _get_hourly_maxima(df: pd.DataFrame, hourly_safety_factor: float = 1.3, kwh_col: str = 'kWh') -> pd.DataFrame:
+    """
+    Calculates the adjusted hourly maximum ('kWh_max_adj', in kW) for each hour with data, along with the row
+    position of the maximum reading ('kWh_idxmax') and the detected interval length ('interval_minutes').
 
-    for idx in df[gap_mask].index:
-        gap_end = df.loc[idx, "_utc_time"]
-        last_actual = df.loc[idx - 1, "_utc_time"]
-        freq = pd.to_timedelta(expected.loc[idx], unit="s")
-        gap_start = last_actual + freq
+    Readings are normalized with _normalize_interval_grid and reduced per hour (row of the grid); the maximum
+    reading is scaled to kW by the number of intervals per hour (column 'period'). For an hourly rollup (see
+    build_hourly_rollup), the stored reductions are used and 'kWh_idxmax' is the row position of the hour.
+    """
+    if _is_hourly_rollup(df):
+        return _rollup_hourly_maxima(df, hourly_safety_factor=hourly_safety_factor)
+    kwh = df[kwh_col].to_numpy(dtype=float)
+    grid = _normalize_interval_grid(df['DateTime'], kwh)
+    return _reduce_hourly_maxima(grid, grid['values'], hourly_safety_factor=hourly_safety_factor)
 
-        duration = gap_end - gap_start
+# Version of the hourly rollup layout (stored with persisted rollups, which are rebuilt when it changes)
+ROLLUP_VERSION = 1
 
-        missing = max(int(round(duration / freq)), 0)
+HOURLY_ROLLUP_COLUMNS = ['kWh_max', 'kWh_max_time', 'kWh_sum', 'readings', 'identical', 'interval_minutes']
 
-        rows.append({
-            "gap_start": gap_start,
-            "gap_end": gap_end,
-            "duration": duration,
-            "missing_intervals": missing
-        })
+def _is_hourly_rollup(df: pd.DataFrame) -> bool:
+    return 'kWh_max' in df.columns and 'DateTime' not in df.columns
 
-    gap_report = pd.DataFrame(rows)
+def build_hourly_rollup(df: pd.DataFrame, kwh_col: str = 'kWh') -> pd.DataFrame:
+    """Reduces prepared meter values to one row per hour with data, holding everything the peak, summary and
+    rolling-window calculations need. get_peak_hourly_load, get_top_peak_hours, get_rolling_peak_series,
+    iter_coincident_peaks and calculate_summary_details accept the rollup in place of the meter values, with the
+    same results, without touching the raw intervals again. See hea_nec.rollups for persisting rollups.
 
-    # Convert back to local timezone for reporting
-    if not gap_report.empty:
-        gap_report["gap_start"] = gap_report["gap_start"].dt.tz_convert(tz)
-        gap_report["gap_end"] = gap_report["gap_end"].dt.tz_convert(tz)
+    Args:
+        df: meter values as pandas DataFrame with columns "DateTime" (parsed) and kwh_col, as returned by
+            _prepare_ua_intervals
+        kwh_col: column of the readings (e.g. "kWh_net" for a single channel of _prepare_channel_intervals)
 
-    return gap_report
+    Returns:
+        a pandas DataFrame indexed by "hour_start" (in the timezone of the input, if any) with columns:
+            "kWh_max" (maximum reading on the canonical grid, see _normalize_interval_grid),
+            "kWh_max_time" (pd.Timestamp of the maximum reading),
+            "kWh_sum" (sum of the readings),
+            "readings" (number of readings),
+            "identical" (True if all readings of the hour on the grid are identical, e.g. "fake" 15-minute data),
+            "interval_minutes" (detected interval length),
+        and attrs "rollup_version", "first_reading", "last_reading" and "total_readings" (number of rows of df)
+    """
+    timestamps = pd.DatetimeIndex(df['DateTime'])
+    kwh = df[kwh_col].to_numpy(dtype=float)
+    grid = _normalize_interval_grid(timestamps, kwh)
+    maxima = hourly_maxima(grid, grid['values'])
+    hours = pd.DatetimeIndex(maxima['hours'])
+
+    # Count and sum of the raw readings per hour (hour starts compared in UTC, like the grid)
+    valid = ~np.isnan(kwh)
+    hour_ns = _epoch_ns(timestamps)[valid]
+    hour_ns -= hour_ns % HOUR_NS
+    hours_ns = _epoch_ns(hours)
+    hour_pos = np.searchsorted(hours_ns, hour_ns)
+    found = hour_pos < len(hours)
+    found[found] = hours_ns[hour_pos[found]] == hour_ns[found]
+
+    rollup = pd.DataFrame({
+        'kWh_max': maxima['kWh_max'],
+        'kWh_max_time': timestamps[maxima['kWh_idxmax']],
+        'kWh_sum': np.bincount(hour_pos[found], weights=kwh[valid][found], minlength=len(hours)),
+        'readings': np.bincount(hour_pos[found], minlength=len(hours)).astype(np.int32),
+        'identical': maxima['kWh_nunique'] == 1,
+        'interval_minutes': (maxima['interval_sec'] // 60).astype(np.int8),
+    }, index=pd.Index(hours, name='hour_start'))
+    rollup.attrs = {
+        'rollup_version': ROLLUP_VERSION,
+        'first_reading': timestamps[0] if len(timestamps) > 0 else None,
+        'last_reading': timestamps[-1] if len(timestamps) > 0 else None,
+        'total_readings': len(df),
+    }
+    return rollup
+
+def _rollup_hourly_maxima(rollup: pd.DataFrame, hourly_safety_factor: float = 1.3) -> pd.DataFrame:
+    """Hourly maxima (see _get_hourly_maxima) of an hourly rollup."""
+    kwh_max = rollup['kWh_max'].to_numpy(dtype=float)
+    identical = rollup['identical'].to_numpy(dtype=bool)
+    interval_minutes = rollup['interval_minutes'].to_numpy(dtype=np.int64)
+    period = 60 // interval_minutes
+
+    return pd.DataFrame({
+        'kWh_max': kwh_max,
+        'identical': identical,
+        'kWh_idxmax': np.arange(len(rollup)),
+        'DateTime_nunique': rollup['readings'].to_numpy(),
+        'interval_minutes': interval_minutes,
+        'period': period,
+        'kWh_max_adj': np.where(identical, kwh_max * period * hourly_safety_factor, kwh_max * period),
+    }, index=rollup.index)
 
 def get_peak_hourly_load(df: pd.DataFrame, hourly_safety_factor: float = 1.3, return_idx: bool = False) -> float:
     """Estimates the peak hourly load in kW from meter values.
@@ -450,37 +1199,24 @@ def get_peak_hourly_load(df: pd.DataFrame, hourly_safety_factor: float = 1.3, re
     https://github.com/HomeElectricationAlliance/NEC-220.87-Methods/blob/main/2022_HEA_220_87.ipynb
 
     Key aspects of the calculation:
-    - For 15-minute intervals: multiplies by 4 to get hourly equivalent
+    - For 5-, 15- and 30-minute intervals: multiplies by 12, 4 or 2 to get hourly equivalent
     - Applies optional safety factor (default: 1.3x) for single readings per NEC 220.87
-    - Automatically detects interval type based on data
+    - Automatically detects interval type of each hour based on data (see _normalize_interval_grid)
 
     Args:
         df: Input meter values as pandas DataFrame with columns:
             "DateTime" (measurement interval start, format "YYYY-MM-DD HH:MM:00")
             "kWh" (measured meter value in kilowatt-hours)
+            or an hourly rollup of them (see build_hourly_rollup)
         hourly_safety_factor: safety factor to apply for single-hour data (default: 1.3)
-        return_timestamp: False (default) to return just value; True to return a tuple with (value, row index of value) 
+        return_timestamp: False (default) to return just value; True to return a tuple with (value, row index of value);
+            for a rollup, the row index is that of the peak hour
 
     Returns:
         float: Estimated peak hourly load in kW
     """
 
-    df['__row_idx'] = np.arange(len(df))
-    df.set_index('__row_idx', inplace=True)
-    df['hour_start'] = df['DateTime'].dt.floor('h')
-
-    df_hourly = df.groupby('hour_start').agg({
-        'kWh': ['max', 'nunique', 'idxmax'],
-        'DateTime': 'nunique'
-    })
-
-    df_hourly.columns = df_hourly.columns.map('_'.join)
-    df_hourly['period'] = np.where(df_hourly['DateTime_nunique'] == 1, 1, 4)
-    df_hourly['kWh_max_adj'] = np.where(
-        df_hourly['kWh_nunique'] == 1,
-        df_hourly['kWh_max'] * df_hourly['period'] * hourly_safety_factor,
-        df_hourly['kWh_max'] * df_hourly['period']
-    )
+    df_hourly = _get_hourly_maxima(df, hourly_safety_factor=hourly_safety_factor)
 
     peak_hour_ts = df_hourly['kWh_max_adj'].idxmax()
     peak_val = df_hourly.loc[peak_hour_ts, 'kWh_max_adj']
@@ -490,6 +1226,293 @@ def get_peak_hourly_load(df: pd.DataFrame, hourly_safety_factor: float = 1.3, re
     else:
         return peak_val
 
+def get_peak_hourly_load_bounds(df: pd.DataFrame, hourly_safety_factor: float = 1.3) -> Tuple[float, float]:
+    """Cheap lower and upper bounds on the peak hourly load of get_peak_hourly_load, from the maximum reading
+    (see hea_nec.core.peak_hourly_load_bounds). For an hourly rollup, both bounds are the exact peak.
+
+    Args:
+        df: Input meter values as pandas DataFrame with columns "DateTime" and "kWh" (see get_peak_hourly_load)
+        hourly_safety_factor: see get_peak_hourly_load
+
+    Returns:
+        tuple (lower, upper) in kW, (nan, nan) if there are no readings
+    """
+    if _is_hourly_rollup(df):
+        peak = float(get_peak_hourly_load(df, hourly_safety_factor=hourly_safety_factor))
+        return peak, peak
+    return peak_hourly_load_bounds(_epoch_ns(df['DateTime']), df['kWh'].to_numpy(dtype=float), hourly_safety_factor)
+
+def get_peak_hourly_load_by_channel(
+    df: pd.DataFrame,
+    channels: Sequence[str] = CHANNELS,
+    hourly_safety_factor: float = 1.3
+) -> Dict[str, float]:
+    """Estimates the peak hourly load in kW (see get_peak_hourly_load) for several meter channels at once.
+    The readings of all channels are mapped onto one shared interval grid in a single pass.
+
+    Args:
+        df: Input meter values as pandas DataFrame with a "DateTime" column and one "kWh_<channel>" column
+            per requested channel, as returned by _prepare_channel_intervals
+        channels: channels to evaluate, any of "import", "export" and "net" (default: all)
+        hourly_safety_factor: see get_peak_hourly_load
+
+    Returns:
+        a dict mapping each channel to its estimated peak hourly load in kW
+    """
+    kwh = df[[f'kWh_{channel}' for channel in channels]].to_numpy(dtype=float)
+    grid = _normalize_interval_grid(df['DateTime'], kwh)
+
+    return {
+        channel: _reduce_hourly_maxima(grid, grid['values'][:, :, i], hourly_safety_factor)['kWh_max_adj'].max()
+        for i, channel in enumerate(channels)
+    }
+
+def get_top_peak_hours(
+    df: pd.DataFrame,
+    n: int = 10,
+    thresholds_kW: Sequence[float] = (),
+    hourly_safety_factor: float = 1.3
+) -> Dict[str, Any]:
+    """Finds the n hours with the highest adjusted hourly load (see get_peak_hourly_load) and the share of
+    hours exceeding the given load thresholds.
+
+    Only the top n hours are sorted (partial selection with np.argpartition), so the cost is close to that of
+    get_peak_hourly_load even for large n and long histories.
+
+    Args:
+        df: Input meter values as pandas DataFrame with columns "DateTime" and "kWh" (see get_peak_hourly_load),
+            or an hourly rollup of them (see build_hourly_rollup)
+        n: number of peak hours to return (default: 10)
+        thresholds_kW: optional list of load thresholds in kW for the peak-hour distribution
+        hourly_safety_factor: see get_peak_hourly_load
+
+    Returns:
+        a dict with keys:
+            "top_hours": pandas DataFrame with the top n hours in descending order of load, with columns
+                "hour_start" (pd.Timestamp), "peak_kW" (adjusted hourly load in kW),
+                "peak_reading_time" (pd.Timestamp of the maximum reading within the hour),
+                "interval_type" ("Hourly", "15-minute", "Fake 15-minute", "5-minute", "30-minute", ...)
+            "threshold_shares": dict mapping each threshold to the share (0..1) of hours with load above it
+            "total_hours": number of hours with data
+    """
+    df = df.copy()
+    df_hourly = _get_hourly_maxima(df, hourly_safety_factor=hourly_safety_factor)
+
+    adj = df_hourly['kWh_max_adj'].to_numpy()
+    n = min(n, len(adj))
+
+    if n > 0:
+        # Select the top n hours without sorting all hours, then order just the selection
+        top = np.argpartition(-adj, n - 1)[:n]
+        top = top[np.argsort(-adj[top], kind='stable')]
+    else:
+        top = np.array([], dtype=np.int64)
+
+    interval_minutes = df_hourly['interval_minutes'].to_numpy()[top]
+    identical = df_hourly['identical'].to_numpy()[top]
+    interval_type = [
+        'Hourly' if minutes == 60 else f"{'Fake ' if fake else ''}{minutes}-minute"
+        for minutes, fake in zip(interval_minutes, identical)
+    ]
+
+    top_hours = pd.DataFrame({
+        'hour_start': df_hourly.index[top],
+        'peak_kW': adj[top],
+        'peak_reading_time': df['kWh_max_time' if _is_hourly_rollup(df) else 'DateTime'].iloc[
+            df_hourly['kWh_idxmax'].to_numpy()[top].astype(np.int64)].to_numpy(),
+        'interval_type': interval_type,
+    })
+
+    threshold_shares = {
+        threshold: float((adj > threshold).mean()) if len(adj) > 0 else 0.0
+        for threshold in thresholds_kW
+    }
+
+    return {
+        'top_hours': top_hours,
+        'threshold_shares': threshold_shares,
+        'total_hours': len(adj),
+    }
+
+def get_rolling_peak_series(
+    df: pd.DataFrame,
+    window_months: int = 12,
+    step: str = "month",
+    hourly_safety_factor: float = 1.3
+) -> Dict[str, Any]:
+    """Calculates the adjusted peak hourly load (see get_peak_hourly_load) for every rolling window of
+    window_months months in a (multi-year) history of meter values.
+
+    The hourly maxima are computed once; the peak of every window is then found with a monotonic-deque
+    sliding maximum, in a single pass over the hours regardless of the number of windows.
+
+    Args:
+        df: Input meter values as pandas DataFrame with columns "DateTime" and "kWh" (see get_peak_hourly_load),
+            or an hourly rollup of them (see build_hourly_rollup)
+        window_months: length of each window in months (default: 12, as per NEC 220.87)
+        step: offset between consecutive window starts, either "month" or "day" (default: "month")
+        hourly_safety_factor: see get_peak_hourly_load
+
+    Returns:
+        a dict with keys:
+            "series": pandas DataFrame with one row per window and columns "window_start", "window_end"
+                (exclusive), "peak_kW" and "peak_hour" (start of the hour with the peak load); only complete
+                windows are included unless the history is shorter than one window, in which case a single
+                window starting at the first reading is returned
+            "governing_window": the row of "series" with the highest peak load (the earliest one in case of ties),
+                as a pandas Series, or None if df is empty
+
+    Raises:
+        ValueError: If step is not "month" or "day".
+    """
+    if step == "month":
+        offset = pd.DateOffset(months=1)
+    elif step == "day":
+        offset = pd.DateOffset(days=1)
+    else:
+        raise ValueError(f"Unsupported window step '{step}'. Use 'month' or 'day'.")
+
+    df = df.copy()
+    df_hourly = _get_hourly_maxima(df, hourly_safety_factor=hourly_safety_factor)
+
+    if df_hourly.empty:
+        return {'series': pd.DataFrame(columns=['window_start', 'window_end', 'peak_kW', 'peak_hour']),
+                'governing_window': None}
+
+    hours = df_hourly.index
+    values = df_hourly['kWh_max_adj'].to_numpy()
+    window_length = pd.DateOffset(months=window_months)
+
+    # Window starts, stepping from the first hour with data (at midnight for daily/monthly alignment)
+    first = hours[0].normalize()
+    last_end = hours[-1] + pd.Timedelta(hours=1)
+    starts = []
+    start = first
+    while start + window_length <= last_end:
+        starts.append(start)
+        start = first + offset * len(starts)
+    if not starts:
+        starts.append(first)
+
+    starts = pd.DatetimeIndex(starts)
+    ends = pd.DatetimeIndex([start + window_length for start in starts])
+
+    # Positions of the first hour at/after each window start and end
+    start_pos = hours.searchsorted(starts, side='left')
+    end_pos = hours.searchsorted(ends, side='left')
+
+    # Monotonic deque sliding maximum: window bounds only move forward, so each hour is pushed
+    # and popped at most once
+    window = deque()
+    next_pos = 0
+    peak_pos = np.empty(len(starts), dtype=np.int64)
+    for i in range(len(starts)):
+        while next_pos < end_pos[i]:
+            while window and values[window[-1]] <= values[next_pos]:
+                window.pop()
+            window.append(next_pos)
+            next_pos += 1
+        while window and window[0] < start_pos[i]:
+            window.popleft()
+        peak_pos[i] = window[0] if window else -1
+
+    has_data = peak_pos >= 0
+    series = pd.DataFrame({
+        'window_start': starts[has_data],
+        'window_end': ends[has_data],
+        'peak_kW': values[peak_pos[has_data]],
+        'peak_hour': hours[peak_pos[has_data]],
+    })
+
+    governing_window = series.loc[series['peak_kW'].idxmax()] if not series.empty else None
+
+    return {
+        'series': series,
+        'governing_window': governing_window,
+    }
+
+def _is_hour_profile(columns: pd.Index) -> bool:
+    """Whether load shape columns are the hours of day 0..23 or of week 0..167 (as integers or integer strings)."""
+    if len(columns) not in (24, 168) or isinstance(columns, pd.DatetimeIndex):
+        return False
+    try:
+        return [int(column) for column in columns] == list(range(len(columns)))
+    except (TypeError, ValueError):
+        return False
+
+def iter_coincident_peaks(
+    df: pd.DataFrame,
+    load_shapes,
+    hourly_safety_factor: float = 1.3,
+    chunk_size: int = 256
+) -> Iterator[pd.DataFrame]:
+    """Overlays the hourly load shapes of added appliances (e.g. EV charging windows, heat pump temperature
+    curves) onto a site's hourly load history and finds the coincident peak of each shape.
+
+    The site's hourly load is the adjusted hourly load used for the peak (see get_peak_hourly_load), so the
+    coincident peak of an all-zero shape equals the peak hourly load. Shapes are processed in blocks of
+    chunk_size rows (see hea_nec.core.coincident_peaks).
+
+    Args:
+        df: Input meter values as pandas DataFrame with columns "DateTime" and "kWh" (see get_peak_hourly_load),
+            or an hourly rollup of them (see build_hourly_rollup)
+        load_shapes: added load in kW, as a pandas DataFrame with one row per shape (e.g. per solution, the index
+            identifies the shape) and either
+                24 columns labelled 0..23: load per hour of day, or
+                168 columns labelled 0..167: load per hour of week (Monday 0:00 first), or
+                timestamp columns: load per hour (hours of the history without a column add no load),
+            or an iterable of such DataFrames (chunks, e.g. from pd.read_csv(..., chunksize=...)) to bound memory
+        hourly_safety_factor: see get_peak_hourly_load
+        chunk_size: number of shapes processed at once
+
+    Yields:
+        a pandas DataFrame per chunk of load_shapes, with the same index and columns:
+            "coincident_peak_kW": peak of the site's hourly load plus the shape
+            "coincident_peak_hour": pd.Timestamp of the hour of the coincident peak
+            "added_peak_kW": increase over the site's peak hourly load
+
+    Raises:
+        ValueError: If the columns of load_shapes are neither hour of day/week labels nor timestamps.
+    """
+    df_hourly = _get_hourly_maxima(df, hourly_safety_factor=hourly_safety_factor)
+    base_kw = df_hourly['kWh_max_adj'].to_numpy()
+    hours = df_hourly.index
+    peak_kw = base_kw.max()
+
+    if isinstance(load_shapes, (pd.DataFrame, np.ndarray)):
+        load_shapes = [pd.DataFrame(load_shapes)]
+
+    for chunk in load_shapes:
+        if _is_hour_profile(chunk.columns):
+            phase = hours.hour if len(chunk.columns) == 24 else hours.dayofweek * 24 + hours.hour
+            peaks, hour_idx = coincident_peaks(base_kw, chunk.to_numpy(), phase=phase.to_numpy(), chunk_size=chunk_size)
+        else:
+            try:
+                columns = pd.DatetimeIndex(pd.to_datetime(chunk.columns, format='mixed'))
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    "Load shape columns must be hours of day (0..23), hours of week (0..167) or timestamps"
+                ) from e
+            if columns.tz is None and hours.tz is not None:
+                columns = columns.tz_localize(hours.tz)
+            aligned = chunk.set_axis(columns, axis=1).reindex(columns=hours, fill_value=0.0)
+            peaks, hour_idx = coincident_peaks(base_kw, aligned.to_numpy(), chunk_size=chunk_size)
+
+        yield pd.DataFrame({
+            'coincident_peak_kW': peaks,
+            'coincident_peak_hour': hours[hour_idx],
+            'added_peak_kW': peaks - peak_kw,
+        }, index=chunk.index)
+
+def get_coincident_peaks(
+    df: pd.DataFrame,
+    load_shapes,
+    hourly_safety_factor: float = 1.3,
+    chunk_size: int = 256
+) -> pd.DataFrame:
+    """Coincident peak of each load shape with the site's hourly load history (see iter_coincident_peaks)."""
+    return pd.concat(list(iter_coincident_peaks(df, load_shapes, hourly_safety_factor, chunk_size)))
+
 def get_remaining_panel_capacity(peak_hourly_load_kW: float, panel_size_A: int, panel_voltage_V=240) -> float:
     """Estimates the remaining panel capacity in kW from panel size and peak hourly load.
 
@@ -505,33 +1528,61 @@ def get_remaining_panel_capacity(peak_hourly_load_kW: float, panel_size_A: int,
     Returns:
         float: Remaining electric panel capacity in kW, according to NEC-220.87
     """
-    return panel_size_A * panel_voltage_V / 1000 - 1.25 * peak_hourly_load_kW
+    return remaining_panel_capacity(peak_hourly_load_kW, panel_size_A, panel_voltage_V)
 
 def calculate_summary_details(df : pd.DataFrame, peak_row_idx, file_format : str) -> Dict[str, Any]:
     """Helper function to output some additional statistics of the provided meter data.
 
     Args:
-        df: meter data with columns DateTime and kWh
-        peak_reading_idx: DateTime of peak reading
+        df: meter data with columns DateTime and kWh, or an hourly rollup of it (see build_hourly_rollup)
+        peak_reading_idx: row position of the peak reading (of the peak hour for a rollup)
         file_format: "UtilityAPI" or "Simple CSV"
 
     Returns:
         a dict with additional statistics
     """
-    first_reading = df['DateTime'].iloc[0]
-    last_reading = df['DateTime'].iloc[-1]
-    days_covered = round((last_reading - first_reading).total_seconds() / (1000 * 60 * 60 * 24 / 1000))
+    if _is_hourly_rollup(df):
+        first_reading = df.attrs['first_reading']
+        last_reading = df.attrs['last_reading']
+        total_readings = df.attrs['total_readings']
+        readings_count = df['readings']
+        identical = df['identical']
+        # Hours from the first to the last hour with data, as counted by the hourly grouping of the meter data
+        total_hours_with_data = int((df.index[-1] - df.index[0]) / pd.Timedelta(hours=1)) + 1
+
+        peak_hour_row = df.iloc[peak_row_idx]
+        peak_time = peak_hour_row['kWh_max_time']
+        peak_kwh = float(peak_hour_row['kWh_max'])
+        peak_interval_readings = peak_hour_row['readings']
+    else:
+        first_reading = df['DateTime'].iloc[0]
+        last_reading = df['DateTime'].iloc[-1]
+        total_readings = len(df)
+
+        # Group by hour for pattern analysis
+        hourly_groups = df.groupby(pd.Grouper(key='DateTime', freq='h')).agg(
+            readings_count=('kWh', 'count'),
+            unique_readings=('kWh', 'nunique')
+        ).dropna()
+        readings_count = hourly_groups['readings_count']
+        identical = hourly_groups['unique_readings'] == 1
+        total_hours_with_data = len(hourly_groups)
+
+        peak_reading_row = df.iloc[peak_row_idx]
+        peak_time = peak_reading_row['DateTime']
+        peak_kwh = float(peak_reading_row['kWh'].item())
+        if peak_time.tzinfo is not None:
+            # Floor in UTC to stay unambiguous during repeated DST hours
+            peak_hour = peak_time.tz_convert('UTC').floor('h').tz_convert(peak_time.tzinfo)
+        else:
+            peak_hour = peak_time.floor('h')
+        peak_interval_readings = hourly_groups.loc[peak_hour]['readings_count']
 
-    # Group by hour for pattern analysis
-    hourly_groups = df.groupby(pd.Grouper(key='DateTime', freq='h')).agg(
-        readings_count=('kWh', 'count'),
-        unique_readings=('kWh', 'nunique')
-    ).dropna()
+    days_covered = round((last_reading - first_reading).total_seconds() / (1000 * 60 * 60 * 24 / 1000))
 
-    total_hours_with_data = len(hourly_groups)
-    hours_with_single_reading = (hourly_groups['readings_count'] == 1).sum()
-    hours_with_four_unique_readings = ((hourly_groups['readings_count'] == 4) & (hourly_groups['unique_readings'] > 1)).sum()
-    hours_with_four_identical_readings = ((hourly_groups['readings_count'] == 4) & (hourly_groups['unique_readings'] == 1)).sum()
+    hours_with_single_reading = (readings_count == 1).sum()
+    hours_with_four_unique_readings = ((readings_count == 4) & ~identical).sum()
+    hours_with_four_identical_readings = ((readings_count == 4) & identical).sum()
 
     data_types = []
     if hours_with_single_reading > 0:
@@ -543,8 +1594,6 @@ def calculate_summary_details(df : pd.DataFrame, peak_row_idx, file_format : str
     if percentage_identical > 50:
         data_types.append("Fake 15-minute")
 
-    peak_reading_row = df.iloc[peak_row_idx]
-    peak_interval_readings = hourly_groups.loc[peak_reading_row['DateTime'].floor('h')]['readings_count']
     interval_length = 60 if peak_interval_readings == 1 else 15
 
     return {
@@ -552,17 +1601,17 @@ def calculate_summary_details(df : pd.DataFrame, peak_row_idx, file_format : str
             "days_covered": days_covered,
             "first_reading": first_reading.strftime('%Y-%m-%d %H:%M:%S'),
             "last_reading": last_reading.strftime('%Y-%m-%d %H:%M:%S'),
-            "total_readings": len(df),
+            "total_readings": total_readings,
             "total_hours_with_data": total_hours_with_data,
         },
         "file_format": file_format,
         "data_types_detected": data_types or [ "Unknown" ],
-        "avg_readings_per_hour": len(df) / total_hours_with_data if total_hours_with_data > 0 else "0.0",
-        "avg_readings_per_day": len(df) / days_covered if days_covered > 0 else "0.0",
+        "avg_readings_per_hour": total_readings / total_hours_with_data if total_hours_with_data > 0 else "0.0",
+        "avg_readings_per_day": total_readings / days_covered if days_covered > 0 else "0.0",
         "peak_reading": {
-            "date_time": peak_reading_row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
+            "date_time": peak_time.strftime('%Y-%m-%d %H:%M:%S'),
             "interval_length": interval_length,
-            "value_kW": float(peak_reading_row['kWh'].item() * peak_interval_readings),
+            "value_kW": float(peak_kwh * peak_interval_readings),
         },
         "pattern_analysis": {
             "total_hours_with_single_reading": hours_with_single_reading.item(),
@@ -571,11 +1620,13 @@ def calculate_summary_details(df : pd.DataFrame, peak_row_idx, file_format : str
         },
     }
 
+@timed()
 def calculate_nec_22087_capacity(
     ua_intervals: pd.DataFrame,
     site_spec: Dict[str, float],
     hourly_safety_factor: float = 1.3,
-    detect_gaps: bool = False) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    detect_gaps: bool = False,
+    channel: str = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
     """Process input DataFrame and parameters to calculate panel capacity and create visualization data.
 
     Args:
@@ -585,9 +1636,14 @@ def calculate_nec_22087_capacity(
         site_spec: Dictionary with keys:
             "panel_size_A" (existing panel capacity in A)
             "panel_voltage_V" (optional, default 240V)
+            "timezone" (optional, timezone name of the site, e.g. "America/Denver", used for timestamps without
+                timezone information if the file has no "interval_timezone" column)
         hourly_safety_factor: see get_peak_hourly_load
         detect_gaps: if True, detect_data_gaps will be run over data and the result stored
             under key 'gap_report' in detailed_results
+        channel: (optional, for net-metered sites) meter channel to evaluate: "import", "export" or "net"
+            (see CHANNEL_COLUMNS). If set, the peak loads of all channels are additionally stored under key
+            'channel_peaks_kW' in detailed_results. By default, the "kWh"/"interval_kWh" column is evaluated.
 
         Pandas DataFrame with panel specifications. Must contain one row with columns 'panel_size_A' and 'panel_voltage_V'.
 
@@ -604,21 +1660,35 @@ def calculate_nec_22087_capacity(
     panel_size_A = site_spec['panel_size_A']
     panel_voltage_V = site_spec['panel_voltage_V']
 
-    (df, file_format) = _prepare_ua_intervals(ua_intervals)
+    gap_report = None
+    channel_peaks = None
+
+    tz = site_spec.get('timezone')
+
+    with profile_stage("prepare"):
+        if channel is None:
+            (df, file_format) = _prepare_ua_intervals(ua_intervals, tz=tz)
+        else:
+            (df_channels, file_format) = _prepare_channel_intervals(ua_intervals, tz=tz)
+            channel_peaks = get_peak_hourly_load_by_channel(df_channels, hourly_safety_factor=hourly_safety_factor)
+            df = _select_channel(df_channels, channel)
 
     if detect_gaps:
-        gap_report = detect_data_gaps(df)
+        with profile_stage("gap_detection"):
+            gap_report = detect_data_gaps(df)
 
     # Pass a copy of df to avoid side effects
-    peak_hourly_load_kW, peak_row_idx = get_peak_hourly_load(
-        df.copy(),
-        hourly_safety_factor=hourly_safety_factor,
-        return_idx=True)
+    with profile_stage("peak"):
+        peak_hourly_load_kW, peak_row_idx = get_peak_hourly_load(
+            df.copy(),
+            hourly_safety_factor=hourly_safety_factor,
+            return_idx=True)
 
     remaining_panel_capacity_kW = get_remaining_panel_capacity(peak_hourly_load_kW, panel_size_A, panel_voltage_V)
 
     # Calculate summary statistics
-    summary_details = calculate_summary_details(df, peak_row_idx, file_format) if not df.empty else {}
+    with profile_stage("summary"):
+        summary_details = calculate_summary_details(df, peak_row_idx, file_format) if not df.empty else {}
 
     # Calculate Amp values
     peak_power_A = peak_hourly_load_kW * 1000 / panel_voltage_V
@@ -665,14 +1735,21 @@ def calculate_nec_22087_capacity(
     if not gap_report is None:
         detailed_results['gap_report'] = gap_report
 
+    if not channel_peaks is None:
+        detailed_results['channel_peaks_kW'] = channel_peaks
+
     return (detailed_results, summary_results)
 
+@timed()
 def calculate_nec_compliance_for_solutions(
     solutions_df: pd.DataFrame,
     site_ua_intervals: Dict[Any, pd.DataFrame],
     site_specs: Dict[Any, Dict[str, float]],
-    code_edition: str = "2023",
-    hourly_safety_factor: float = 1.3
+    code_edition: Union[str, Sequence[str]] = "2023",
+    hourly_safety_factor: float = 1.3,
+    channel: str = None,
+    detect_gaps: bool = False,
+    screen: bool = False
 ) -> pd.DataFrame:
     """
     1. Calculates the NEC 220.87 compliant observed peak load for each site from the provided site-specific
@@ -703,19 +1780,39 @@ def calculate_nec_compliance_for_solutions(
                 will be used for the appliance in context of NEC 2023 load calculations)
             "demand_factor_nec_12087_2026" (float, optional; if the column exists, the provided specific Demand Factor
                 will be used for the appliance in context of NEC 2026 load calculations)
+            Large tables can be passed in the compact dtypes of compact_solutions/read_solutions_csv (categoricals,
+            narrow numbers), which the evaluation uses as they are.
 
         site_ua_intervals: Input meter values as dictionary mapping each site_id to a pandas DataFrame with columns:
             "DateTime" (measurement interval start, format "YYYY-MM-DD HH:MM:00") or "interval_start" (format "M/DD/YY HH:MM")
             "kWh" (measured meter value in kilowatt-hours) or "interval_kWh"
+            or to an hourly rollup of the site's prepared meter values for the channel (see build_hourly_rollup)
 
         site_specs: Dictionary mapping each site_id to its current electric panel specification, with keys:
             "panel_size_A" (existing panel capacity in A)
             "panel_voltage_V" (optional, default 240V)
+            "timezone" (optional, see calculate_nec_22087_capacity)
 
-        code_edition: NEC edition to use in calculatins: "2023" or "2026"
+        code_edition: NEC edition to use in calculatins: "2023" or "2026", or a sequence of editions (e.g.
+            ("2023", "2026")) to evaluate all of them in one pass: the peak load of each site and the load steps
+            common to the editions are calculated only once, and the results get one row per solution with the
+            EDITION_COLUMNS of each edition suffixed with the edition (e.g. "status_2023", "status_2026") instead of
+            the "code_edition" column
         
         hourly_safety_factor: see get_peak_hourly_load
 
+        channel: (optional) meter channel to evaluate for net-metered sites, see calculate_nec_22087_capacity
+
+        detect_gaps: if True, detect_data_gaps is run over each site's meter data and the results get the additional
+            columns GAP_SUMMARY_COLUMNS (number of gaps, total missing intervals and longest gap in hours of the site;
+            NaN for sites given as hourly rollup)
+
+        screen: if True, cheap lower and upper bounds on each site's peak load are calculated first (see
+            get_peak_hourly_load_bounds); if they decide the status of all solutions of the site, the exact peak load
+            is not calculated and the columns depending on it ("historical_peak_kw", "total_demand_amps",
+            "headroom_amps", "min_panel_size_A") are NaN. The results get the additional columns SCREENING_COLUMNS
+            (the bounds, and whether the solution was decided by them)
+
     Returns:
         a pandas DataFrame containing the evaluation result for each solution with columns:
             "site_id", "equipment_combo_id", "load_control_combo_id": these columns together comprise the solution id
@@ -726,34 +1823,120 @@ def calculate_nec_compliance_for_solutions(
             "total_demand_amps": calculated total demand in A for the solution
             "status": "PASS" if calculated total demand in A for the solution does not exceed site's existing panel capacity,
                 "FAIL" otherwise
+            "headroom_amps": remaining panel capacity in A after the solution (negative: shortfall of a FAIL)
+            "min_panel_size_A": smallest standard panel size (100, 125, 150, 200, 225 or 400A) the solution would pass
+                with, NaN if the total demand exceeds 400A
+        with several editions: "site_id", "equipment_combo_id", "load_control_combo_id", "historical_peak_kw" and
+            the EDITION_COLUMNS of each edition, suffixed with the edition
     """
 
-    if code_edition != "2023" and code_edition != "2026":
-        raise ValueError(f"Unsupported NEC edition '{code_edition}'")
+    site_results = list(iter_nec_compliance_for_solutions(
+        solutions_df,
+        site_ua_intervals,
+        site_specs,
+        code_edition=code_edition,
+        hourly_safety_factor=hourly_safety_factor,
+        channel=channel,
+        detect_gaps=detect_gaps,
+        screen=screen
+    ))
+    if not site_results:
+        return pd.DataFrame(columns=_result_columns(code_edition, detect_gaps=detect_gaps, screen=screen))
+    return pd.concat(site_results, ignore_index=True)
+
+def iter_nec_compliance_for_solutions(
+    solutions_df: pd.DataFrame,
+    site_ua_intervals: Mapping[Any, pd.DataFrame],
+    site_specs: Dict[Any, Dict[str, float]],
+    code_edition: Union[str, Sequence[str]] = "2023",
+    hourly_safety_factor: float = 1.3,
+    channel: str = None,
+    detect_gaps: bool = False,
+    screen: bool = False
+) -> Iterator[pd.DataFrame]:
+    """
+    Streaming variant of calculate_nec_compliance_for_solutions: evaluates the solutions site by site (in order of
+    site_id) and yields one result block (pandas DataFrame with the same columns) per site as soon as it is done.
 
-    # 1. Calculate measured peak load for each site
-    site_peaks = {}
-    for site_id, meter_df in site_ua_intervals.items():
-        temp_df, _ = _prepare_ua_intervals(meter_df)
-        site_peaks[site_id] = get_peak_hourly_load(temp_df, hourly_safety_factor=hourly_safety_factor)
+    Meter data is only looked up (site_ua_intervals.get(site_id)) when a site is processed and is not retained
+    afterwards, so site_ua_intervals may be a lazy Mapping that loads each site's meter file on access; memory then
+    stays bounded by a single site. Sites without solutions are not processed.
 
-    # 2. Calculate the added/removed loads for each "solution"
-    # (defined as a unique combo of site_id, equipment_combo_id and load_control_combo_id)
-    group_cols = ["site_id", "equipment_combo_id", "load_control_combo_id"]
-    solution_loads = (
-        solutions_df.groupby(group_cols)
-        .apply(lambda x: _calculate_solution_loads(x, code_edition=code_edition), include_groups=False)
-        .reset_index()
-    )
+    Args: see calculate_nec_compliance_for_solutions
 
-    # 3. Check compliance based on measured peak and added loads (and under 2026 rules: also removed loads)
-    metrics = solution_loads.apply(
-        lambda row: _calculate_nec_compliance_for_solution(
-            row,
-            site_specs=site_specs,
-            site_peaks=site_peaks,
-            code_edition=code_edition
-        ),
-        axis=1
-    )
-    return pd.concat([solution_loads, metrics], axis=1)
+    Yields:
+        a pandas DataFrame per site with the evaluation result of each of its solutions
+    """
+
+    code_editions = _code_editions(code_edition)
+
+    # Classify the appliances into NEC rule categories once, rather than per solution
+    solutions_df = solutions_df.assign(device_category=_device_categories(solutions_df))
+
+    for site_id, site_solutions in solutions_df.groupby("site_id", sort=True, observed=True):
+        with profile_stage("site", site=site_id):
+            site_spec = site_specs.get(site_id, {})
+            with profile_stage("read"):
+                meter_df = site_ua_intervals.get(site_id)
+
+            # 1. Calculate the added/removed loads for each solution of the site (per NEC edition)
+            with profile_stage("solution_loads"):
+                solution_loads = _calculate_loads_by_edition(site_solutions, code_editions)
+
+            # 2. Calculate measured peak load for the site (unless the bounds on it decide all solutions)
+            # Hourly rollups carry no interval timestamps, so their sites get no gap summary
+            gap_summary = dict.fromkeys(GAP_SUMMARY_COLUMNS, np.nan)
+            peak_bounds = (np.nan, np.nan)
+            screened_status = None
+            if (detect_gaps or screen) and meter_df is not None and not _is_hourly_rollup(meter_df):
+                temp_df = _prepare_site_intervals(meter_df, site_spec, channel)
+                if detect_gaps:
+                    with profile_stage("gap_detection"):
+                        gap_summary = _gap_summary(detect_data_gaps(temp_df))
+                if screen:
+                    with profile_stage("screening"):
+                        peak_bounds = get_peak_hourly_load_bounds(temp_df, hourly_safety_factor=hourly_safety_factor)
+                        screened_status = {
+                            edition: _screen_solutions(solution_loads[edition], site_specs[site_id], peak_bounds,
+                                                       code_edition=edition)
+                            for edition in code_editions
+                        }
+                        if any(status is None for status in screened_status.values()):
+                            screened_status = None
+                peak_kw = None
+                if screened_status is None:
+                    with profile_stage("peak"):
+                        peak_kw = get_peak_hourly_load(temp_df, hourly_safety_factor=hourly_safety_factor)
+                del temp_df
+            else:
+                peak_kw = _site_peak_load(meter_df, site_spec, hourly_safety_factor, channel)
+                if peak_kw is not None:
+                    peak_bounds = (peak_kw, peak_kw)
+            del meter_df
+
+            # 3. Check compliance based on measured peak and added loads (and under 2026 rules: also removed loads)
+            with profile_stage("compliance"):
+                site_results = {
+                    edition: _calculate_nec_compliance_for_site(
+                        solution_loads[edition],
+                        site_spec=site_specs[site_id] if peak_kw is not None or screened_status is not None else site_spec,
+                        peak_kw=peak_kw,
+                        code_edition=edition,
+                        screened_status=screened_status[edition] if screened_status is not None else None
+                    )
+                    for edition in code_editions
+                }
+                if isinstance(code_edition, str):
+                    site_results = site_results[code_edition]
+                else:
+                    site_results = _wide_edition_results(site_results)
+                if detect_gaps:
+                    site_results = site_results.assign(**gap_summary)
+                if screen:
+                    site_results = site_results.assign(
+                        peak_lower_bound_kw=peak_bounds[0],
+                        peak_upper_bound_kw=peak_bounds[1],
+                        screened=screened_status is not None,
+                    )
+        SITES_EVALUATED.inc()
+        yield site_results
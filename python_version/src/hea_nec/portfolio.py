@@ -0,0 +1,339 @@
+"""
+Streaming portfolio statistics: distributions of the results of many sites (peak load, remaining capacity, total
+demand and headroom of the solutions) per group of sites (e.g. utility, panel size and NEC edition), kept as small
+mergeable summaries instead of keeping every result and sorting at the end.
+
+QuantileSketch keeps the count, mean, variance, minimum and maximum of the values added to it and a relative-error
+quantile sketch: values are counted in logarithmically sized buckets (as in DDSketch), so every quantile is returned
+within relative_accuracy of the exact value, with a few hundred buckets covering the range of values found in
+practice. Merging two sketches adds their bucket counts (and combines their moments), which gives the same sketch
+as adding all values to one, in any order; shards or worker processes can therefore summarize their own results
+and be combined cheaply afterwards.
+
+PortfolioSummary maintains a QuantileSketch per group and metric, fed by the results of
+calculate_nec_compliance_for_solutions (add_solutions) and calculate_nec_22087_capacity (add_capacity). Summaries
+are saved as JSON (to_dict/from_dict, write_json/read_json) and reported as a DataFrame of moments and quantiles
+(to_frame).
+"""
+
+import json
+import math
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .methods import EDITION_COLUMNS
+
+# Values of a smaller magnitude are counted as zero by QuantileSketch
+MIN_INDEXABLE_VALUE = 1e-9
+
+# Metrics of the results of calculate_nec_compliance_for_solutions: per site (counted once per site and group) and
+# per solution
+SITE_METRICS = ("historical_peak_kw",)
+SOLUTION_METRICS = ("total_demand_amps", "headroom_amps")
+
+# Metrics of the summary_results of calculate_nec_22087_capacity
+CAPACITY_METRICS = ("peak_hourly_load_kW", "remaining_panel_capacity_kW", "remaining_panel_capacity_A")
+
+# Default grouping of PortfolioSummary: result columns or site_spec keys (None for sites without the value)
+DEFAULT_GROUP_BY = ("utility", "panel_size_A", "code_edition")
+
+# Quantiles reported by PortfolioSummary.to_frame by default
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+class QuantileSketch:
+    """
+    Mergeable summary of a stream of values: count, mean, variance, minimum, maximum and quantiles within
+    relative_accuracy of the exact value (see module docstring). NaN and infinite values are ignored.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be between 0 and 1, got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.zero_count = 0
+        # Bucket index -> count, for the magnitudes of positive and negative values
+        self._positive = {}
+        self._negative = {}
+
+    @property
+    def variance(self) -> float:
+        """Population variance of the values (NaN without values)."""
+        return self._m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of the values (NaN without values)."""
+        return math.sqrt(self.variance)
+
+    def _merge_moments(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        # Parallel algorithm of Chan et al. for the mean and the sum of squared deviations
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def add(self, values) -> "QuantileSketch":
+        """Adds a value or an array of values; returns the sketch."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+
+        mean = values.mean()
+        self._merge_moments(len(values), float(mean), float(((values - mean) ** 2).sum()),
+                            float(values.min()), float(values.max()))
+
+        magnitude = np.abs(values)
+        indexable = magnitude > MIN_INDEXABLE_VALUE
+        self.zero_count += int(len(values) - indexable.sum())
+        keys = np.ceil(np.log(magnitude[indexable]) / self._log_gamma).astype(np.int64)
+        negative = values[indexable] < 0
+        for buckets, bucket_keys in ((self._positive, keys[~negative]), (self._negative, keys[negative])):
+            unique_keys, counts = np.unique(bucket_keys, return_counts=True)
+            for key, count in zip(unique_keys.tolist(), counts.tolist()):
+                buckets[key] = buckets.get(key, 0) + count
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Adds the values summarized by another sketch of the same relative_accuracy; returns the sketch."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(f"Cannot merge sketches of relative accuracy {other.relative_accuracy} "
+                             f"and {self.relative_accuracy}")
+        if other.count == 0:
+            return self
+        self._merge_moments(other.count, other.mean, other._m2, other.min, other.max)
+        self.zero_count += other.zero_count
+        for buckets, other_buckets in ((self._positive, other._positive), (self._negative, other._negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        return self
+
+    def _bucket_values(self, keys: np.ndarray) -> np.ndarray:
+        # Value within relative_accuracy of every magnitude in (gamma^(key-1), gamma^key]
+        return 2 * self._gamma ** keys.astype(float) / (self._gamma + 1)
+
+    def quantile(self, q):
+        """
+        Estimates the q-quantile (a float or an array of floats between 0 and 1) of the values: the value of rank
+        floor(q * (count - 1)) in sorted order, within relative_accuracy (exact for the minimum and maximum).
+        NaN without values.
+        """
+        q = np.asarray(q, dtype=float)
+        if np.any((q < 0) | (q > 1)):
+            raise ValueError("Quantiles must be between 0 and 1")
+        if self.count == 0:
+            result = np.full(q.shape, np.nan)
+        else:
+            negative_keys = np.array(sorted(self._negative, reverse=True), dtype=np.int64)
+            positive_keys = np.array(sorted(self._positive), dtype=np.int64)
+            values = np.concatenate((-self._bucket_values(negative_keys), [0.0], self._bucket_values(positive_keys)))
+            counts = np.concatenate((
+                np.array([self._negative[key] for key in negative_keys.tolist()], dtype=np.int64),
+                [self.zero_count],
+                np.array([self._positive[key] for key in positive_keys.tolist()], dtype=np.int64),
+            ))
+            ranks = np.floor(q * (self.count - 1))
+            result = np.clip(values[np.searchsorted(np.cumsum(counts), ranks, side="right")], self.min, self.max)
+            result = np.where(ranks <= 0, self.min, np.where(ranks >= self.count - 1, self.max, result))
+        return float(result) if result.ndim == 0 else result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable representation of the sketch (see from_dict)."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self._m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero_count": self.zero_count,
+            "positive": sorted(self._positive.items()),
+            "negative": sorted(self._negative.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        """Restores a sketch from its to_dict representation."""
+        sketch = cls(data["relative_accuracy"])
+        if data["count"]:
+            sketch.count, sketch.mean, sketch._m2 = data["count"], data["mean"], data["m2"]
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.zero_count = data["zero_count"]
+        sketch._positive = {int(key): int(count) for key, count in data["positive"]}
+        sketch._negative = {int(key): int(count) for key, count in data["negative"]}
+        return sketch
+
+def _group_value(value):
+    """Group key component as a plain (JSON-serializable) Python value, None for missing values."""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if isinstance(value, float) and math.isnan(value) else value
+    return value
+
+def _long_results(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Results of calculate_nec_compliance_for_solutions with a "code_edition" column: results of several editions
+    (with the EDITION_COLUMNS suffixed with the edition) are stacked into one block per edition.
+    """
+    if "code_edition" in results.columns:
+        return results
+    editions = [column[len("status_"):] for column in results.columns if column.startswith("status_")]
+    if not editions:
+        return results
+    shared = [column for column in results.columns
+              if not any(column == f"{name}_{edition}" for name in EDITION_COLUMNS for edition in editions)]
+    blocks = []
+    for edition in editions:
+        columns = {f"{name}_{edition}": name for name in EDITION_COLUMNS if f"{name}_{edition}" in results.columns}
+        blocks.append(results[shared + list(columns)].rename(columns=columns).assign(code_edition=edition))
+    return pd.concat(blocks, ignore_index=True)
+
+class PortfolioSummary:
+    """
+    QuantileSketch per group of sites and metric. Groups are defined by the values of the group_by columns of the
+    results (e.g. "code_edition"), or else the site_spec keys of the sites (e.g. "utility", "panel_size_A"); sites
+    without a value are grouped under None. Metric values that are NaN (e.g. peak loads of sites without meter
+    data, or of solutions decided by screening) are not counted.
+
+    Example (one summary per shard, merged afterwards):
+        summary = PortfolioSummary(group_by=("panel_size_A", "code_edition"))
+        for site_results in iter_nec_compliance_for_solutions(solutions_df, site_ua_intervals, site_specs):
+            summary.add_solutions(site_results, site_specs)
+        total = PortfolioSummary.read_json("shard_0.json").merge(PortfolioSummary.read_json("shard_1.json"))
+        total.to_frame()
+    """
+
+    def __init__(self, group_by: Sequence[str] = DEFAULT_GROUP_BY, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be between 0 and 1, got {relative_accuracy}")
+        self.group_by = tuple(group_by)
+        self.relative_accuracy = relative_accuracy
+        # (group key tuple, metric) -> QuantileSketch
+        self.sketches: Dict[Tuple[Tuple, str], QuantileSketch] = {}
+
+    def _sketch(self, group: Tuple, metric: str) -> QuantileSketch:
+        key = (group, metric)
+        if key not in self.sketches:
+            self.sketches[key] = QuantileSketch(self.relative_accuracy)
+        return self.sketches[key]
+
+    def add_solutions(self, results: pd.DataFrame, site_specs: Dict[Any, Dict[str, Any]] = None,
+                      site_metrics: Iterable[str] = SITE_METRICS,
+                      solution_metrics: Iterable[str] = SOLUTION_METRICS) -> "PortfolioSummary":
+        """
+        Adds results of calculate_nec_compliance_for_solutions (or a block of its streaming variant, of one or
+        several editions): site_metrics once per site and group, solution_metrics per solution. site_specs provides
+        the group_by values missing from the results. Returns the summary.
+        """
+        results = _long_results(results)
+        site_specs = site_specs or {}
+        group_values = {}
+        for column in self.group_by:
+            if column not in results.columns:
+                values = {site_id: spec.get(column) for site_id, spec in site_specs.items()}
+                group_values[column] = results["site_id"].astype(object).map(values)
+        results = results.assign(**group_values)
+
+        sites = results.drop_duplicates(subset=["site_id", *self.group_by])
+        for frame, metrics in ((sites, site_metrics), (results, solution_metrics)):
+            metrics = [metric for metric in metrics if metric in frame.columns]
+            if not metrics or frame.empty:
+                continue
+            if self.group_by:
+                grouped = frame.groupby(list(self.group_by), dropna=False, sort=False, observed=True)
+            else:
+                grouped = [((), frame)]
+            for group, block in grouped:
+                group = tuple(_group_value(value) for value in (group if isinstance(group, tuple) else (group,)))
+                for metric in metrics:
+                    self._sketch(group, metric).add(block[metric].to_numpy(dtype=float, na_value=np.nan))
+        return self
+
+    def add_capacity(self, summary_results: Dict[str, float], site_spec: Dict[str, Any] = None,
+                     **group_values) -> "PortfolioSummary":
+        """
+        Adds the summary_results of calculate_nec_22087_capacity for one site (CAPACITY_METRICS). The group is
+        taken from group_values, or else from site_spec. Returns the summary.
+        """
+        site_spec = site_spec or {}
+        group = tuple(_group_value(group_values.get(column, site_spec.get(column))) for column in self.group_by)
+        for metric in CAPACITY_METRICS:
+            if metric in summary_results:
+                self._sketch(group, metric).add(summary_results[metric])
+        return self
+
+    def merge(self, other: "PortfolioSummary") -> "PortfolioSummary":
+        """Adds the sketches of another summary with the same grouping; returns the summary."""
+        if other.group_by != self.group_by:
+            raise ValueError(f"Cannot merge summaries grouped by {list(other.group_by)} and {list(self.group_by)}")
+        for (group, metric), sketch in other.sketches.items():
+            self._sketch(group, metric).merge(sketch)
+        return self
+
+    def to_frame(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+        """
+        Report of the summary: one row per group and metric (sorted) with the group_by columns, "metric", "count",
+        "mean", "std", "min", "max" and the quantiles (columns "p5", "p50", ... for quantiles 0.05, 0.5, ...).
+        """
+        quantile_columns = [f"p{100 * q:g}" for q in quantiles]
+        rows = []
+        for (group, metric), sketch in self.sketches.items():
+            values = sketch.quantile(list(quantiles)) if quantiles else []
+            rows.append([*group, metric, sketch.count, sketch.mean if sketch.count else np.nan, sketch.std,
+                         sketch.min if sketch.count else np.nan, sketch.max if sketch.count else np.nan, *values])
+        report = pd.DataFrame(rows, columns=[*self.group_by, "metric", "count", "mean", "std", "min", "max",
+                                             *quantile_columns])
+        return report.sort_values([*self.group_by, "metric"], na_position="first", kind="stable", ignore_index=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable representation of the summary (see from_dict)."""
+        return {
+            "group_by": list(self.group_by),
+            "relative_accuracy": self.relative_accuracy,
+            "sketches": [
+                {"group": list(group), "metric": metric, "sketch": sketch.to_dict()}
+                for (group, metric), sketch in self.sketches.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PortfolioSummary":
+        """Restores a summary from its to_dict representation."""
+        summary = cls(group_by=data["group_by"], relative_accuracy=data["relative_accuracy"])
+        for entry in data["sketches"]:
+            summary.sketches[(tuple(entry["group"]), entry["metric"])] = QuantileSketch.from_dict(entry["sketch"])
+        return summary
+
+    def write_json(self, path):
+        """Atomically writes the summary to path as JSON."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".summary-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def read_json(cls, path) -> "PortfolioSummary":
+        """Reads a summary written by write_json."""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
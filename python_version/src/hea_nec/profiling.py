@@ -0,0 +1,141 @@
+"""
+Memory profiling of the calculation stages (read, prepare, gap detection, peak, summary, solution loads, ...).
+
+hea_nec.methods marks its stages with profile_stage(name); this costs next to nothing unless a MemoryProfiler is
+active. While one is active (with MemoryProfiler() as profiler: ...), the peak memory allocated within each stage
+is measured with tracemalloc and recorded along with the site being processed (marked with profile_stage("site",
+site=site_id)), so that the heaviest sites and stages can be ranked afterwards (MemoryProfiler.report).
+
+Dependencies:
+- pandas: Report tables
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+# The currently active MemoryProfiler (None: profiling disabled)
+_active_profiler = None
+
+@contextmanager
+def profile_stage(name: str, site: Any = None):
+    """Marks a calculation stage (or, with name "site", the processing of a site) for the active MemoryProfiler."""
+    if _active_profiler is None:
+        yield
+        return
+    with _active_profiler.measure(name, site=site):
+        yield
+
+class MemoryProfiler:
+    """
+    Records the peak traced memory of each profiled stage, per site, while active (used as a context manager).
+
+    Peaks are measured relative to the memory allocated when the stage starts, so they show how much a stage
+    itself needs on top of what is already held. Nested stages are supported ("site" contains the stages).
+    """
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self._stack = []
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _active_profiler
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        _active_profiler = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active_profiler
+        _active_profiler = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def measure(self, name: str, site: Any = None):
+        if site is None and self._stack:
+            site = self._stack[-1]["site"]
+
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            # tracemalloc keeps a single peak; save the enclosing stage's peak before resetting it
+            self._stack[-1]["max_seen"] = max(self._stack[-1]["max_seen"], peak)
+        tracemalloc.reset_peak()
+        frame = {"site": site, "start": current, "max_seen": current}
+        self._stack.append(frame)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self._stack.pop()
+            peak = max(frame["max_seen"], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]["max_seen"] = max(self._stack[-1]["max_seen"], peak)
+            self.records.append({
+                "site": site,
+                "stage": name,
+                "peak_MiB": (peak - frame["start"]) / 2**20,
+                "seconds": elapsed,
+            })
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Ranks the recorded measurements.
+
+        Returns:
+            a dict with keys:
+                "records": pandas DataFrame with all measurements (columns "site", "stage", "peak_MiB", "seconds")
+                "sites": the top sites by peak memory of the site as a whole, with their heaviest stage
+                "stages": per stage the number of measurements, the maximum and mean peak, and the site of the maximum
+        """
+        import pandas as pd
+
+        records = pd.DataFrame(self.records, columns=["site", "stage", "peak_MiB", "seconds"])
+
+        site_records = records[records["site"].notna()]
+        # Whole-site measurements where sites were marked, else the stages of each site
+        site_totals = site_records[site_records["stage"] == "site"]
+        if site_totals.empty:
+            site_totals = site_records
+        sites = (
+            site_totals.groupby("site", sort=False)
+            .agg(peak_MiB=("peak_MiB", "max"), seconds=("seconds", "sum"))
+            .sort_values("peak_MiB", ascending=False)
+            .head(top)
+            .reset_index()
+        )
+        heaviest_stage = (
+            site_records[site_records["stage"] != "site"]
+            .sort_values("peak_MiB", ascending=False)
+            .drop_duplicates("site")
+            .set_index("site")["stage"]
+        )
+        sites["heaviest_stage"] = sites["site"].map(heaviest_stage)
+
+        stages = (
+            records.groupby("stage", sort=False)
+            .agg(count=("peak_MiB", "size"), max_peak_MiB=("peak_MiB", "max"), mean_peak_MiB=("peak_MiB", "mean"),
+                 seconds=("seconds", "sum"))
+            .sort_values("max_peak_MiB", ascending=False)
+        )
+        stages["max_site"] = records.loc[records.groupby("stage", sort=False)["peak_MiB"].idxmax(), ["stage", "site"]] \
+            .set_index("stage")["site"]
+
+        return {"records": records, "sites": sites, "stages": stages.reset_index()}
+
+    def print_report(self, top: int = 10, output_path: str = None):
+        """Prints the ranked report, and optionally saves all measurements as CSV."""
+        report = self.report(top=top)
+        print("\n--- MEMORY PROFILE (peak MiB above stage start) ---")
+        print(f"\nHeaviest sites (top {top}):")
+        print(report["sites"].to_string(index=False, float_format="{:.2f}".format))
+        print("\nStages:")
+        print(report["stages"].to_string(index=False, float_format="{:.2f}".format))
+        if output_path:
+            report["records"].to_csv(output_path, index=False)
+            print(f"\nAll measurements saved to: {output_path}")
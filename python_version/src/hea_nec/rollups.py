@@ -0,0 +1,175 @@
+"""
+Persisted hourly rollups of meter data.
+
+Repeated calculations on the same meter data (peak load, summary details, rolling windows, coincident peaks) only
+need the hourly rollup of build_hourly_rollup, with a quarter of the rows of 15-minute data. load_hourly_rollup
+keeps each meter file's rollup in a small CSV file next to it (or at a given path) and rebuilds it only when the
+meter data changed: a rollup file records the fingerprint of its source (a hash of the meter file's content, the
+evaluated channel and timezone, and ROLLUP_VERSION), which is checked against the meter file on every load.
+
+Example:
+    rollup = load_hourly_rollup("meter.csv", site_spec)   # builds and writes meter.csv.rollup on the first call
+    peak_kw = get_peak_hourly_load(rollup)                 # same result as for the prepared meter data
+
+Rollup files are CSV files with one row per hour and a first comment line with the rollup metadata (JSON).
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from typing import Any, Dict, Union
+
+import pandas as pd
+
+from .methods import HOURLY_ROLLUP_COLUMNS, ROLLUP_VERSION, _prepare_site_intervals, build_hourly_rollup
+from .sniffing import read_meter_file, split_archive_path
+
+ROLLUP_SUFFIX = ".rollup"
+
+METADATA_PREFIX = "# hea_nec hourly rollup "
+
+def meter_data_fingerprint(
+    source: Union[str, os.PathLike, bytes, pd.DataFrame],
+    channel: str = None,
+    timezone: str = None
+) -> str:
+    """
+    Fingerprint of meter data as input of build_hourly_rollup: a SHA-256 hash of the content of the meter file
+    (path or bytes) or DataFrame, the evaluated channel, the timezone used for timestamps without one and
+    ROLLUP_VERSION, so that a rollup is rebuilt whenever any of them changes. Compressed files are hashed as they
+    are stored; for zip archive members ("<archive>::<member>"), the member's CRC-32 and size recorded in the
+    archive are hashed instead of its content, so that the member is not decompressed.
+    """
+    digest = hashlib.sha256(f"hea_nec-hourly-rollup/{ROLLUP_VERSION}|{channel}|{timezone}\n".encode("utf-8"))
+    if isinstance(source, pd.DataFrame):
+        digest.update(json.dumps([str(column) for column in source.columns]).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(source, index=False).to_numpy().tobytes())
+    elif isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    elif split_archive_path(source)[1] is not None:
+        archive, member = split_archive_path(source)
+        with zipfile.ZipFile(archive) as zip_file:
+            info = zip_file.getinfo(member)
+        digest.update(f"zip member|{member}|{info.CRC:08x}|{info.file_size}".encode("utf-8"))
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return "sha256:" + digest.hexdigest()
+
+def default_rollup_path(meter_path: Union[str, os.PathLike]) -> str:
+    """
+    Path of the rollup file of a meter file: the meter file's path with ROLLUP_SUFFIX appended, or for a zip archive
+    member ("<archive>::<member>"), a file next to the archive named after the archive and the member.
+    """
+    archive, member = split_archive_path(meter_path)
+    if member is None:
+        return archive + ROLLUP_SUFFIX
+    return f"{archive}.{member.replace('/', '_')}{ROLLUP_SUFFIX}"
+
+def _format_timestamp(timestamp: pd.Timestamp) -> str:
+    return None if timestamp is None else timestamp.isoformat()
+
+def _parse_timestamps(values, tz: str):
+    if tz is None:
+        return pd.DatetimeIndex(pd.to_datetime(values)).as_unit("ns")
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).tz_convert(tz).as_unit("ns")
+
+def write_hourly_rollup(rollup: pd.DataFrame, path: str):
+    """Writes an hourly rollup (with its attrs, e.g. the "source_fingerprint") to path, atomically."""
+    tz = rollup.index.tz
+    metadata = dict(
+        rollup.attrs,
+        timezone=None if tz is None else str(tz),
+        first_reading=_format_timestamp(rollup.attrs.get("first_reading")),
+        last_reading=_format_timestamp(rollup.attrs.get("last_reading")),
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rollup-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(METADATA_PREFIX + json.dumps(metadata) + "\n")
+            # Compact columns: the time of the maximum reading as seconds into the hour, the flag as 0/1
+            rollup.assign(
+                kWh_max_time=((rollup["kWh_max_time"].array - rollup.index) // pd.Timedelta(seconds=1)).astype(int),
+                identical=rollup["identical"].astype(int),
+            )[HOURLY_ROLLUP_COLUMNS].to_csv(f, date_format="%Y-%m-%dT%H:%M:%S%z")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def read_hourly_rollup(path: str) -> pd.DataFrame:
+    """
+    Reads an hourly rollup written by write_hourly_rollup.
+
+    Raises:
+        ValueError: If the file is not an hourly rollup or was written for another ROLLUP_VERSION.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        first_line = f.readline()
+        if not first_line.startswith(METADATA_PREFIX):
+            raise ValueError(f"{path} is not an hourly rollup file.")
+        metadata = json.loads(first_line[len(METADATA_PREFIX):])
+        if metadata.get("rollup_version") != ROLLUP_VERSION:
+            raise ValueError(f"{path} has rollup version {metadata.get('rollup_version')}, expected {ROLLUP_VERSION}.")
+        rollup = pd.read_csv(
+            io.StringIO(f.read()),
+            dtype={"hour_start": str, "kWh_max": float, "kWh_max_time": "int64", "kWh_sum": float,
+                   "readings": "int32", "identical": bool, "interval_minutes": "int8"},
+            float_precision="round_trip",
+        )
+
+    tz = metadata.pop("timezone")
+    hours = _parse_timestamps(rollup.pop("hour_start"), tz)
+    rollup["kWh_max_time"] = hours + pd.to_timedelta(rollup["kWh_max_time"].to_numpy(), unit="s")
+    rollup = rollup.set_index(pd.Index(hours, name="hour_start"))
+    for key in ("first_reading", "last_reading"):
+        metadata[key] = None if metadata[key] is None else _parse_timestamps([metadata[key]], tz)[0]
+    rollup.attrs = metadata
+    return rollup
+
+def load_hourly_rollup(
+    meter_path: str,
+    site_spec: Dict[str, Any] = None,
+    channel: str = None,
+    rollup_path: str = None,
+    descriptor: Dict[str, Any] = None
+) -> pd.DataFrame:
+    """
+    Returns the hourly rollup (see build_hourly_rollup) of a meter file, read from rollup_path (default: see
+    default_rollup_path) if it was built from the same meter data, or else built from the meter
+    file and written to rollup_path. The rollup's attrs include the "source_fingerprint" (see meter_data_fingerprint).
+
+    Args:
+        meter_path: path of the meter data file (also of a compressed file or zip archive member, see
+            hea_nec.sniffing.open_meter_file)
+        site_spec: (optional) the site's specification; its "timezone" is used as in calculate_nec_22087_capacity
+        channel: (optional) meter channel to evaluate, see calculate_nec_22087_capacity
+        rollup_path: (optional) path of the rollup file
+        descriptor: (optional) format descriptor of the meter file (see hea_nec.sniffing)
+
+    Raises:
+        ValueError: If the meter data format is not recognized.
+    """
+    site_spec = site_spec or {}
+    rollup_path = rollup_path or default_rollup_path(meter_path)
+    fingerprint = meter_data_fingerprint(meter_path, channel=channel, timezone=site_spec.get("timezone"))
+
+    if os.path.exists(rollup_path):
+        try:
+            rollup = read_hourly_rollup(rollup_path)
+            if rollup.attrs.get("source_fingerprint") == fingerprint:
+                return rollup
+        except (ValueError, KeyError, pd.errors.ParserError):
+            pass  # Outdated or damaged rollup file; rebuild it
+
+    meter_df = read_meter_file(meter_path, descriptor, channel=channel)
+    rollup = build_hourly_rollup(_prepare_site_intervals(meter_df, site_spec, channel))
+    rollup.attrs["source_fingerprint"] = fingerprint
+    write_hourly_rollup(rollup, rollup_path)
+    return rollup
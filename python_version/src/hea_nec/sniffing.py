@@ -0,0 +1,269 @@
+"""
+Header-only format sniffing of meter data files.
+
+sniff_meter_file reads only the first few KB of a file to classify its format from the header line, and rejects
+files the calculator cannot process (unknown columns, utility exports with a preamble, binary or empty files) with
+the same ValueError _prepare_ua_intervals would raise, but without parsing the whole file first. It returns a format
+descriptor (dict) with the read_csv parameters for the file, which read_meter_file reuses for the full parse
+(reading only the columns needed).
+
+Example:
+    descriptor = sniff_meter_file("meter.csv")     # ValueError for unsupported files
+    df = read_meter_file("meter.csv", descriptor)  # DataFrame for calculate_nec_22087_capacity
+
+Meter files may also be gzip-compressed (".gz") or members of a zip archive, addressed as
+"<archive>.zip::<member>" (ARCHIVE_MEMBER_SEPARATOR); expand_meter_paths lists the CSV members of zip archives.
+They are decompressed while they are read (only the first few KB for sniffing), without extracting them to disk:
+    for path in expand_meter_paths(["export.zip"]):  # e.g. "export.zip::meters/site_1.csv"
+        df = read_meter_file(path)
+
+Dependencies:
+- pandas: read_meter_file only (sniffing, also with a meter channel, does not import it)
+"""
+
+import csv
+import gzip
+import io
+import os
+import zipfile
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from .metrics import ERRORS
+
+# Number of bytes read to find and classify the header line
+SNIFF_BYTES = 8192
+
+# Timestamp and reading columns of the supported formats, in order of precedence
+FORMAT_COLUMNS = (
+    ("UtilityAPI", "interval_start", "interval_kWh"),
+    ("Simple CSV", "DateTime", "kWh"),
+)
+
+# Meter channels of net-metered (e.g. solar) sites: energy imported from and exported to the grid, and the net
+CHANNELS = ("import", "export", "net")
+
+# Source column names for each channel, as found in UtilityAPI files and utility PV exports
+CHANNEL_COLUMNS = {
+    "import": ("fwd_kWh", "Consumption", "IMPORT (kWh)"),
+    "export": ("rev_kWh", "Generation", "EXPORT (kWh)"),
+    "net": ("net_kWh", "Net"),
+}
+
+TIMEZONE_COLUMN = "interval_timezone"
+
+# First cells of utility exports that are not supported directly (as opposed to their UtilityAPI equivalent)
+UNSUPPORTED_SIGNATURES = (
+    ("Name", "PG&E or SDG&E export"),
+    ("Energy Usage Information", "SCE export"),
+)
+
+FORMAT_NOT_RECOGNIZED = (
+    "CSV format not recognized. Required columns are either ('DateTime', 'kWh') or ('interval_start', 'interval_kWh')."
+)
+
+# Separates the path of a zip archive from the name of a member in meter file paths ("export.zip::site_1.csv")
+ARCHIVE_MEMBER_SEPARATOR = "::"
+
+# Members of zip archives listed by expand_meter_paths
+ARCHIVE_MEMBER_EXTENSIONS = (".csv",)
+
+def split_archive_path(path: Union[str, os.PathLike]) -> Tuple[str, str]:
+    """Splits a meter file path into the path of the zip archive and the member name, or (path, None)."""
+    path = os.fspath(path)
+    archive, separator, member = path.partition(ARCHIVE_MEMBER_SEPARATOR)
+    return (archive, member) if separator else (path, None)
+
+def _is_zip_path(path: str) -> bool:
+    return path.lower().endswith(".zip")
+
+def _archive_members(zip_file: zipfile.ZipFile) -> List[str]:
+    # Meter files in the archive, without directories and macOS resource forks
+    return [
+        info.filename for info in zip_file.infolist()
+        if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        and not os.path.basename(info.filename).startswith(".")
+        and info.filename.lower().endswith(ARCHIVE_MEMBER_EXTENSIONS)
+    ]
+
+def is_compressed_path(path: Union[str, os.PathLike]) -> bool:
+    """True for paths of zip archive members, zip archives and gzip-compressed files."""
+    archive, member = split_archive_path(path)
+    return member is not None or _is_zip_path(archive) or archive.lower().endswith(".gz")
+
+def expand_meter_paths(paths: Sequence[Union[str, os.PathLike]]) -> List[str]:
+    """
+    Replaces the paths of zip archives in paths by the paths of their CSV members ("<archive>::<member>", in archive
+    order); other paths, and damaged archives (reported when they are opened), are kept as they are. Only the
+    archive's central directory is read.
+    """
+    expanded = []
+    for path in paths:
+        path = os.fspath(path)
+        archive, member = split_archive_path(path)
+        if member is None and _is_zip_path(archive) and zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive) as zip_file:
+                expanded += [f"{archive}{ARCHIVE_MEMBER_SEPARATOR}{name}" for name in _archive_members(zip_file)]
+        else:
+            expanded.append(path)
+    return expanded
+
+def meter_file_exists(path: Union[str, os.PathLike]) -> bool:
+    """True if the meter file (or zip archive member) exists."""
+    archive, member = split_archive_path(path)
+    if member is None or not os.path.isfile(archive):
+        return os.path.isfile(archive)
+    try:
+        with zipfile.ZipFile(archive) as zip_file:
+            zip_file.getinfo(member)
+    except (zipfile.BadZipFile, KeyError):
+        return False
+    return True
+
+def open_meter_file(path: Union[str, os.PathLike]) -> io.BufferedIOBase:
+    """
+    Opens a meter file for reading as binary file object, decompressing zip archive members ("<archive>::<member>",
+    or the only CSV member of a zip archive) and gzip-compressed files (".gz") as they are read.
+
+    Raises:
+        FileNotFoundError: If the file or archive member does not exist.
+        ValueError: If a zip archive is damaged, or is given without member and does not hold exactly one CSV file.
+    """
+    archive, member = split_archive_path(path)
+    if member is None and not _is_zip_path(archive):
+        return gzip.open(archive, "rb") if archive.lower().endswith(".gz") else open(archive, "rb")
+
+    try:
+        zip_file = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"{archive} is not a valid zip archive: {e}") from None
+    # The member stays readable after the archive is closed (it holds its own reference to the archive file)
+    with zip_file:
+        if member is None:
+            members = _archive_members(zip_file)
+            if len(members) != 1:
+                raise ValueError(f"Zip archive {archive} holds {len(members)} CSV files; "
+                                 f"select one as {archive}{ARCHIVE_MEMBER_SEPARATOR}<member>.")
+            member = members[0]
+        try:
+            return zip_file.open(member)
+        except KeyError:
+            raise FileNotFoundError(f"No member {member} in zip archive {archive}") from None
+
+def _read_head(source: Union[str, os.PathLike, io.IOBase], sample_bytes: int) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:sample_bytes])
+    if hasattr(source, "read"):
+        position = source.tell()
+        head = source.read(sample_bytes)
+        source.seek(position)
+        return head.encode("utf-8") if isinstance(head, str) else head
+    with open_meter_file(source) as f:
+        return f.read(sample_bytes)
+
+def _reject(message: str, file_format: str = "unrecognized"):
+    ERRORS.inc(format=file_format)
+    raise ValueError(message)
+
+def sniff_meter_file(
+    source: Union[str, os.PathLike, io.IOBase, bytes],
+    channel: str = None,
+    sample_bytes: int = SNIFF_BYTES
+) -> Dict[str, Any]:
+    """
+    Classifies a meter data file from its first sample_bytes bytes.
+
+    Args:
+        source: path of the file (also of a compressed file or zip archive member, see open_meter_file), a seekable
+            binary or text file object (its position is restored), or the content
+        channel: (optional) meter channel that will be evaluated (see calculate_nec_22087_capacity); with a channel,
+            files without a kWh column are accepted if they have import/export/net channel columns
+        sample_bytes: number of bytes to read (the header line must be complete within them)
+
+    Returns:
+        a format descriptor dict with keys:
+            "format": "UtilityAPI" or "Simple CSV"
+            "encoding": "utf-8-sig" (also strips a byte order mark) or "latin-1"
+            "columns": all column names of the header
+            "usecols": the columns needed for the calculation, to pass to pandas.read_csv
+            "timestamp_column": name of the timestamp column
+
+    Raises:
+        ValueError: If the format is not recognized (as raised by the calculation for such files).
+    """
+    head = _read_head(source, sample_bytes)
+    if not head.strip():
+        _reject("Meter data file is empty.")
+    if b"\x00" in head:
+        _reject("Meter data file is not a CSV text file.")
+
+    try:
+        text = head.decode("utf-8-sig")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:
+            text = head.decode("latin-1")
+            encoding = "latin-1"
+        else:
+            # A multi-byte character cut off at the end of the sample
+            text = head[:e.start].decode("utf-8-sig")
+            encoding = "utf-8-sig"
+
+    lines = text.splitlines()
+    if len(lines) < 2 and len(head) >= sample_bytes:
+        _reject(f"Meter data file has no complete header line within the first {sample_bytes} bytes.")
+    columns: List[str] = [column.strip() for column in next(csv.reader(lines[:1]))]
+
+    for file_format, timestamp_column, kwh_column in FORMAT_COLUMNS:
+        if timestamp_column not in columns:
+            continue
+        usecols = [timestamp_column]
+        if kwh_column in columns:
+            usecols.append(kwh_column)
+        elif channel is None:
+            continue
+        if channel is not None:
+            usecols += [c for names in CHANNEL_COLUMNS.values() for c in names if c in columns and c not in usecols]
+            if len(usecols) == 1:
+                _reject("CSV format not recognized. No kWh, import/export or net meter channel found.", file_format)
+        if TIMEZONE_COLUMN in columns:
+            usecols.append(TIMEZONE_COLUMN)
+        return {
+            "format": file_format,
+            "encoding": encoding,
+            "columns": columns,
+            "usecols": usecols,
+            "timestamp_column": timestamp_column,
+        }
+
+    for first_cell, description in UNSUPPORTED_SIGNATURES:
+        if columns and columns[0] == first_cell:
+            _reject(f"{FORMAT_NOT_RECOGNIZED} The file looks like a {description}; "
+                    "please use the interval data from UtilityAPI instead.", description)
+    _reject(FORMAT_NOT_RECOGNIZED)
+
+def read_meter_file(
+    source: Union[str, os.PathLike, io.IOBase, bytes],
+    descriptor: Dict[str, Any] = None,
+    channel: str = None
+):
+    """
+    Reads a meter data file as pandas DataFrame with the columns needed for the calculation, using the format
+    descriptor of sniff_meter_file (sniffed first if not given, rejecting unsupported files before the full parse).
+    Compressed files and zip archive members are decompressed while they are parsed (see open_meter_file).
+    """
+    import pandas as pd
+
+    if descriptor is None:
+        descriptor = sniff_meter_file(source, channel=channel)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    read_csv_kwargs = dict(
+        encoding=descriptor["encoding"],
+        usecols=descriptor["usecols"],
+        # Timestamps are parsed by the calculation (with format='mixed'); avoid type inference on them
+        dtype={descriptor["timestamp_column"]: str},
+    )
+    if isinstance(source, (str, os.PathLike)) and is_compressed_path(source):
+        with open_meter_file(source) as f:
+            return pd.read_csv(f, **read_csv_kwargs)
+    return pd.read_csv(source, **read_csv_kwargs)
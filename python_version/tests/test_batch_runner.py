@@ -0,0 +1,266 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import calculate_solutions
+from calculate_solutions import MANIFEST_FILE, SQLiteResultWriter, merge_shard_files, open_result_writer, run_sharded
+from hea_nec.methods import SCREENING_COLUMNS, calculate_nec_compliance_for_solutions
+from hea_nec.portfolio import PortfolioSummary
+
+class TestShardedRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.checkpoint_dir = os.path.join(self.tmp_dir, 'checkpoints')
+
+        self.meter_paths = {}
+        self.site_specs = {}
+        rows = []
+        for i in range(5):
+            site_id = str(i)
+            meter_path = os.path.join(self.tmp_dir, f'meter_{i}.csv')
+            pd.DataFrame({
+                'DateTime': pd.date_range('2023-01-01', periods=24, freq='h').strftime('%Y-%m-%d %H:%M:%S'),
+                'kWh': np.full(24, 1.0 + i)
+            }).to_csv(meter_path, index=False)
+            self.meter_paths[site_id] = meter_path
+            self.site_specs[site_id] = {"panel_size_A": 100.0, "panel_voltage_V": 240.0}
+            rows.append([site_id, 101, 1, 'new', 'cooling', 1500, 1])
+        self.solutions_df = pd.DataFrame(rows, columns=[
+            "site_id", "equipment_combo_id", "load_control_combo_id", "load_status", "generic_device",
+            "load_nameplate_power", "load_count"
+        ])
+        self.config = {"code_edition": "2023", "hourly_safety_factor": 1.3, "channel": None}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_shards(self, **kwargs):
+        return run_sharded(self.solutions_df, self.meter_paths, self.site_specs, self.checkpoint_dir,
+                           self.config, shard_size=2, **kwargs)
+
+    def test_shards_and_merge(self):
+        manifest, shard_files = self.run_shards()
+        self.assertEqual(len(shard_files), 3)
+        self.assertTrue(all(shard['status'] == 'done' for shard in manifest['shards'].values()))
+
+        output_path = os.path.join(self.tmp_dir, 'results.csv')
+        merge_shard_files(shard_files, output_path)
+        result = pd.read_csv(output_path, dtype={'site_id': str})
+        self.assertEqual(result['site_id'].tolist(), ['0', '1', '2', '3', '4'])
+        self.assertEqual(result['status'].tolist(), ['PASS'] * 5)
+
+    def test_resume_redoes_only_failed_shards(self):
+        original_run_shard = calculate_solutions._run_shard
+
+        def failing_run_shard(shard_path, *args):
+            if shard_path.endswith('shard_00001.csv'):
+                raise RuntimeError('worker died')
+            return original_run_shard(shard_path, *args)
+
+        with patch('calculate_solutions._run_shard', side_effect=failing_run_shard):
+            manifest, _ = self.run_shards()
+        self.assertEqual(manifest['shards']['00001']['status'], 'failed')
+        self.assertEqual(manifest['shards']['00000']['status'], 'done')
+
+        with patch('calculate_solutions._run_shard', side_effect=original_run_shard) as run_shard:
+            manifest, _ = self.run_shards()
+        self.assertEqual(run_shard.call_count, 1)
+        self.assertTrue(all(shard['status'] == 'done' for shard in manifest['shards'].values()))
+
+        with open(os.path.join(self.checkpoint_dir, MANIFEST_FILE)) as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_resume_with_fewer_sites(self):
+        original_run_shard = calculate_solutions._run_shard
+
+        def failing_run_shard(shard_path, *args):
+            if shard_path.endswith('shard_00002.csv'):
+                raise RuntimeError('worker died')
+            return original_run_shard(shard_path, *args)
+
+        with patch('calculate_solutions._run_shard', side_effect=failing_run_shard):
+            manifest, _ = self.run_shards()
+        self.assertEqual(manifest['shards']['00002']['status'], 'failed')
+
+        # Site 4 (the failed shard) is no longer in the solutions
+        self.solutions_df = self.solutions_df[self.solutions_df['site_id'] != '4']
+        manifest, shard_files = self.run_shards(workers=2)
+        self.assertEqual(sorted(manifest['shards']), ['00000', '00001'])
+        self.assertTrue(all(shard['status'] == 'done' for shard in manifest['shards'].values()))
+        self.assertEqual(len(shard_files), 2)
+
+    def test_config_mismatch(self):
+        self.run_shards()
+        self.config["code_edition"] = "2026"
+        with self.assertRaises(ValueError):
+            self.run_shards()
+
+    def test_parallel_workers(self):
+        manifest, shard_files = self.run_shards(workers=2)
+        self.assertEqual(sum(shard['rows'] for shard in manifest['shards'].values()), 5)
+
+    def test_hourly_rollups(self):
+        _, shard_files = self.run_shards()
+        expected = pd.concat([pd.read_csv(f) for f in shard_files], ignore_index=True)
+
+        self.config["hourly_rollups"] = True
+        _, shard_files = run_sharded(self.solutions_df, self.meter_paths, self.site_specs,
+                                     os.path.join(self.tmp_dir, 'rollup_run'), self.config, shard_size=2)
+        result = pd.concat([pd.read_csv(f) for f in shard_files], ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertTrue(all(os.path.exists(path + '.rollup') for path in self.meter_paths.values()))
+
+    def test_portfolio_summary(self):
+        self.config["portfolio_summary"] = True
+        _, shard_files = self.run_shards()
+        summary = calculate_solutions.merge_shard_summaries(shard_files, os.path.join(self.tmp_dir, 'summary.json'))
+        results = pd.concat([pd.read_csv(f, dtype={'site_id': str, 'code_edition': str}) for f in shard_files],
+                            ignore_index=True)
+        expected = PortfolioSummary().add_solutions(results, self.site_specs)
+        pd.testing.assert_frame_equal(summary.to_frame(), expected.to_frame())
+        self.assertEqual(PortfolioSummary.read_json(os.path.join(self.tmp_dir, 'summary.json')).to_dict(),
+                         summary.to_dict())
+
+    def test_merge_into_sqlite(self):
+        _, shard_files = self.run_shards()
+        output_path = os.path.join(self.tmp_dir, 'results.sqlite')
+        merge_shard_files(shard_files, output_path, run_config=self.config)
+        with sqlite3.connect(output_path) as conn:
+            rows = conn.execute("SELECT site_id, status FROM results ORDER BY site_id").fetchall()
+        self.assertEqual(rows, [(str(i), 'PASS') for i in range(5)])
+
+class TestSQLiteResultWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'results.sqlite')
+
+        dates = pd.date_range('2023-01-01', periods=48, freq='h')
+        self.meter_data = {
+            # 5 hours missing in site B's meter data
+            site_id: pd.DataFrame({'DateTime': dates.delete(range(10, 10 + 5 * i)), 'kWh': 5.0 * (i + 1)})
+            for i, site_id in enumerate(['A', 'B'])
+        }
+        self.site_specs = {'A': {'panel_size_A': 100.0}, 'B': {'panel_size_A': 100.0}, 'C': {'panel_size_A': 100.0}}
+        self.solutions_df = pd.DataFrame([
+            [site_id, combo, 1, 'new', 'cooling', 1500 * combo, 1]
+            for site_id in ['A', 'B', 'C'] for combo in [1, 2]
+        ], columns=[
+            "site_id", "equipment_combo_id", "load_control_combo_id", "load_status", "generic_device",
+            "load_nameplate_power", "load_count"
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def evaluate(self, **kwargs):
+        return calculate_nec_compliance_for_solutions(self.solutions_df, self.meter_data, self.site_specs, **kwargs)
+
+    def query(self, sql, *params):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def test_results_peaks_and_gaps(self):
+        results = self.evaluate(detect_gaps=True)
+        with open_result_writer(self.path, run_config={'code_edition': '2023'}) as writer:
+            self.assertIsInstance(writer, SQLiteResultWriter)
+            for _, site_results in results.groupby('site_id'):
+                writer.write(site_results)
+        self.assertEqual(writer.rows, 6)
+
+        stored = pd.read_sql_query("SELECT * FROM results ORDER BY site_id, equipment_combo_id",
+                                   sqlite3.connect(self.path))
+        pd.testing.assert_frame_equal(
+            stored.drop(columns=['run_id'] + SCREENING_COLUMNS), results.drop(columns=['gap_count', 'missing_intervals', 'longest_gap_hours']),
+            check_dtype=False
+        )
+
+        self.assertEqual(self.query("SELECT site_id, historical_peak_kw FROM site_peaks ORDER BY site_id"),
+                         [('A', 6.5), ('B', 13.0), ('C', None)])
+        self.assertEqual(self.query("SELECT site_id, gap_count, missing_intervals, longest_gap_hours "
+                                    "FROM gap_summaries ORDER BY site_id"),
+                         [('A', 0, 0, 0.0), ('B', 1, 5, 5.0)])
+        self.assertEqual(self.query("SELECT config FROM runs"), [('{"code_edition": "2023"}',)])
+
+    def test_append_across_runs(self):
+        with SQLiteResultWriter(self.path, batch_rows=1) as writer:
+            writer.write(self.evaluate())
+        self.site_specs['A'] = {'panel_size_A': 30.0}
+        self.solutions_df = self.solutions_df[self.solutions_df['site_id'] == 'A']
+        with SQLiteResultWriter(self.path) as writer:
+            writer.write(self.evaluate())
+        self.assertEqual(writer.run_id, 2)
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM results"), [(8,)])
+        # The latest results of each site: site A from the second run, sites B and C from the first
+        self.assertEqual(
+            self.query("SELECT site_id, run_id, status FROM latest_results WHERE equipment_combo_id = 1 "
+                       "ORDER BY site_id"),
+            [('A', 2, 'FAIL'), ('B', 1, 'PASS'), ('C', 1, 'Error')]
+        )
+        self.assertEqual(self.query("SELECT DISTINCT site_id FROM latest_results WHERE headroom_amps < 15"), [('A',)])
+
+    def test_screened_results(self):
+        results = self.evaluate(screen=True)
+        with SQLiteResultWriter(self.path) as writer:
+            writer.write(results)
+        stored = pd.read_sql_query("SELECT * FROM results ORDER BY site_id, equipment_combo_id",
+                                   sqlite3.connect(self.path))
+        pd.testing.assert_frame_equal(stored[SCREENING_COLUMNS].astype(float),
+                                      results[SCREENING_COLUMNS].astype(float).reset_index(drop=True))
+
+    def test_database_without_screening_columns(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.executescript(calculate_solutions.SQLITE_SCHEMA.replace(
+                ",\n    peak_lower_bound_kw REAL,\n    peak_upper_bound_kw REAL,\n    screened INTEGER", ""))
+        self.assertNotIn('screened', [row[1] for row in self.query("PRAGMA table_info(results)")])
+        with SQLiteResultWriter(self.path) as writer:
+            writer.write(self.evaluate(screen=True))
+        self.assertEqual(self.query("SELECT COUNT(*) FROM results WHERE screened IS NOT NULL"), [(6,)])
+
+    def test_cli_screen_into_sqlite(self):
+        sites = []
+        for site_id, meter_df in self.meter_data.items():
+            meter_path = os.path.join(self.tmp_dir, f'meter_{site_id}.csv')
+            meter_df.to_csv(meter_path, index=False)
+            sites.append({'site_id': site_id, 'panel_size_A': 100.0, 'meter_csv_path': meter_path})
+        sites_path = os.path.join(self.tmp_dir, 'sites.csv')
+        solutions_path = os.path.join(self.tmp_dir, 'solutions.csv')
+        pd.DataFrame(sites).to_csv(sites_path, index=False)
+        self.solutions_df[self.solutions_df['site_id'] != 'C'].to_csv(solutions_path, index=False)
+
+        argv = ['calculate_solutions.py', '--sites', sites_path, '--solutions', solutions_path, '--screen',
+                '--output', self.path]
+        with patch('sys.argv', argv), redirect_stdout(StringIO()):
+            calculate_solutions.main()
+
+        expected = self.evaluate(screen=True)
+        expected = expected[expected['site_id'] != 'C'].reset_index(drop=True)
+        stored = pd.read_sql_query("SELECT * FROM results ORDER BY site_id, equipment_combo_id",
+                                   sqlite3.connect(self.path))
+        self.assertEqual(stored['screened'].tolist(), expected['screened'].astype(int).tolist())
+        np.testing.assert_allclose(stored['peak_lower_bound_kw'], expected['peak_lower_bound_kw'])
+        np.testing.assert_allclose(stored['peak_upper_bound_kw'], expected['peak_upper_bound_kw'])
+
+    def test_queries_use_indexes(self):
+        with SQLiteResultWriter(self.path) as writer:
+            writer.write(self.evaluate())
+        for sql in ["SELECT * FROM results WHERE site_id = 'A' AND status = 'FAIL'",
+                    "SELECT * FROM results WHERE status = 'FAIL'",
+                    "SELECT * FROM results WHERE equipment_combo_id = 1 AND load_control_combo_id = 1",
+                    "SELECT * FROM results WHERE headroom_amps < 20"]:
+            plan = " ".join(row[-1] for row in self.query("EXPLAIN QUERY PLAN " + sql))
+            self.assertIn("USING INDEX", plan, sql)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import unittest
+import pandas as pd
+import numpy as np
+
+from hea_nec.methods import (
+    _prepare_channel_intervals,
+    _prepare_ua_intervals,
+    calculate_nec_22087_capacity,
+    get_peak_hourly_load,
+    get_peak_hourly_load_by_channel,
+)
+
+UA_SAMPLE_3 = os.path.join(os.path.dirname(__file__), '..', '..', 'test_data', 'UtilityAPI data', 'UA_Sample_3.csv')
+
+class TestMeterChannels(unittest.TestCase):
+
+    def setUp(self):
+        # UtilityAPI style hourly data of a solar site
+        self.ua_df = pd.DataFrame({
+            'interval_start': ['8/25/25 12:00', '8/25/25 13:00', '8/25/25 14:00', '8/25/25 15:00'],
+            'interval_kWh': [-0.5, -0.2, 0.3, 1.0],
+            'fwd_kWh': [0.1, 0.2, 0.6, 1.2],
+            'rev_kWh': [0.6, 0.4, 0.3, 0.2],
+            'net_kWh': [-0.5, -0.2, 0.3, 1.0],
+        })
+
+    def test_utilityapi_channels(self):
+        df, file_format = _prepare_channel_intervals(self.ua_df)
+        self.assertEqual(file_format, 'UtilityAPI')
+        self.assertEqual(list(df.columns), ['DateTime', 'kWh_import', 'kWh_export', 'kWh_net'])
+        np.testing.assert_allclose(df['kWh_import'], [0.1, 0.2, 0.6, 1.2])
+        np.testing.assert_allclose(df['kWh_export'], [0.6, 0.4, 0.3, 0.2])
+
+    def test_pv_export_columns(self):
+        raw = pd.DataFrame({
+            'DateTime': ['2025-02-01 12:00', '2025-02-01 12:15'],
+            'Consumption': [0.2, 0.1],
+            'Generation': [0.0, 0.3],
+        })
+        df, _ = _prepare_channel_intervals(raw)
+        np.testing.assert_allclose(df['kWh_net'], [0.2, -0.2])
+
+    def test_net_only_is_split(self):
+        raw = pd.DataFrame({'DateTime': ['2025-02-01 12:00', '2025-02-01 13:00'], 'kWh': [0.5, -0.4]})
+        df, _ = _prepare_channel_intervals(raw)
+        np.testing.assert_allclose(df['kWh_import'], [0.5, 0.0])
+        np.testing.assert_allclose(df['kWh_export'], [0.0, 0.4])
+
+    def test_peaks_by_channel_match_single_channel(self):
+        df, _ = _prepare_channel_intervals(self.ua_df)
+        peaks = get_peak_hourly_load_by_channel(df)
+        for channel in ('import', 'export', 'net'):
+            single = df[['DateTime', f'kWh_{channel}']].rename(columns={f'kWh_{channel}': 'kWh'})
+            self.assertAlmostEqual(peaks[channel], get_peak_hourly_load(single))
+        self.assertAlmostEqual(peaks['import'], 1.2 * 1.3)
+
+    def test_capacity_on_import_channel(self):
+        site_spec = {'panel_size_A': 100, 'panel_voltage_V': 240}
+        detailed_results, summary_results = calculate_nec_22087_capacity(self.ua_df, site_spec, channel='import')
+        self.assertAlmostEqual(summary_results['peak_hourly_load_kW'], 1.2 * 1.3)
+        self.assertAlmostEqual(detailed_results['channel_peaks_kW']['export'], 0.6 * 1.3)
+
+        _, summary_results = calculate_nec_22087_capacity(self.ua_df, site_spec)
+        self.assertAlmostEqual(summary_results['peak_hourly_load_kW'], 1.0 * 1.3)
+
+    def test_interval_timezone_is_honored(self):
+        self.ua_df['interval_timezone'] = 'US/Mountain'
+        df, _ = _prepare_ua_intervals(self.ua_df)
+        self.assertEqual(str(df['DateTime'].dt.tz), 'US/Mountain')
+        self.assertEqual(df['DateTime'].iloc[0], pd.Timestamp('2025-08-25 18:00:00', tz='UTC'))
+
+        df, _ = _prepare_channel_intervals(self.ua_df)
+        self.assertEqual(str(df['DateTime'].dt.tz), 'US/Mountain')
+
+    def test_site_timezone(self):
+        df, _ = _prepare_ua_intervals(self.ua_df, tz='America/New_York')
+        self.assertEqual(df['DateTime'].iloc[0], pd.Timestamp('2025-08-25 16:00:00', tz='UTC'))
+
+        df, _ = _prepare_ua_intervals(self.ua_df)
+        self.assertIsNone(df['DateTime'].dt.tz)
+
+    def test_empty_channel_columns(self):
+        # UA_Sample_3 is a net meter export whose fwd_kWh and rev_kWh columns are empty
+        raw = pd.read_csv(UA_SAMPLE_3)
+        site_spec = {'panel_size_A': 100, 'panel_voltage_V': 240}
+        _, expected = calculate_nec_22087_capacity(raw, site_spec)
+        for channel in ('import', 'net'):
+            with self.subTest(channel=channel):
+                _, summary_results = calculate_nec_22087_capacity(raw, site_spec, channel=channel)
+                self.assertAlmostEqual(summary_results['peak_hourly_load_kW'], expected['peak_hourly_load_kW'])
+        _, summary_results = calculate_nec_22087_capacity(raw, site_spec, channel='export')
+        self.assertGreaterEqual(summary_results['peak_hourly_load_kW'], 0.0)
+
+    def test_reading_missing_from_one_channel(self):
+        self.ua_df.loc[3, 'rev_kWh'] = np.nan
+        df, _ = _prepare_channel_intervals(self.ua_df)
+        self.assertEqual(len(df), 4)
+        _, summary_results = calculate_nec_22087_capacity(self.ua_df, {'panel_size_A': 100, 'panel_voltage_V': 240},
+                                                            channel='import')
+        self.assertAlmostEqual(summary_results['peak_hourly_load_kW'], 1.2 * 1.3)
+
+    def test_invalid_channel(self):
+        with self.assertRaises(ValueError):
+            calculate_nec_22087_capacity(self.ua_df, {'panel_size_A': 100, 'panel_voltage_V': 240}, channel='solar')
+
+if __name__ == '__main__':
+    unittest.main()
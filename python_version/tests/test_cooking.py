@@ -2,7 +2,11 @@ import unittest
 
 import pandas as pd
 
-from hea_nec.methods import _apply_nec_cooking_aggregation
+import numpy as np
+
+from hea_nec.methods import (
+    DEVICE_COOKING, DEVICE_DRYER, DEVICE_EV, _apply_nec_cooking_aggregation, _classify_devices
+)
 
 class TestNECCookingLogic(unittest.TestCase):
     """
@@ -113,3 +117,31 @@ class TestNECCookingLogic(unittest.TestCase):
             ]
         )
         self.assertEqual(self.run_calc(df), 8000)
+
+    def test_gas_cooking_excluded(self):
+        df = pd.DataFrame(
+            [
+                {
+                    "generic_device": "range",
+                    "load_count": 1,
+                    "load_nameplate_power": 10000,
+                    "fuel_type": "Gas",
+                }
+            ]
+        )
+        df["nec_watts"] = 10000
+        self.assertEqual(self.run_calc(df), 10000)
+
+class TestDeviceClassification(unittest.TestCase):
+
+    def test_categories(self):
+        devices = pd.Series(["Electric Vehicle", "EVSE", "Clothes Dryer", "Range", "Oven", "cooktop", "Heat Pump", None])
+        np.testing.assert_array_equal(
+            _classify_devices(devices),
+            [DEVICE_EV, DEVICE_EV, DEVICE_DRYER, DEVICE_COOKING, DEVICE_COOKING, DEVICE_COOKING, 0, 0]
+        )
+
+    def test_gas_appliances(self):
+        devices = pd.Series(["clothes dryer", "range", "evse", "range"])
+        fuel_types = pd.Series(["gas", "GAS", "gas", None])
+        np.testing.assert_array_equal(_classify_devices(devices, fuel_types), [0, 0, DEVICE_EV, DEVICE_COOKING])
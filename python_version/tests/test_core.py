@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from hea_nec import core
+from hea_nec.methods import get_peak_hourly_load, get_remaining_panel_capacity
+
+class TestCore(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'DateTime': pd.date_range('2023-01-01', periods=4 * 24 * 30, freq='15min'),
+            'kWh': rng.uniform(0.1, 1.5, 4 * 24 * 30)
+        })
+
+    def test_peak_hourly_load_matches_methods(self):
+        epoch_ns = self.df['DateTime'].dt.as_unit('ns').to_numpy().view(np.int64)
+        self.assertAlmostEqual(core.peak_hourly_load(epoch_ns, self.df['kWh'].to_numpy()),
+                               get_peak_hourly_load(self.df))
+
+    def test_peak_hourly_load_bounds(self):
+        epoch_ns = self.df['DateTime'].dt.as_unit('ns').to_numpy().view(np.int64)
+        kwh = self.df['kWh'].to_numpy()
+        peak = core.peak_hourly_load(epoch_ns, kwh)
+        lower, upper = core.peak_hourly_load_bounds(epoch_ns, kwh)
+        # Distinct 15-minute readings: the hour of the maximum reading is the peak hour, x4 without safety factor
+        self.assertEqual(lower, peak)
+        self.assertAlmostEqual(upper, kwh.max() * 4 * 1.3)
+
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            n = rng.integers(1, 40)
+            epoch_ns = rng.choice(np.arange(0, 30 * 3600, rng.choice([300, 900, 1800, 3600])), n) * 10**9
+            kwh = np.round(rng.normal(0.3, 0.5, n), 1)
+            lower, upper = core.peak_hourly_load_bounds(epoch_ns, kwh)
+            peak = core.peak_hourly_load(epoch_ns, kwh)
+            self.assertLessEqual(lower, peak)
+            self.assertLessEqual(peak, upper)
+
+        self.assertTrue(np.isnan(core.peak_hourly_load_bounds([0], [np.nan])).all())
+
+    def test_remaining_panel_capacity_matches_methods(self):
+        self.assertAlmostEqual(core.remaining_panel_capacity(10.0, 100), get_remaining_panel_capacity(10.0, 100))
+        np.testing.assert_allclose(core.remaining_panel_capacity(np.array([10.0, 20.0]), 100), [11.5, -1.0])
+
+    def test_compliance_by_edition(self):
+        amps_2023 = core.total_demand_amps(24.0, 6.0, 10.0, code_edition="2023")
+        amps_2026 = core.total_demand_amps(24.0, 6.0, 10.0, code_edition="2026")
+        self.assertAlmostEqual(amps_2023, 150.0)
+        self.assertAlmostEqual(amps_2026, 23500 / 240)
+        self.assertFalse(core.is_compliant(amps_2023, 125))
+        self.assertTrue(core.is_compliant(amps_2026, 125))
+
+    def test_min_standard_panel_size(self):
+        np.testing.assert_array_equal(
+            core.min_standard_panel_size(np.array([80.0, 100.0, 100.1, 210.0, 399.0, 400.5])),
+            [100, 100, 125, 225, 400, np.nan]
+        )
+
+    def test_import_does_not_load_pandas(self):
+        src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+        code = "import sys, hea_nec; hea_nec.peak_hourly_load([0], [1.0]); print('pandas' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONPATH=src_dir))
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_lazy_methods_attribute(self):
+        import hea_nec
+        self.assertIs(hea_nec.get_peak_hourly_load, get_peak_hourly_load)
+        with self.assertRaises(AttributeError):
+            hea_nec.no_such_function
+
+if __name__ == '__main__':
+    unittest.main()
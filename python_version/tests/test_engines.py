@@ -0,0 +1,43 @@
+import os
+import shutil
+import unittest
+
+from compare_engines import REPO_DIR, compare_file, find_sample_files, run_js_engine
+
+SAMPLE_FILES = [
+    os.path.join(REPO_DIR, 'test_data', 'test2_hourly_1mo.csv'),
+    os.path.join(REPO_DIR, 'test_data', 'test4_15min_1mo.csv'),
+    os.path.join(REPO_DIR, 'test_data', 'UtilityAPI data', 'UA_Sample_1.csv'),
+    os.path.join(REPO_DIR, 'test_data', 'PG&E data & instructions', 'PGE_test1.csv'),
+]
+
+@unittest.skipIf(shutil.which('node') is None, "Node.js is not installed")
+class TestEngineAgreement(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.js_results = run_js_engine(SAMPLE_FILES, os.path.join(REPO_DIR, 'script.js'))
+
+    def test_engines_agree_on_samples(self):
+        for file in SAMPLE_FILES:
+            with self.subTest(file=os.path.basename(file)):
+                row = compare_file(file, self.js_results[file], tolerance=1e-6)
+                self.assertIn('js_peak_kW', row)
+                self.assertIn('py_on_js_peak_kW', row)
+                self.assertEqual(row['mismatches'], '')
+
+    def test_js_errors_are_reported(self):
+        file = os.path.join(REPO_DIR, 'test_data', 'sample_invalid.csv')
+        result = run_js_engine([file], os.path.join(REPO_DIR, 'script.js'))[file]
+        self.assertEqual(result['status'], 'error')
+
+class TestSampleFiles(unittest.TestCase):
+
+    def test_office_lock_and_configuration_files_skipped(self):
+        files = find_sample_files(os.path.join(REPO_DIR, 'test_data'))
+        names = [os.path.basename(f) for f in files]
+        self.assertIn('UA_Sample_1.csv', names)
+        self.assertFalse([name for name in names if name.startswith(('~$', 'calculate_solutions_'))])
+
+if __name__ == '__main__':
+    unittest.main()
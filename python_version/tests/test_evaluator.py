@@ -0,0 +1,155 @@
+import time
+import unittest
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from hea_nec.evaluator import SolutionsEvaluator
+from hea_nec.methods import calculate_nec_compliance_for_solutions
+
+class CountingMapping(Mapping):
+    """Mapping that records which keys were read, like a lazy mapping of meter files."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+class TestSolutionsEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 150
+        self.solutions_df = pd.DataFrame({
+            "site_id": rng.integers(0, 8, n),
+            "equipment_combo_id": rng.integers(0, 4, n),
+            "load_control_combo_id": rng.integers(0, 2, n),
+            "load_status": rng.choice(["new", "removed", "existing"], n),
+            "generic_device": rng.choice(["evse", "clothes dryer", "range", "heat pump"], n),
+            "load_nameplate_power": rng.choice([1500, 4000, 7200, 12000], n),
+            "load_count": 1,
+            "fuel_type": "electric",
+            "load_control_type": rng.choice(["", "circuit_pausing", "circuit_sharing"], n),
+            "load_control_group": rng.integers(0, 2, n),
+        })
+        # Site 7 has no meter data
+        self.meter_data = {
+            site_id: pd.DataFrame({
+                'DateTime': pd.date_range('2023-01-01', periods=96, freq='15min'),
+                'kWh': rng.uniform(0.1, 2.0, 96)
+            })
+            for site_id in range(7)
+        }
+        self.site_specs = {site_id: {"panel_size_A": 150, "panel_voltage_V": 240} for site_id in range(8)}
+
+    def assert_matches_full_run(self, evaluator, solutions_df, meter_data=None, site_specs=None):
+        expected = calculate_nec_compliance_for_solutions(
+            solutions_df, meter_data or self.meter_data, site_specs or self.site_specs, code_edition="2026")
+        pd.testing.assert_frame_equal(evaluator.results, expected, check_dtype=False)
+
+    def test_initial_results(self):
+        evaluator = SolutionsEvaluator(self.solutions_df, self.meter_data, self.site_specs, code_edition="2026")
+        self.assert_matches_full_run(evaluator, self.solutions_df)
+
+    def test_update_recalculates_affected_solution(self):
+        evaluator = SolutionsEvaluator(self.solutions_df, self.meter_data, self.site_specs, code_edition="2026")
+        changes = pd.DataFrame({"load_nameplate_power": [48000], "load_status": ["new"]}, index=[5])
+
+        start = time.perf_counter()
+        affected = evaluator.update(changes)
+        elapsed = time.perf_counter() - start
+
+        key = tuple(self.solutions_df.loc[5, ["site_id", "equipment_combo_id", "load_control_combo_id"]])
+        self.assertEqual(len(affected), 1)
+        self.assertEqual(tuple(affected.iloc[0][["site_id", "equipment_combo_id", "load_control_combo_id"]]), key)
+        self.assertLess(elapsed, 0.5)
+
+        edited = self.solutions_df.copy()
+        edited.loc[5, ["load_nameplate_power", "load_status"]] = [48000, "new"]
+        self.assert_matches_full_run(evaluator, edited)
+
+    def test_update_reclassifies_changed_devices(self):
+        evaluator = SolutionsEvaluator(self.solutions_df, self.meter_data, self.site_specs, code_edition="2026")
+        label = self.solutions_df.index[(self.solutions_df["generic_device"] == "heat pump")
+                                        & (self.solutions_df["load_status"] == "new")
+                                        & (self.solutions_df["load_control_type"] == "")][0]
+        changes = pd.DataFrame({"generic_device": ["electric vehicle"]}, index=[label])
+        evaluator.update(changes)
+
+        edited = self.solutions_df.copy()
+        edited.loc[label, "generic_device"] = "electric vehicle"
+        self.assert_matches_full_run(evaluator, edited)
+
+        # A gas dryer is not subject to the 5000W minimum of electric dryers
+        evaluator.update(pd.DataFrame({"generic_device": ["clothes dryer"], "fuel_type": ["gas"]}, index=[label]))
+        edited.loc[label, ["generic_device", "fuel_type"]] = ["clothes dryer", "gas"]
+        self.assert_matches_full_run(evaluator, edited)
+
+    def test_update_moves_row_between_solutions(self):
+        evaluator = SolutionsEvaluator(self.solutions_df, self.meter_data, self.site_specs, code_edition="2026")
+        affected = evaluator.update(pd.DataFrame({"equipment_combo_id": [99]}, index=[7]))
+        self.assertEqual(len(affected), 2)
+
+        edited = self.solutions_df.copy()
+        edited.loc[7, "equipment_combo_id"] = 99
+        self.assert_matches_full_run(evaluator, edited)
+
+    def test_insert_and_delete(self):
+        evaluator = SolutionsEvaluator(self.solutions_df.iloc[:120], self.meter_data, self.site_specs,
+                                       code_edition="2026")
+        evaluator.insert(self.solutions_df.iloc[120:])
+        self.assert_matches_full_run(evaluator, self.solutions_df)
+
+        evaluator.delete(self.solutions_df.index[:30])
+        self.assert_matches_full_run(evaluator, self.solutions_df.iloc[30:])
+
+        with self.assertRaises(ValueError):
+            evaluator.insert(self.solutions_df.iloc[100:101])
+        with self.assertRaises(ValueError):
+            evaluator.delete([0])
+
+    def test_update_site(self):
+        evaluator = SolutionsEvaluator(self.solutions_df, self.meter_data, self.site_specs, code_edition="2026")
+        meter_data = dict(self.meter_data)
+        meter_data[7] = self.meter_data[0]
+        site_specs = dict(self.site_specs)
+        site_specs[3] = {"panel_size_A": 100, "panel_voltage_V": 240}
+
+        affected = evaluator.update_site(7, meter_df=meter_data[7])
+        self.assertFalse((affected["status"] == "Error").any())
+        evaluator.update_site(3, site_spec=site_specs[3])
+        self.assert_matches_full_run(evaluator, self.solutions_df, meter_data, site_specs)
+
+    def test_meter_data_read_on_demand(self):
+        meter_data = CountingMapping(dict(self.meter_data, unused=self.meter_data[0]))
+        evaluator = SolutionsEvaluator(self.solutions_df, meter_data, self.site_specs, code_edition="2026")
+        self.assertNotIn("unused", meter_data.reads)
+        self.assertEqual(len(meter_data.reads), len(set(meter_data.reads)))
+
+        evaluator.update(pd.DataFrame({"load_nameplate_power": [48000]}, index=[5]))
+        evaluator.update_site(0, site_spec={"panel_size_A": 100, "panel_voltage_V": 240})
+        self.assertEqual(meter_data.reads.count(0), 2)
+
+    def test_missing_solution_keys(self):
+        solutions_df = self.solutions_df.astype({"equipment_combo_id": float})
+        solutions_df.loc[3, "equipment_combo_id"] = np.nan
+        with self.assertRaises(ValueError):
+            SolutionsEvaluator(solutions_df, self.meter_data, self.site_specs)
+
+        evaluator = SolutionsEvaluator(self.solutions_df, self.meter_data, self.site_specs, code_edition="2026")
+        with self.assertRaises(ValueError):
+            evaluator.update(pd.DataFrame({"equipment_combo_id": [np.nan]}, index=[5]))
+        self.assert_matches_full_run(evaluator, self.solutions_df)
+
+if __name__ == '__main__':
+    unittest.main()
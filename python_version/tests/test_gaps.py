@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from pytz import timezone
 from unittest.mock import patch
 
-from hea_nec.methods import detect_data_gaps
+from hea_nec.methods import detect_data_gaps, detect_data_gaps_for_sites
 
 # Assuming your function is in a module called 'gap_detector'
 # from gap_detector import detect_data_gaps
@@ -196,5 +196,90 @@ class TestDetectDataGaps(unittest.TestCase):
         self.assertFalse(result.empty)
         self.assertEqual(len(result), 1)
 
+    def test_cadence_change_is_not_a_gap(self):
+        """Test that switching from 15-minute to hourly data is not reported as a gap."""
+        df = pd.DataFrame({
+            'DateTime': list(pd.date_range('2023-01-01 00:00', periods=12, freq='15min')) +
+                        list(pd.date_range('2023-01-01 03:00', periods=12, freq='h'))
+        })
+        result = detect_data_gaps(df)
+        self.assertTrue(result.empty)
+
+    def test_gap_within_15min_regime(self):
+        """Test that a 1-hour jump inside 15-minute data is reported with the 15-minute cadence."""
+        df = pd.DataFrame({
+            'DateTime': list(pd.date_range('2023-01-01 00:00', periods=12, freq='15min')) +
+                        list(pd.date_range('2023-01-01 03:45', periods=12, freq='15min'))
+        })
+        result = detect_data_gaps(df)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result.iloc[0]['gap_start'], pd.Timestamp('2023-01-01 03:00:00', tz='America/Los_Angeles'))
+        self.assertEqual(result.iloc[0]['missing_intervals'], 3)
+
+    def test_duplicate_readings_at_dst_end(self):
+        """Test that repeated local readings at the end of DST are not reported as gaps."""
+        times = ['2024-11-03 00:30', '2024-11-03 00:45', '2024-11-03 01:00', '2024-11-03 01:00',
+                 '2024-11-03 01:15', '2024-11-03 01:15', '2024-11-03 01:30', '2024-11-03 01:30',
+                 '2024-11-03 01:45', '2024-11-03 01:45', '2024-11-03 02:00', '2024-11-03 02:15']
+        result = detect_data_gaps(pd.DataFrame({'DateTime': times}))
+        self.assertTrue(result.empty)
+
+class TestDetectDataGapsForSites(unittest.TestCase):
+
+    def setUp(self):
+        self.sites = {
+            'A': pd.DataFrame({'DateTime': ['2023-01-01 00:00:00', '2023-01-01 01:00:00',
+                                            '2023-01-01 04:00:00', '2023-01-01 05:00:00']}),
+            'B': pd.DataFrame({'DateTime': pd.date_range('2023-01-01 00:00', periods=12, freq='15min')}),
+            'C': pd.DataFrame({'DateTime': ['2023-01-01 00:00:00', '2023-01-01 00:15:00',
+                                            '2023-01-01 00:30:00', '2023-01-01 01:00:00']}),
+        }
+
+    def test_matches_single_site_detection(self):
+        gap_report, _ = detect_data_gaps_for_sites(self.sites)
+        for site_id, df in self.sites.items():
+            expected = detect_data_gaps(df)
+            actual = gap_report[gap_report['site_id'] == site_id].drop(columns='site_id').reset_index(drop=True)
+            if expected.empty:
+                self.assertTrue(actual.empty)
+            else:
+                pd.testing.assert_frame_equal(actual, expected)
+
+    def test_long_format_input_and_coverage(self):
+        long_df = pd.concat([df.assign(site_id=site_id) for site_id, df in self.sites.items()], ignore_index=True)
+        gap_report, coverage = detect_data_gaps_for_sites(long_df)
+
+        self.assertEqual(list(gap_report['site_id']), ['A', 'C'])
+        coverage = coverage.set_index('site_id')
+        self.assertEqual(coverage.loc['A', 'gap_count'], 1)
+        self.assertEqual(coverage.loc['A', 'missing_intervals'], 2)
+        self.assertEqual(coverage.loc['A', 'total_gap_duration'], pd.Timedelta(hours=2))
+        self.assertAlmostEqual(coverage.loc['A', 'coverage_pct'], 60.0)
+        self.assertEqual(coverage.loc['B', 'total_readings'], 12)
+        self.assertEqual(coverage.loc['B', 'coverage_pct'], 100.0)
+
+    def test_per_site_timezones(self):
+        times = ['2023-03-12 00:00:00', '2023-03-12 01:00:00', '2023-03-12 03:00:00']
+        sites = {'LA': pd.DataFrame({'DateTime': times}), 'AZ': pd.DataFrame({'DateTime': times})}
+        gap_report, coverage = detect_data_gaps_for_sites(sites, tz={'AZ': 'America/Phoenix'})
+
+        # LA: 01:00 PST -> 03:00 PDT is the spring-forward transition; Phoenix has no DST, so 02:00 is missing
+        self.assertEqual(list(gap_report['site_id']), ['AZ'])
+        self.assertEqual(gap_report.iloc[0]['timezone'], 'America/Phoenix')
+        self.assertEqual(gap_report.iloc[0]['gap_start'], pd.Timestamp('2023-03-12 09:00:00', tz='UTC'))
+        self.assertEqual(gap_report.iloc[0]['missing_intervals'], 1)
+        self.assertEqual(list(coverage['timezone']), ['America/Phoenix', 'America/Los_Angeles'])
+
+    def test_timezone_aware_frames_keep_their_timezone(self):
+        df = self.sites['A'].copy()
+        df['DateTime'] = pd.to_datetime(df['DateTime']).dt.tz_localize('America/Denver')
+        gap_report, _ = detect_data_gaps_for_sites({'A': df})
+        self.assertEqual(gap_report.iloc[0]['gap_start'], pd.Timestamp('2023-01-01 02:00:00', tz='America/Denver'))
+
+        # The timezone of the aware frame is not written into the caller's mapping
+        tz = {'B': 'America/Phoenix'}
+        detect_data_gaps_for_sites({'A': df, 'B': self.sites['B']}, tz=tz)
+        self.assertEqual(tz, {'B': 'America/Phoenix'})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+import urllib.request
+import pandas as pd
+import numpy as np
+
+from hea_nec.methods import calculate_nec_22087_capacity, calculate_nec_compliance_for_solutions
+from hea_nec.metrics import (
+    ERRORS, FILES_PROCESSED, FUNCTION_DURATION, REGISTRY, ROWS_PARSED, SITES_EVALUATED, MetricsRegistry,
+    start_http_server
+)
+
+SITE_SPEC = {"panel_size_A": 150, "panel_voltage_V": 240}
+
+def make_meter_df(periods=96):
+    dates = pd.date_range(start='2024-01-01', periods=periods, freq='15min')
+    return pd.DataFrame({'DateTime': dates.strftime('%Y-%m-%d %H:%M:%S'), 'kWh': np.linspace(0.1, 1.0, periods)})
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_counter_and_histogram_rendering(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("test_files_total", "Files.", ["format"])
+        histogram = registry.histogram("test_duration_seconds", "Durations.", ["function"], buckets=[0.1, 1.0])
+
+        counter.inc(format="Simple CSV")
+        counter.inc(2, format='Odd "format"')
+        histogram.observe(0.05, function="f")
+        histogram.observe(0.5, function="f")
+        histogram.observe(5.0, function="f")
+
+        text = registry.render()
+        self.assertIn("# TYPE test_files_total counter\n", text)
+        self.assertIn('test_files_total{format="Simple CSV"} 1\n', text)
+        self.assertIn('test_files_total{format="Odd \\"format\\""} 2\n', text)
+        self.assertIn("# TYPE test_duration_seconds histogram\n", text)
+        self.assertIn('test_duration_seconds_bucket{function="f",le="0.1"} 1\n', text)
+        self.assertIn('test_duration_seconds_bucket{function="f",le="1"} 2\n', text)
+        self.assertIn('test_duration_seconds_bucket{function="f",le="+Inf"} 3\n', text)
+        self.assertIn('test_duration_seconds_sum{function="f"} 5.55\n', text)
+        self.assertIn('test_duration_seconds_count{function="f"} 3\n', text)
+
+    def test_invalid_usage(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "Test.", ["format"])
+        self.assertIs(registry.counter("test_total", "Test.", ["format"]), counter)
+        with self.assertRaises(ValueError):
+            registry.histogram("test_total", "Test.", ["format"])
+        with self.assertRaises(ValueError):
+            counter.inc(function="f")
+        with self.assertRaises(ValueError):
+            counter.inc(-1, format="x")
+
+    def test_write_text_file(self):
+        registry = MetricsRegistry()
+        registry.counter("test_total", "Test.").inc()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "hea_nec.prom")
+            registry.write_text_file(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), registry.render())
+            self.assertEqual(os.listdir(tmp_dir), ["hea_nec.prom"])
+
+    def test_http_server(self):
+        registry = MetricsRegistry()
+        registry.counter("test_total", "Test.").inc(3)
+        server = start_http_server(0, registry=registry)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn("test_total 3\n", response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class TestCalculatorMetrics(unittest.TestCase):
+
+    def setUp(self):
+        REGISTRY.clear()
+
+    def test_capacity_calculation(self):
+        calculate_nec_22087_capacity(make_meter_df(), SITE_SPEC, detect_gaps=True)
+
+        self.assertEqual(FILES_PROCESSED.value(format="Simple CSV"), 1)
+        self.assertEqual(ROWS_PARSED.value(format="Simple CSV"), 96)
+        self.assertEqual(FUNCTION_DURATION.count(function="calculate_nec_22087_capacity"), 1)
+        self.assertEqual(FUNCTION_DURATION.count(function="detect_data_gaps"), 1)
+
+    def test_errors_by_format(self):
+        with self.assertRaises(ValueError):
+            calculate_nec_22087_capacity(pd.DataFrame({'Date': ['2024-01-01'], 'kWh': [1.0]}), SITE_SPEC)
+        with self.assertRaises(Exception):
+            calculate_nec_22087_capacity(pd.DataFrame({'DateTime': ['not a date'], 'kWh': [1.0]}), SITE_SPEC)
+
+        self.assertEqual(ERRORS.value(format="unrecognized"), 1)
+        self.assertEqual(ERRORS.value(format="Simple CSV"), 1)
+        self.assertEqual(FILES_PROCESSED.value(format="Simple CSV"), 0)
+        # Failing calls are timed as well
+        self.assertEqual(FUNCTION_DURATION.count(function="calculate_nec_22087_capacity"), 2)
+
+    def test_solutions(self):
+        columns = [
+            "site_id", "equipment_combo_id", "load_control_combo_id",
+            "appliance_id", "load_status", "generic_device",
+            "specific_device", "load_nameplate_power", "load_count",
+            "load_control_type", "load_control_group", "fuel_type"
+        ]
+        solutions_df = pd.DataFrame([
+            ["A", 101, 1, 'AC-A', 'new', 'cooling', 'Window AC', 1500, 1, np.nan, np.nan, 'electric'],
+            ["B", 201, 1, 'AC-B', 'new', 'cooling', 'Window AC', 1500, 1, np.nan, np.nan, 'electric'],
+        ], columns=columns)
+        calculate_nec_compliance_for_solutions(solutions_df, {"A": make_meter_df(), "B": make_meter_df()},
+                                               {"A": SITE_SPEC, "B": SITE_SPEC})
+
+        self.assertEqual(SITES_EVALUATED.value(), 2)
+        self.assertEqual(FILES_PROCESSED.value(format="Simple CSV"), 2)
+        self.assertEqual(FUNCTION_DURATION.count(function="calculate_nec_compliance_for_solutions"), 1)
+        self.assertIn("hea_nec_sites_evaluated_total 2\n", REGISTRY.render())
+
+if __name__ == '__main__':
+    unittest.main()
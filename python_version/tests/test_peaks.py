@@ -0,0 +1,185 @@
+import unittest
+import pandas as pd
+import numpy as np
+
+from hea_nec.methods import (
+    get_coincident_peaks, get_peak_hourly_load, get_rolling_peak_series, get_top_peak_hours, iter_coincident_peaks
+)
+
+class TestIntervalLengths(unittest.TestCase):
+
+    def make_df(self, freq, periods, kwh):
+        dates = pd.date_range(start='2024-01-01', periods=periods, freq=freq)
+        return pd.DataFrame({'DateTime': dates, 'kWh': kwh})
+
+    def test_5min_data(self):
+        df = self.make_df('5min', 24, [0.1] * 11 + [0.2] + [0.1] * 12)
+        self.assertAlmostEqual(get_peak_hourly_load(df), 0.2 * 12)
+
+    def test_30min_data(self):
+        df = self.make_df('30min', 4, [1.0, 1.5, 0.5, 0.7])
+        self.assertAlmostEqual(get_peak_hourly_load(df), 1.5 * 2)
+
+    def test_hourly_data(self):
+        df = self.make_df('h', 3, [1.0, 2.0, 1.5])
+        self.assertAlmostEqual(get_peak_hourly_load(df), 2.0 * 1.3)
+
+    def test_lone_reading_in_15min_data(self):
+        # Only one reading of the second hour is present: scaled as hourly (x1.3), whatever its offset
+        for minute in ['00', '15', '30', '45']:
+            with self.subTest(minute=minute):
+                times = ['2024-01-01 00:00', '2024-01-01 00:15', '2024-01-01 00:30', '2024-01-01 00:45',
+                         f'2024-01-01 01:{minute}',
+                         '2024-01-01 02:00', '2024-01-01 02:15', '2024-01-01 02:30', '2024-01-01 02:45']
+                df = pd.DataFrame({
+                    'DateTime': pd.to_datetime(times),
+                    'kWh': [0.1, 0.2, 0.1, 0.1, 1.0, 0.1, 0.2, 0.1, 0.1]
+                })
+                self.assertAlmostEqual(get_peak_hourly_load(df), 1.0 * 1.3)
+
+    def test_15min_hour_with_readings_on_half_hours(self):
+        # Second hour only has :00 and :30 readings, but its neighbors are 15-minute data
+        times = ['2024-01-01 00:00', '2024-01-01 00:15', '2024-01-01 00:30', '2024-01-01 00:45',
+                 '2024-01-01 01:00', '2024-01-01 01:30',
+                 '2024-01-01 02:00', '2024-01-01 02:15', '2024-01-01 02:30', '2024-01-01 02:45']
+        df = pd.DataFrame({
+            'DateTime': pd.to_datetime(times),
+            'kWh': [0.1, 0.2, 0.1, 0.1, 0.6, 0.4, 0.1, 0.2, 0.1, 0.1]
+        })
+        self.assertAlmostEqual(get_peak_hourly_load(df), 0.6 * 4)
+
+class TestTopPeakHours(unittest.TestCase):
+
+    def setUp(self):
+        # Hour 0: real 15-minute data (max 1.0 -> 4.0 kW)
+        # Hour 1: fake 15-minute data (0.5 -> 0.5 * 4 * 1.3 = 2.6 kW)
+        # Hour 2: hourly data (3.0 -> 3.0 * 1.3 = 3.9 kW)
+        self.df = pd.DataFrame({
+            'DateTime': pd.to_datetime([
+                '2024-01-01 00:00', '2024-01-01 00:15', '2024-01-01 00:30', '2024-01-01 00:45',
+                '2024-01-01 01:00', '2024-01-01 01:15', '2024-01-01 01:30', '2024-01-01 01:45',
+                '2024-01-01 02:00',
+            ]),
+            'kWh': [0.2, 1.0, 0.4, 0.3, 0.5, 0.5, 0.5, 0.5, 3.0]
+        })
+
+    def test_top_hours_order_and_types(self):
+        result = get_top_peak_hours(self.df, n=3)
+        top = result['top_hours']
+
+        self.assertEqual(len(top), 3)
+        np.testing.assert_allclose(top['peak_kW'], [4.0, 3.9, 2.6])
+        self.assertEqual(list(top['interval_type']), ['15-minute', 'Hourly', 'Fake 15-minute'])
+        self.assertEqual(top['peak_reading_time'].iloc[0], pd.Timestamp('2024-01-01 00:15'))
+        self.assertEqual(result['total_hours'], 3)
+
+    def test_top_hour_matches_single_peak(self):
+        result = get_top_peak_hours(self.df, n=1)
+        self.assertAlmostEqual(result['top_hours']['peak_kW'].iloc[0], get_peak_hourly_load(self.df.copy()))
+
+    def test_n_larger_than_hours(self):
+        result = get_top_peak_hours(self.df, n=100)
+        self.assertEqual(len(result['top_hours']), 3)
+
+    def test_threshold_shares(self):
+        result = get_top_peak_hours(self.df, n=1, thresholds_kW=[3.0, 5.0])
+        self.assertAlmostEqual(result['threshold_shares'][3.0], 2 / 3)
+        self.assertEqual(result['threshold_shares'][5.0], 0.0)
+
+    def test_input_not_modified(self):
+        get_top_peak_hours(self.df, n=2)
+        self.assertEqual(list(self.df.columns), ['DateTime', 'kWh'])
+
+class TestRollingPeakSeries(unittest.TestCase):
+
+    def setUp(self):
+        # Two years of hourly data with random loads
+        rng = np.random.default_rng(42)
+        dates = pd.date_range(start='2022-01-01', end='2023-12-31 23:00', freq='h')
+        self.df = pd.DataFrame({'DateTime': dates, 'kWh': rng.uniform(0.1, 5.0, len(dates))})
+
+    def test_matches_per_window_peak(self):
+        result = get_rolling_peak_series(self.df, step='month')
+        series = result['series']
+
+        # Jan 2022 .. Jan 2023 starts give complete 12-month windows
+        self.assertEqual(len(series), 13)
+
+        for _, row in series.iloc[[0, 5, 12]].iterrows():
+            window = self.df[(self.df['DateTime'] >= row['window_start']) & (self.df['DateTime'] < row['window_end'])]
+            self.assertAlmostEqual(row['peak_kW'], get_peak_hourly_load(window.copy()))
+
+    def test_governing_window(self):
+        result = get_rolling_peak_series(self.df, step='day')
+        series = result['series']
+        self.assertAlmostEqual(result['governing_window']['peak_kW'], series['peak_kW'].max())
+        self.assertAlmostEqual(series['peak_kW'].max(), get_peak_hourly_load(self.df.copy()))
+
+    def test_short_history_single_window(self):
+        result = get_rolling_peak_series(self.df.iloc[:24 * 30])
+        self.assertEqual(len(result['series']), 1)
+
+    def test_invalid_step(self):
+        with self.assertRaises(ValueError):
+            get_rolling_peak_series(self.df, step='week')
+
+class TestCoincidentPeaks(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        dates = pd.date_range(start='2024-01-01', periods=4 * 24 * 28, freq='15min')
+        self.df = pd.DataFrame({'DateTime': dates, 'kWh': rng.uniform(0.1, 1.0, len(dates))})
+        self.shapes = pd.DataFrame(rng.uniform(0, 7.2, (50, 24)), index=[f"S{i}" for i in range(50)])
+
+    def brute_force(self, shape_of_hour):
+        hourly = self.df.set_index('DateTime')['kWh'].resample('h').max() * 4
+        return max(kw + shape_of_hour(hour) for hour, kw in hourly.items())
+
+    def test_hour_of_day_shapes(self):
+        result = get_coincident_peaks(self.df, self.shapes, chunk_size=16)
+        self.assertEqual(list(result.index), list(self.shapes.index))
+        for solution in ['S0', 'S17', 'S49']:
+            expected = self.brute_force(lambda hour: self.shapes.loc[solution, hour.hour])
+            self.assertAlmostEqual(result.loc[solution, 'coincident_peak_kW'], expected)
+            hour = result.loc[solution, 'coincident_peak_hour']
+            self.assertAlmostEqual(
+                get_peak_hourly_load(self.df[self.df['DateTime'].dt.floor('h') == hour].copy())
+                + self.shapes.loc[solution, hour.hour], expected)
+
+    def test_zero_shape_is_peak(self):
+        result = get_coincident_peaks(self.df, np.zeros((1, 168)))
+        self.assertAlmostEqual(result['coincident_peak_kW'].iloc[0], get_peak_hourly_load(self.df))
+        self.assertAlmostEqual(result['added_peak_kW'].iloc[0], 0.0)
+
+    def test_hourly_aligned_shapes(self):
+        # EV charging 7.2 kW on the evening of Jan 10th only
+        hours = pd.date_range('2024-01-10 18:00', periods=4, freq='h')
+        shapes = pd.DataFrame([[7.2] * 4], columns=hours)
+        result = get_coincident_peaks(self.df, shapes)
+        expected = self.brute_force(lambda hour: 7.2 if hour in hours else 0.0)
+        self.assertAlmostEqual(result['coincident_peak_kW'].iloc[0], expected)
+        self.assertIn(result['coincident_peak_hour'].iloc[0], hours)
+
+    def test_24_timestamp_string_columns(self):
+        # One day of hourly shapes keyed by timestamp strings is not an hour of day profile
+        hours = pd.date_range('2024-01-10 00:00', periods=24, freq='h')
+        shapes = pd.DataFrame([[0.0] * 18 + [7.2] * 4 + [0.0] * 2], columns=hours.strftime('%Y-%m-%d %H:%M:%S'))
+        result = get_coincident_peaks(self.df, shapes)
+        expected = self.brute_force(lambda hour: 7.2 if hour in hours[18:22] else 0.0)
+        self.assertAlmostEqual(result['coincident_peak_kW'].iloc[0], expected)
+
+    def test_hour_of_day_string_labels(self):
+        # As read by pd.read_csv
+        shapes = self.shapes.set_axis([str(hour) for hour in range(24)], axis=1)
+        pd.testing.assert_frame_equal(get_coincident_peaks(self.df, shapes), get_coincident_peaks(self.df, self.shapes))
+
+        with self.assertRaises(ValueError):
+            get_coincident_peaks(self.df, self.shapes.set_axis([f"h{hour}" for hour in range(24)], axis=1))
+
+    def test_streamed_chunks(self):
+        chunks = [self.shapes.iloc[:20], self.shapes.iloc[20:]]
+        streamed = pd.concat(iter_coincident_peaks(self.df, chunks))
+        pd.testing.assert_frame_equal(streamed, get_coincident_peaks(self.df, self.shapes))
+
+if __name__ == '__main__':
+    unittest.main()
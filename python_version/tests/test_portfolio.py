@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from hea_nec.methods import calculate_nec_compliance_for_solutions
+from hea_nec.portfolio import PortfolioSummary, QuantileSketch
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = np.concatenate([rng.lognormal(2, 1, 5000), -rng.lognormal(1, 1, 2000), np.zeros(50)])
+        rng.shuffle(self.values)
+
+    def test_quantiles_within_relative_accuracy(self):
+        sketch = QuantileSketch(relative_accuracy=0.01).add(self.values)
+        q = np.linspace(0, 1, 101)
+        exact = np.quantile(self.values, q, method='lower')
+        np.testing.assert_allclose(sketch.quantile(q), exact, rtol=0.01)
+        self.assertEqual(sketch.quantile(0), self.values.min())
+        self.assertEqual(sketch.quantile(1), self.values.max())
+
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertAlmostEqual(sketch.mean, self.values.mean())
+        self.assertAlmostEqual(sketch.std, self.values.std())
+
+    def test_merge_equals_single_sketch(self):
+        whole = QuantileSketch().add(self.values)
+        merged = QuantileSketch()
+        for part in np.array_split(self.values, 7):
+            merged.merge(QuantileSketch().add(part))
+        self.assertEqual(merged.to_dict()['positive'], whole.to_dict()['positive'])
+        self.assertEqual(merged.to_dict()['negative'], whole.to_dict()['negative'])
+        np.testing.assert_array_equal(merged.quantile([0.1, 0.5, 0.9]), whole.quantile([0.1, 0.5, 0.9]))
+        self.assertAlmostEqual(merged.variance, whole.variance)
+
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(relative_accuracy=0.02))
+
+    def test_empty_and_missing_values(self):
+        sketch = QuantileSketch().add([np.nan, np.inf])
+        self.assertEqual(sketch.count, 0)
+        self.assertTrue(np.isnan(sketch.quantile(0.5)))
+        restored = QuantileSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored.count, 0)
+        with self.assertRaises(ValueError):
+            sketch.quantile(1.5)
+
+class TestPortfolioSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(1)
+        self.meter_data = {}
+        self.site_specs = {}
+        rows = []
+        for i in range(20):
+            site_id = str(i)
+            self.meter_data[site_id] = pd.DataFrame({
+                'DateTime': pd.date_range('2023-01-01', periods=48, freq='h'),
+                'kWh': rng.uniform(1, 10, 48),
+            })
+            self.site_specs[site_id] = {"panel_size_A": [100, 200][i % 2], "utility": ["PG&E", "SCE"][i // 10]}
+            for combo in [1, 2, 3]:
+                rows.append([site_id, combo, 1, 'new', 'cooling', 1500 * combo, 1])
+        self.solutions_df = pd.DataFrame(rows, columns=[
+            "site_id", "equipment_combo_id", "load_control_combo_id", "load_status", "generic_device",
+            "load_nameplate_power", "load_count"
+        ])
+        self.results = calculate_nec_compliance_for_solutions(self.solutions_df, self.meter_data, self.site_specs)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_groups_and_metrics(self):
+        summary = PortfolioSummary().add_solutions(self.results, self.site_specs)
+        report = summary.to_frame()
+        self.assertEqual(len(report), 4 * 3)  # 2 utilities x 2 panel sizes, 3 metrics
+
+        row = report[(report['utility'] == 'SCE') & (report['panel_size_A'] == 200)
+                     & (report['metric'] == 'headroom_amps')].iloc[0]
+        sites = [str(i) for i in range(10, 20) if i % 2]
+        expected = self.results.loc[self.results['site_id'].isin(sites), 'headroom_amps']
+        self.assertEqual(row['code_edition'], '2023')
+        self.assertEqual(row['count'], 15)
+        self.assertAlmostEqual(row['mean'], expected.mean())
+        self.assertAlmostEqual(row['p50'], np.quantile(expected, 0.5, method='lower'), delta=abs(row['p50']) * 0.01)
+
+        # Peak loads are counted once per site
+        peaks = report[report['metric'] == 'historical_peak_kw']
+        self.assertEqual(peaks['count'].sum(), 20)
+
+    def test_merged_shards_match_whole_portfolio(self):
+        whole = PortfolioSummary().add_solutions(self.results, self.site_specs)
+        merged = PortfolioSummary()
+        for _, site_results in self.results.groupby('site_id'):
+            path = os.path.join(self.tmp_dir, 'shard.json')
+            PortfolioSummary().add_solutions(site_results, self.site_specs).write_json(path)
+            merged.merge(PortfolioSummary.read_json(path))
+        pd.testing.assert_frame_equal(merged.to_frame(), whole.to_frame())
+
+        with self.assertRaises(ValueError):
+            merged.merge(PortfolioSummary(group_by=["panel_size_A"]))
+
+    def test_several_editions(self):
+        results = calculate_nec_compliance_for_solutions(self.solutions_df, self.meter_data, self.site_specs,
+                                                         code_edition=("2023", "2026"))
+        report = PortfolioSummary(group_by=["code_edition"]).add_solutions(results).to_frame()
+        self.assertEqual(sorted(report['code_edition'].unique()), ['2023', '2026'])
+        self.assertEqual(report.loc[report['metric'] == 'total_demand_amps', 'count'].tolist(), [60, 60])
+
+    def test_add_capacity(self):
+        summary = PortfolioSummary(group_by=["panel_size_A"])
+        for peak in [5.0, 10.0, 20.0]:
+            summary.add_capacity({'peak_hourly_load_kW': peak, 'remaining_panel_capacity_kW': 48 - 1.25 * peak},
+                                 {"panel_size_A": 200})
+        report = summary.to_frame(quantiles=[0.5])
+        self.assertEqual(report['metric'].tolist(), ['peak_hourly_load_kW', 'remaining_panel_capacity_kW'])
+        self.assertAlmostEqual(report['p50'].iloc[0], 10.0, delta=0.1)
+        self.assertEqual(report['max'].iloc[1], 48 - 1.25 * 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
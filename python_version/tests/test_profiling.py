@@ -0,0 +1,70 @@
+import unittest
+import pandas as pd
+import numpy as np
+
+from hea_nec.methods import calculate_nec_22087_capacity
+from hea_nec.profiling import MemoryProfiler, profile_stage
+
+class TestMemoryProfiler(unittest.TestCase):
+
+    def test_inactive_profile_stage_is_noop(self):
+        with profile_stage("site", site="A"):
+            with profile_stage("read"):
+                pass
+        profiler = MemoryProfiler()
+        self.assertEqual(profiler.records, [])
+
+    def test_nested_stages(self):
+        with MemoryProfiler() as profiler:
+            with profile_stage("site", site="A"):
+                with profile_stage("read"):
+                    small = np.ones(2**17)  # 1 MiB
+                with profile_stage("peak"):
+                    large = np.ones(2**19)  # 4 MiB
+                    del large
+            del small
+
+        records = pd.DataFrame(profiler.records)
+        self.assertEqual(list(records["stage"]), ["read", "peak", "site"])
+        # Inner stages inherit the site of the enclosing stage
+        self.assertEqual(list(records["site"]), ["A", "A", "A"])
+
+        peaks = records.set_index("stage")["peak_MiB"]
+        self.assertGreaterEqual(peaks["read"], 1.0)
+        self.assertGreaterEqual(peaks["peak"], 4.0)
+        # The site's peak covers the peaks of its stages (the read array is still held during peak)
+        self.assertGreaterEqual(peaks["site"], 5.0)
+
+    def test_report_ranks_sites_and_stages(self):
+        with MemoryProfiler() as profiler:
+            for site, size in [("small", 2**16), ("large", 2**19)]:
+                with profile_stage("site", site=site):
+                    with profile_stage("prepare"):
+                        data = np.ones(size)
+                        del data
+                    with profile_stage("summary"):
+                        pass
+
+        report = profiler.report(top=1)
+        self.assertEqual(list(report["sites"]["site"]), ["large"])
+        self.assertEqual(report["sites"]["heaviest_stage"].iloc[0], "prepare")
+
+        stages = report["stages"].set_index("stage")
+        self.assertEqual(stages.loc["prepare", "count"], 2)
+        self.assertEqual(stages.loc["prepare", "max_site"], "large")
+        self.assertEqual(len(report["records"]), 6)
+
+    def test_calculation_stages_are_profiled(self):
+        dates = pd.date_range(start='2024-01-01', periods=96 * 7, freq='15min')
+        df = pd.DataFrame({'DateTime': dates, 'kWh': np.linspace(0.1, 1.0, len(dates))})
+
+        with MemoryProfiler() as profiler:
+            with profile_stage("site", site="A"):
+                calculate_nec_22087_capacity(df, {"panel_size_A": 150, "panel_voltage_V": 240})
+
+        stages = {record["stage"] for record in profiler.records}
+        self.assertTrue({"prepare", "peak", "summary", "site"} <= stages)
+        self.assertTrue(all(record["site"] == "A" for record in profiler.records))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from hea_nec.methods import (
+    build_hourly_rollup, calculate_nec_compliance_for_solutions, calculate_summary_details,
+    get_coincident_peaks, get_peak_hourly_load, get_rolling_peak_series, get_top_peak_hours
+)
+from hea_nec.rollups import load_hourly_rollup, meter_data_fingerprint, read_hourly_rollup, write_hourly_rollup
+
+def make_meter_df(tz=None):
+    # Six weeks of 15-minute data with an hourly stretch and a stretch of "fake" 15-minute data
+    dates = pd.date_range('2024-03-01', periods=96 * 42, freq='15min', tz=tz)
+    kwh = 0.2 + 0.3 * np.abs(np.sin(np.arange(len(dates)) / 37.0))
+    df = pd.DataFrame({'DateTime': dates, 'kWh': kwh})
+    df.loc[400:479, 'kWh'] = np.repeat(np.linspace(0.5, 1.0, 20), 4)
+    hourly = df.iloc[1000:1400]
+    return pd.concat([df.iloc[:1000], hourly[hourly['DateTime'].dt.minute == 0], df.iloc[1400:]], ignore_index=True)
+
+class TestHourlyRollup(unittest.TestCase):
+
+    def test_rollup_matches_meter_data(self):
+        for tz in [None, 'America/Los_Angeles']:
+            with self.subTest(tz=tz):
+                df = make_meter_df(tz)
+                rollup = build_hourly_rollup(df)
+                self.assertLess(len(rollup), len(df) / 3)
+                self.assertEqual(rollup['readings'].sum(), len(df))
+                self.assertAlmostEqual(rollup['kWh_sum'].sum(), df['kWh'].sum())
+
+                peak, peak_idx = get_peak_hourly_load(df.copy(), return_idx=True)
+                rollup_peak, rollup_peak_idx = get_peak_hourly_load(rollup, return_idx=True)
+                self.assertEqual(rollup_peak, peak)
+                self.assertEqual(calculate_summary_details(rollup, rollup_peak_idx, "Simple CSV"),
+                                 calculate_summary_details(df, peak_idx, "Simple CSV"))
+
+                pd.testing.assert_frame_equal(get_top_peak_hours(rollup, n=20)['top_hours'],
+                                              get_top_peak_hours(df, n=20)['top_hours'])
+                pd.testing.assert_frame_equal(get_rolling_peak_series(rollup, window_months=1, step='day')['series'],
+                                              get_rolling_peak_series(df, window_months=1, step='day')['series'])
+
+                shapes = pd.DataFrame(np.eye(24)[:3])
+                pd.testing.assert_frame_equal(get_coincident_peaks(rollup, shapes), get_coincident_peaks(df, shapes))
+
+    def test_identical_readings_flag(self):
+        df = pd.DataFrame({
+            'DateTime': pd.date_range('2024-01-01', periods=8, freq='15min'),
+            'kWh': [0.5, 0.5, 0.5, 0.5, 0.1, 0.3, 0.2, 0.1],
+        })
+        rollup = build_hourly_rollup(df)
+        self.assertEqual(rollup['identical'].tolist(), [True, False])
+        self.assertEqual(rollup['readings'].tolist(), [4, 4])
+        self.assertEqual(rollup['kWh_max_time'].iloc[1], pd.Timestamp('2024-01-01 01:15'))
+        self.assertAlmostEqual(get_peak_hourly_load(rollup), 0.5 * 4 * 1.3)
+
+class TestPersistedRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.meter_path = os.path.join(self.tmp_dir, 'meter.csv')
+        df = make_meter_df()
+        df['DateTime'] = df['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        df.to_csv(self.meter_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_and_read(self):
+        for tz in [None, 'America/Denver']:
+            with self.subTest(tz=tz):
+                df = make_meter_df(tz)
+                rollup = build_hourly_rollup(df)
+                rollup.attrs['source_fingerprint'] = meter_data_fingerprint(df)
+                path = os.path.join(self.tmp_dir, 'rollup')
+                write_hourly_rollup(rollup, path)
+
+                restored = read_hourly_rollup(path)
+                pd.testing.assert_frame_equal(restored, rollup, check_index_type=False, check_dtype=False)
+                self.assertEqual(restored.attrs, rollup.attrs)
+                self.assertEqual(get_peak_hourly_load(restored), get_peak_hourly_load(rollup))
+
+    def test_rollup_is_rebuilt_when_meter_data_changes(self):
+        site_spec = {"panel_size_A": 100, "timezone": "America/Denver"}
+        rollup = load_hourly_rollup(self.meter_path, site_spec)
+        self.assertTrue(os.path.exists(self.meter_path + '.rollup'))
+
+        with patch('hea_nec.rollups.read_meter_file') as read_meter_file:
+            cached = load_hourly_rollup(self.meter_path, site_spec)
+            read_meter_file.assert_not_called()
+        self.assertEqual(cached.attrs['source_fingerprint'], rollup.attrs['source_fingerprint'])
+        self.assertEqual(get_peak_hourly_load(cached), get_peak_hourly_load(rollup))
+
+        # Another timezone or changed meter data yield a new fingerprint and rollup
+        self.assertNotEqual(load_hourly_rollup(self.meter_path, {"panel_size_A": 100}).attrs['source_fingerprint'],
+                            rollup.attrs['source_fingerprint'])
+        with open(self.meter_path, 'a') as f:
+            f.write('2024-06-01 00:00:00,9.0\n')
+        updated = load_hourly_rollup(self.meter_path, site_spec)
+        self.assertNotEqual(updated.attrs['source_fingerprint'], rollup.attrs['source_fingerprint'])
+        self.assertEqual(get_peak_hourly_load(updated), 9.0 * 1.3)
+
+    def test_rejects_other_files(self):
+        with self.assertRaisesRegex(ValueError, "not an hourly rollup"):
+            read_hourly_rollup(self.meter_path)
+
+    def test_solutions_from_rollups(self):
+        solutions_df = pd.DataFrame([["A", 101, 1, 'new', 'cooling', 1500, 1]], columns=[
+            "site_id", "equipment_combo_id", "load_control_combo_id", "load_status", "generic_device",
+            "load_nameplate_power", "load_count"
+        ])
+        site_specs = {"A": {"panel_size_A": 100, "panel_voltage_V": 240}}
+        expected = calculate_nec_compliance_for_solutions(
+            solutions_df, {"A": pd.read_csv(self.meter_path)}, site_specs, detect_gaps=True)
+        result = calculate_nec_compliance_for_solutions(
+            solutions_df, {"A": load_hourly_rollup(self.meter_path)}, site_specs, detect_gaps=True)
+        self.assertEqual(result['historical_peak_kw'].iloc[0], expected['historical_peak_kw'].iloc[0])
+        self.assertEqual(result['status'].iloc[0], expected['status'].iloc[0])
+        self.assertTrue(result['gap_count'].isna().all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import gzip
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import pandas as pd
+
+from hea_nec.methods import calculate_nec_22087_capacity
+from hea_nec.rollups import load_hourly_rollup
+from hea_nec.sniffing import (
+    SNIFF_BYTES, expand_meter_paths, meter_file_exists, read_meter_file, sniff_meter_file
+)
+
+UTILITYAPI_HEADER = ("meter_uid,utility,utility_tariff_name,interval_start,interval_end,interval_kWh,fwd_kWh,"
+                     "net_kWh,rev_kWh,interval_timezone,")
+
+PGE_EXPORT = (
+    "﻿Name,JOHN DOE,,,,,\n"
+    "Address,\"123 Main Street, San Jose, CA 94123\",,,,,\n"
+    ",,,,,,\n"
+    "TYPE,DATE,START TIME,END TIME,USAGE (kWh),COST,NOTES\n"
+    "Electric usage,1/15/25,0:00,0:14,0.75,$1.05 ,\n"
+)
+
+class TestFormatSniffing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, content, encoding="utf-8"):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w", encoding=encoding, newline="") as f:
+            f.write(content)
+        return path
+
+    def test_simple_csv(self):
+        path = self.write("simple.csv", "DateTime,kWh\n2024-01-15 14:00:00,0.81\n2024-01-15 15:00:00,1.2\n")
+        descriptor = sniff_meter_file(path)
+        self.assertEqual(descriptor["format"], "Simple CSV")
+        self.assertEqual(descriptor["usecols"], ["DateTime", "kWh"])
+
+        df = read_meter_file(path, descriptor)
+        self.assertEqual(list(df.columns), ["DateTime", "kWh"])
+        self.assertEqual(len(df), 2)
+
+    def test_utilityapi_with_bom_reads_needed_columns(self):
+        rows = "".join(f"1,PG&E,\"TOU, 4-9 p.m.\",8/25/25 {h}:00,8/25/25 {h + 1}:00,{h / 10},{h / 10},{h / 10},0,"
+                       f"US/Pacific,\n" for h in range(10))
+        path = self.write("ua.csv", "﻿" + UTILITYAPI_HEADER + "\n" + rows)
+
+        descriptor = sniff_meter_file(path)
+        self.assertEqual(descriptor["format"], "UtilityAPI")
+        self.assertEqual(descriptor["usecols"], ["interval_start", "interval_kWh", "interval_timezone"])
+        channel_descriptor = sniff_meter_file(path, channel="net")
+        self.assertEqual(channel_descriptor["usecols"],
+                         ["interval_start", "interval_kWh", "fwd_kWh", "rev_kWh", "net_kWh", "interval_timezone"])
+
+        # Same results as the calculation on the complete file
+        site_spec = {"panel_size_A": 150, "panel_voltage_V": 240}
+        for channel, d in [(None, descriptor), ("net", channel_descriptor)]:
+            expected = calculate_nec_22087_capacity(pd.read_csv(path), site_spec, channel=channel)[1]
+            actual = calculate_nec_22087_capacity(read_meter_file(path, d), site_spec, channel=channel)[1]
+            self.assertEqual(actual, expected)
+
+    def test_channel_columns_without_kwh(self):
+        path = self.write("pv.csv", "DateTime,IMPORT (kWh),EXPORT (kWh)\n2024-01-15 14:00:00,1.0,0.0\n")
+        with self.assertRaises(ValueError):
+            sniff_meter_file(path)
+        self.assertEqual(sniff_meter_file(path, channel="import")["usecols"],
+                         ["DateTime", "IMPORT (kWh)", "EXPORT (kWh)"])
+
+    def test_channel_sniffing_does_not_load_pandas(self):
+        path = self.write("pv.csv", "DateTime,IMPORT (kWh),EXPORT (kWh)\n2024-01-15 14:00:00,1.0,0.0\n")
+        src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+        code = ("import sys; from hea_nec.sniffing import sniff_meter_file; "
+                f"sniff_meter_file({path!r}, channel='import'); print('pandas' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONPATH=src_dir))
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_rejects_unsupported_files_without_full_parse(self):
+        pge = self.write("pge.csv", PGE_EXPORT)
+        with patch("pandas.read_csv") as read_csv:
+            with self.assertRaisesRegex(ValueError, "CSV format not recognized.*PG&E"):
+                read_meter_file(pge)
+            read_csv.assert_not_called()
+
+        for name, content, encoding, message in [
+            ("columns.csv", "Date,Usage\n2024-01-15,1.0\n", "utf-8", "CSV format not recognized"),
+            ("empty.csv", "", "utf-8", "empty"),
+            ("utf16.csv", "DateTime,kWh\n", "utf-16", "not a CSV text file"),
+            ("long_header.csv", "x" * (SNIFF_BYTES + 10), "utf-8", "no complete header line"),
+        ]:
+            with self.subTest(name):
+                with self.assertRaisesRegex(ValueError, message):
+                    sniff_meter_file(self.write(name, content, encoding=encoding))
+
+    def test_buffers_and_bytes(self):
+        content = "DateTime,kWh\n2024-01-15 14:00:00,0.81\n"
+        buffer = io.BytesIO(content.encode())
+        self.assertEqual(sniff_meter_file(buffer)["format"], "Simple CSV")
+        self.assertEqual(buffer.tell(), 0)
+        self.assertEqual(len(read_meter_file(buffer)), 1)
+        self.assertEqual(len(read_meter_file(io.StringIO(content))), 1)
+        self.assertEqual(len(read_meter_file(content.encode())), 1)
+
+        # Latin-1 encoded files (e.g. with a degree sign in a column name)
+        latin1 = "DateTime,kWh,Temp °F\n2024-01-15 14:00:00,0.81,50\n".encode("latin-1")
+        self.assertEqual(sniff_meter_file(latin1)["encoding"], "latin-1")
+        self.assertEqual(len(read_meter_file(latin1)), 1)
+
+class TestCompressedMeterFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.contents = {
+            "meters/site_1.csv": "DateTime,kWh\n" + "".join(
+                f"2024-01-15 {hour:02d}:{minute:02d}:00,{0.1 * (hour + 1):.1f}\n"
+                for hour in range(24) for minute in (0, 15, 30, 45)),
+            "meters/site_2.csv": UTILITYAPI_HEADER + "\nUID,PG&E,E1,2024-01-15 14:00:00,2024-01-15 15:00:00,1.5,1.5,"
+                                 "1.5,0,America/Los_Angeles,\n",
+            "README.txt": "Bulk export",
+        }
+        self.zip_path = os.path.join(self.tmp_dir, "export.zip")
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("meters/", "")
+            for name, content in self.contents.items():
+                zip_file.writestr(name, content)
+        self.gz_path = os.path.join(self.tmp_dir, "site_1.csv.gz")
+        with gzip.open(self.gz_path, "wt", encoding="utf-8", newline="") as f:
+            f.write(self.contents["meters/site_1.csv"])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_archive_members_as_files(self):
+        paths = expand_meter_paths([self.zip_path, self.gz_path])
+        self.assertEqual(paths, [self.zip_path + "::meters/site_1.csv", self.zip_path + "::meters/site_2.csv",
+                                 self.gz_path])
+        for path, name in zip(paths, ["meters/site_1.csv", "meters/site_2.csv", "meters/site_1.csv"]):
+            with self.subTest(path=path):
+                self.assertTrue(meter_file_exists(path))
+                pd.testing.assert_frame_equal(read_meter_file(path), read_meter_file(self.contents[name].encode()))
+        self.assertEqual(sniff_meter_file(paths[1])["format"], "UtilityAPI")
+        self.assertFalse(meter_file_exists(self.zip_path + "::meters/site_3.csv"))
+
+    def test_streams_without_extracting(self):
+        with patch("zipfile.ZipFile.extract") as extract, patch("zipfile.ZipFile.read") as read:
+            df = read_meter_file(self.zip_path + "::meters/site_1.csv")
+            extract.assert_not_called()
+            read.assert_not_called()
+        site_spec = {"panel_size_A": 100, "panel_voltage_V": 240}
+        expected = calculate_nec_22087_capacity(read_meter_file(self.contents["meters/site_1.csv"].encode()), site_spec)
+        self.assertEqual(calculate_nec_22087_capacity(df, site_spec)[1], expected[1])
+
+    def test_zip_archive_without_member(self):
+        single_path = os.path.join(self.tmp_dir, "single.zip")
+        with zipfile.ZipFile(single_path, "w") as zip_file:
+            zip_file.writestr("site_1.csv", self.contents["meters/site_1.csv"])
+        self.assertEqual(len(read_meter_file(single_path)), 96)
+
+        with self.assertRaisesRegex(ValueError, "holds 2 CSV files"):
+            sniff_meter_file(self.zip_path)
+        with self.assertRaises(FileNotFoundError):
+            sniff_meter_file(self.zip_path + "::meters/site_3.csv")
+        damaged_path = os.path.join(self.tmp_dir, "damaged.zip")
+        with open(damaged_path, "wb") as f:
+            f.write(b"not a zip archive")
+        self.assertEqual(expand_meter_paths([damaged_path]), [damaged_path])
+        with self.assertRaisesRegex(ValueError, "not a valid zip archive"):
+            sniff_meter_file(damaged_path)
+
+    def test_rollup_of_archive_member(self):
+        path = self.zip_path + "::meters/site_1.csv"
+        rollup = load_hourly_rollup(path)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "export.zip.meters_site_1.csv.rollup")))
+        with patch("hea_nec.rollups.read_meter_file") as read:
+            self.assertEqual(load_hourly_rollup(path).attrs, rollup.attrs)
+            read.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
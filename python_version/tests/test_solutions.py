@@ -1,9 +1,15 @@
+import io
 import unittest
+from unittest.mock import patch
 import pandas as pd
 import numpy as np
 from typing import Dict, Any
 
-from hea_nec.methods import calculate_nec_compliance_for_solutions
+
+from hea_nec.methods import (
+    EDITION_COLUMNS, _result_columns, calculate_nec_compliance_for_solutions, compact_solutions, get_peak_hourly_load,
+    iter_nec_compliance_for_solutions, read_solutions_csv
+)
 
 class TestNEC22087ExampleSolutions(unittest.TestCase):
 
@@ -85,6 +91,8 @@ class TestNEC22087ExampleSolutions(unittest.TestCase):
         self.assertAlmostEqual(row['added_load_kw'], 15.5, places=1)
         self.assertAlmostEqual(row['total_demand_amps'], 116.66, places=1)
         self.assertEqual(row['status'], 'PASS') # 116A < 200A
+        self.assertAlmostEqual(row['headroom_amps'], 83.33, places=1)
+        self.assertEqual(row['min_panel_size_A'], 125) # smallest standard size >= 116.67A
 
     def test_scenario_B_circuit_sharing(self):
         """
@@ -222,6 +230,8 @@ class TestNEC22087ExampleSolutions(unittest.TestCase):
 
         self.assertGreater(total_amps, 100)
         self.assertEqual(row['status'], 'FAIL')
+        self.assertAlmostEqual(row['headroom_amps'], 100 - total_amps)
+        self.assertEqual(row['min_panel_size_A'], 125)
 
     def test_batch_processing_multiple_solutions(self):
         """
@@ -283,5 +293,213 @@ class TestNEC22087ExampleSolutions(unittest.TestCase):
         self.assertEqual(row['removed_load_credit_kw'], 0.0) # no removing of loads in 2023 mode
         self.assertEqual(row['added_load_kw'], 1.6) # 0.8 * 2 kW
 
+class TestStreamingSolutions(unittest.TestCase):
+
+    create_dummy_meter_data = TestNEC22087ExampleSolutions.create_dummy_meter_data
+
+    def setUp(self):
+        TestNEC22087ExampleSolutions.setUp(self)
+        data = [
+            [2, 101, 1, 'EVSE-A', 'new', 'evse', 'Level 2 EVSE', 7200, 1, np.nan, np.nan, 'electric'],
+            [2, 101, 2, 'EVSE-A', 'new', 'evse', 'Level 2 EVSE', 7200, 1, 'circuit_pausing', np.nan, 'electric'],
+            [1, 101, 1, 'AC-B', 'new', 'cooling', 'Window AC', 1500, 1, np.nan, np.nan, 'electric'],
+            [3, 101, 1, 'AC-B', 'new', 'cooling', 'Window AC', 1500, 1, np.nan, np.nan, 'electric']
+        ]
+        self.df_sol = pd.DataFrame(data, columns=self.cols)
+        self.meter_data = {
+            1: self.create_dummy_meter_data(peak_kw_value=10.0),
+            2: self.create_dummy_meter_data(peak_kw_value=15.0)
+        }
+
+    def test_blocks_per_site(self):
+        blocks = list(iter_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs))
+        self.assertEqual([block['site_id'].unique().tolist() for block in blocks], [[1], [2], [3]])
+        self.assertEqual(blocks[1]['status'].tolist(), ['FAIL', 'PASS'])
+        self.assertEqual(blocks[2]['status'].tolist(), ['Error'])  # no meter data for site 3
+        self.assertEqual(list(blocks[0].columns), list(blocks[2].columns))
+
+    def test_matches_batch_result(self):
+        streamed = pd.concat(
+            iter_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs), ignore_index=True)
+        batch = calculate_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs)
+        pd.testing.assert_frame_equal(streamed, batch)
+
+    def test_meter_data_loaded_lazily(self):
+        accessed = []
+
+        class LazyMeterData(dict):
+            def get(inner_self, site_id, default=None):
+                accessed.append(site_id)
+                return super().get(site_id, default)
+
+        results = iter_nec_compliance_for_solutions(self.df_sol, LazyMeterData(self.meter_data), self.site_specs)
+        next(results)
+        self.assertEqual(accessed, [1])
+
+    def test_no_solutions(self):
+        result = calculate_nec_compliance_for_solutions(self.df_sol.iloc[:0], self.meter_data, self.site_specs)
+        self.assertEqual(len(result), 0)
+        self.assertIn('status', result.columns)
+
+class TestScreening(unittest.TestCase):
+
+    create_dummy_meter_data = TestNEC22087ExampleSolutions.create_dummy_meter_data
+
+    def setUp(self):
+        TestStreamingSolutions.setUp(self)
+
+    def test_decided_sites_skip_exact_peak(self):
+        expected = calculate_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs)
+        with patch('hea_nec.methods.get_peak_hourly_load') as get_peak_hourly_load:
+            result = calculate_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs, screen=True)
+            get_peak_hourly_load.assert_not_called()
+
+        self.assertEqual(result['status'].tolist(), expected['status'].tolist())
+        self.assertEqual(result['screened'].tolist(), [True, True, True, False])
+        self.assertTrue(result.loc[result['screened'], 'historical_peak_kw'].isna().all())
+        # Hourly readings: both bounds are the exact peak
+        self.assertAlmostEqual(result['peak_lower_bound_kw'].iloc[0], 10.0)
+        self.assertAlmostEqual(result['peak_upper_bound_kw'].iloc[0], 10.0)
+        columns = ['site_id', 'equipment_combo_id', 'added_load_kw', 'removed_load_credit_kw', 'status']
+        pd.testing.assert_frame_equal(result[columns], expected[columns])
+
+    def test_undecided_site_gets_exact_peak(self):
+        # 15-minute readings: peak 1.1 x 4 = 4.4 kW, upper bound 4.4 x 1.3 = 5.72 kW; with 17.5 kW added to a 100A panel
+        # (24 kW), the solution passes at the peak but would fail at the upper bound
+        dates = pd.date_range('2023-01-01', periods=96, freq='15min')
+        meter_data = {2: pd.DataFrame({'DateTime': dates, 'kWh': np.tile([1.0, 1.1], 48)})}
+        df_sol = pd.DataFrame(
+            [[2, 101, 1, 'AC-B', 'new', 'cooling', 'Central AC', 17500, 1, np.nan, np.nan, 'electric']],
+            columns=self.cols)
+
+        expected = calculate_nec_compliance_for_solutions(df_sol, meter_data, self.site_specs)
+        result = calculate_nec_compliance_for_solutions(df_sol, meter_data, self.site_specs, screen=True)
+        self.assertEqual(result['status'].tolist(), ['PASS'])
+        self.assertEqual(result['screened'].tolist(), [False])
+        self.assertAlmostEqual(result['peak_upper_bound_kw'].iloc[0], 5.72)
+        pd.testing.assert_frame_equal(result[expected.columns], expected)
+
+    def test_no_solutions(self):
+        result = calculate_nec_compliance_for_solutions(self.df_sol.iloc[:0], self.meter_data, self.site_specs,
+                                                        screen=True)
+        self.assertIn('screened', result.columns)
+
+class TestMultipleEditions(unittest.TestCase):
+
+    def setUp(self):
+        TestCompactSolutions.setUp(self)
+        # Site 3 without meter data
+        self.df_sol = pd.concat([self.df_sol, self.df_sol[self.df_sol['site_id'] == "1"].assign(site_id="3")],
+                                ignore_index=True)
+        self.site_specs["3"] = {"panel_size_A": 100}
+
+    def test_matches_single_edition_results(self):
+        with patch('hea_nec.methods.get_peak_hourly_load', wraps=get_peak_hourly_load) as peak:
+            result = calculate_nec_compliance_for_solutions(
+                self.df_sol, self.meter_data, self.site_specs, code_edition=("2023", "2026"))
+        # One peak calculation per site with meter data, shared by both editions
+        self.assertEqual(peak.call_count, 2)
+        self.assertEqual(len(result), 12)
+        self.assertNotIn('code_edition', result.columns)
+
+        for code_edition in ["2023", "2026"]:
+            with self.subTest(code_edition=code_edition):
+                expected = calculate_nec_compliance_for_solutions(
+                    self.df_sol, self.meter_data, self.site_specs, code_edition=code_edition)
+                pd.testing.assert_series_equal(result['historical_peak_kw'], expected['historical_peak_kw'])
+                for column in EDITION_COLUMNS:
+                    pd.testing.assert_series_equal(result[f'{column}_{code_edition}'], expected[column],
+                                                   check_names=False)
+        # Cooking aggregation and removed load credit only apply under 2026
+        cooking = result['load_control_combo_id'] == 1
+        self.assertTrue((result.loc[cooking, 'added_load_watts_2026']
+                         < result.loc[cooking, 'added_load_watts_2023']).all())
+        self.assertEqual(result['removed_load_watts_2023'].max(), 0.0)
+        self.assertEqual(result['removed_load_watts_2026'].max(), 5000.0)
+
+    def test_screening_and_gaps(self):
+        expected = calculate_nec_compliance_for_solutions(
+            self.df_sol, self.meter_data, self.site_specs, code_edition=["2026", "2023"])
+        result = calculate_nec_compliance_for_solutions(
+            self.df_sol, self.meter_data, self.site_specs, code_edition=["2026", "2023"], detect_gaps=True,
+            screen=True)
+        self.assertEqual(list(result.columns), _result_columns(["2026", "2023"], detect_gaps=True, screen=True))
+        self.assertEqual(result['status_2023'].tolist(), expected['status_2023'].tolist())
+        self.assertEqual(result['status_2026'].tolist(), expected['status_2026'].tolist())
+        self.assertEqual(result.loc[result['site_id'] == "3", 'status_2023'].unique().tolist(), ['Error'])
+
+    def test_no_solutions_and_unsupported_edition(self):
+        result = calculate_nec_compliance_for_solutions(self.df_sol.iloc[:0], self.meter_data, self.site_specs,
+                                                        code_edition=("2023", "2026"))
+        self.assertIn('status_2026', result.columns)
+        for code_edition in [("2023", "2020"), ()]:
+            with self.assertRaises(ValueError):
+                calculate_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs,
+                                                       code_edition=code_edition)
+
+class TestCompactSolutions(unittest.TestCase):
+
+    def setUp(self):
+        TestNEC22087ExampleSolutions.setUp(self)
+        self.site_specs = {"1": {"panel_size_A": 200, "panel_voltage_V": 240},
+                           "2": {"panel_size_A": 100, "panel_voltage_V": 240}}
+        self.meter_data = {
+            "1": TestNEC22087ExampleSolutions.create_dummy_meter_data(self, peak_kw_value=10.0),
+            "2": TestNEC22087ExampleSolutions.create_dummy_meter_data(self, peak_kw_value=15.0),
+        }
+        data = []
+        for site_id in ["1", "2"]:
+            for combo in [101, 102]:
+                data += [
+                    [site_id, combo, 1, 'EVSE-A', 'new', 'evse', 'Level 2 EVSE', 7200, 1, np.nan, np.nan, 'electric'],
+                    [site_id, combo, 1, 'DRYER-A', 'new', 'clothes dryer', 'Dryer', 4500, 1, np.nan, np.nan, 'gas'],
+                    [site_id, combo, 1, 'RANGE-A', 'new', 'cooking', 'Range', 12000, 1, 'circuit_sharing', 'K', 'electric'],
+                    [site_id, combo, 1, 'OVEN-A', 'new', 'oven', 'Oven', 4000, 2, 'circuit_sharing', 'K', 'electric'],
+                    [site_id, combo, 2, 'HP-A', 'new', 'heat pump', 'HP', 3000 * combo % 7, np.nan, 'circuit_pausing',
+                     np.nan, np.nan],
+                    [site_id, combo, 2, 'FURNACE', 'removed', 'furnace', 'Furnace', 5000, 1, np.nan, np.nan, 'electric'],
+                ]
+        self.df_sol = pd.DataFrame(data, columns=self.cols)
+
+    def test_same_results_as_plain_table(self):
+        compact = compact_solutions(self.df_sol)
+        self.assertIsInstance(compact['generic_device'].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact['equipment_combo_id'].dtype, np.int8)
+        self.assertEqual(compact['load_nameplate_power'].dtype, np.float32)
+        self.assertLess(compact.memory_usage(deep=True).sum(), self.df_sol.memory_usage(deep=True).sum() / 2)
+
+        for code_edition in ["2023", "2026"]:
+            with self.subTest(code_edition=code_edition):
+                expected = calculate_nec_compliance_for_solutions(
+                    self.df_sol, self.meter_data, self.site_specs, code_edition=code_edition)
+                actual = calculate_nec_compliance_for_solutions(
+                    compact, self.meter_data, self.site_specs, code_edition=code_edition)
+                pd.testing.assert_frame_equal(actual.astype({'site_id': str}), expected, check_dtype=False)
+
+    def test_fractional_nameplates_stay_exact(self):
+        self.df_sol['load_nameplate_power'] += 0.567
+        compact = compact_solutions(self.df_sol)
+        self.assertEqual(compact['load_nameplate_power'].dtype, np.float64)
+        self.assertEqual(compact['load_count'].dtype, np.float32)
+
+        expected = calculate_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs)
+        actual = calculate_nec_compliance_for_solutions(compact, self.meter_data, self.site_specs)
+        pd.testing.assert_frame_equal(actual.astype({'site_id': str}), expected, check_dtype=False, check_exact=True)
+
+    def test_read_solutions_csv(self):
+        buffer = io.StringIO()
+        self.df_sol.to_csv(buffer, index=False)
+        buffer.seek(0)
+        solutions_df = read_solutions_csv(buffer)
+
+        self.assertIsInstance(solutions_df['site_id'].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(solutions_df['site_id'].cat.categories), ["1", "2"])
+        self.assertIsInstance(solutions_df['load_control_type'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_integer_dtype(solutions_df['load_control_combo_id']))
+
+        expected = calculate_nec_compliance_for_solutions(self.df_sol, self.meter_data, self.site_specs)
+        actual = calculate_nec_compliance_for_solutions(solutions_df, self.meter_data, self.site_specs)
+        pd.testing.assert_frame_equal(actual.astype({'site_id': str}), expected, check_dtype=False)
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file